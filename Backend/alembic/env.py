@@ -25,10 +25,22 @@ if config.config_file_name is not None:
 target_metadata = Base.metadata
 
 
+# Índices que NO están en los modelos a propósito: los de pg_trgm (dependen de la
+# extensión, viven solo en su migración) y los por campo que crea la app en runtime.
+INDICES_FUERA_DE_MODELOS = (
+    "ix_comuneros_nombre_trgm",
+    "ix_comuneros_documento_trgm",
+    "ix_comuneros_campo_",
+)
+
+
 # ✅ Solo migramos tablas que están en nuestros modelos (ignora PostGIS y tablas externas)
 def include_object(object_, name, type_, reflected, compare_to):
     if type_ == "table":
         return name in target_metadata.tables
+    if type_ == "index" and reflected and compare_to is None:
+        # que autogenerate no proponga borrarlos
+        return not (name or "").startswith(INDICES_FUERA_DE_MODELOS)
     return True
 
 
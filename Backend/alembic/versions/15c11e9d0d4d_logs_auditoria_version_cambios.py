@@ -0,0 +1,53 @@
+"""logs_auditoria: version por entidad + cambios (diff) para el modo compacto
+
+Revision ID: 15c11e9d0d4d
+Revises: 7146c4056d12
+Create Date: 2026-03-10 11:02:37.604518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '15c11e9d0d4d'
+down_revision: Union[str, Sequence[str], None] = '7146c4056d12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.add_column("logs_auditoria", sa.Column("version", sa.Integer(), nullable=True))
+    op.add_column("logs_auditoria", sa.Column("cambios", postgresql.JSONB(), nullable=True))
+
+    # historia existente: versiones 1..n por entidad en orden de id (todos son snapshots enteros)
+    op.execute(sa.text(
+        "UPDATE logs_auditoria l SET version = v.n "
+        "FROM (SELECT id, row_number() OVER (PARTITION BY entidad, entidad_id ORDER BY id) AS n "
+        "      FROM logs_auditoria) v "
+        "WHERE l.id = v.id"
+    ))
+    op.alter_column("logs_auditoria", "version", nullable=False)
+
+    op.create_index(
+        "ix_logs_entidad_entidad_id_version",
+        "logs_auditoria",
+        ["entidad", "entidad_id", "version"],
+    )
+    # el índice viejo viene del create_all previo al baseline
+    op.execute(sa.text('DROP INDEX IF EXISTS "ix_logs_entidad_entidad_id"'))
+
+
+def downgrade():
+    op.create_index(
+        "ix_logs_entidad_entidad_id",
+        "logs_auditoria",
+        ["entidad", "entidad_id"],
+    )
+    op.drop_index("ix_logs_entidad_entidad_id_version", table_name="logs_auditoria")
+    # OJO: los logs guardados como diff pierden los cambios (no se re-expanden)
+    op.drop_column("logs_auditoria", "cambios")
+    op.drop_column("logs_auditoria", "version")
@@ -0,0 +1,50 @@
+"""importaciones: jobs de importación CSV/XLSX de comuneros
+
+Revision ID: 26bb0f779ff2
+Revises: fe2e1ae0acb3
+Create Date: 2026-03-07 11:40:03.582614
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '26bb0f779ff2'
+down_revision: Union[str, Sequence[str], None] = 'fe2e1ae0acb3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.create_table(
+        "importaciones",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("usuario_id", sa.Integer(), nullable=False),
+        sa.Column("archivo", sa.String(length=255), nullable=False),
+        sa.Column("formato", sa.String(length=10), nullable=False),
+        sa.Column("estado", sa.String(length=20), server_default=sa.text("'pendiente'"), nullable=False),
+        sa.Column("filas_procesadas", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("insertados", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("errores", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("errores_detalle", postgresql.JSONB(astext_type=sa.Text()), server_default=sa.text("'[]'::jsonb"), nullable=False),
+        sa.Column("mensaje", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("iniciado_en", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finalizado_en", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["usuario_id"], ["usuarios.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_importaciones_id"), "importaciones", ["id"], unique=False)
+    op.create_index(op.f("ix_importaciones_usuario_id"), "importaciones", ["usuario_id"], unique=False)
+    op.create_index(op.f("ix_importaciones_estado"), "importaciones", ["estado"], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f("ix_importaciones_estado"), table_name="importaciones")
+    op.drop_index(op.f("ix_importaciones_usuario_id"), table_name="importaciones")
+    op.drop_index(op.f("ix_importaciones_id"), table_name="importaciones")
+    op.drop_table("importaciones")
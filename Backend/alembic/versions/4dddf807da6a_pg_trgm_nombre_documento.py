@@ -0,0 +1,41 @@
+"""pg_trgm: índices GIN trigram en comuneros.nombre y documento
+
+Revision ID: 4dddf807da6a
+Revises: 7e76f7809632
+Create Date: 2026-03-05 16:02:11.370981
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4dddf807da6a'
+down_revision: Union[str, Sequence[str], None] = '7e76f7809632'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    # Extensión estándar (contrib). Requiere permisos para CREATE EXTENSION.
+    op.execute(sa.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+    # ILIKE '%x%', `<%` y `%` sobre filas vivas (la búsqueda siempre filtra is_deleted = false)
+    with op.get_context().autocommit_block():
+        op.execute(sa.text(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_comuneros_nombre_trgm" '
+            'ON "comuneros" USING gin ("nombre" gin_trgm_ops) WHERE is_deleted = false'
+        ))
+        op.execute(sa.text(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_comuneros_documento_trgm" '
+            'ON "comuneros" USING gin ("documento" gin_trgm_ops) WHERE is_deleted = false'
+        ))
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute(sa.text('DROP INDEX CONCURRENTLY IF EXISTS "ix_comuneros_documento_trgm"'))
+        op.execute(sa.text('DROP INDEX CONCURRENTLY IF EXISTS "ix_comuneros_nombre_trgm"'))
+    # la extensión se deja: otras bases/objetos podrían usarla
@@ -0,0 +1,32 @@
+"""GIN jsonb_path_ops en comuneros.datos_dinamicos
+
+Revision ID: 5385701c64fd
+Revises: e7cbb81f5d22
+Create Date: 2026-03-03 09:41:52.003114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5385701c64fd'
+down_revision: Union[str, Sequence[str], None] = 'e7cbb81f5d22'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    # jsonb_path_ops: más chico y rápido que jsonb_ops, solo sirve `@>` (justo lo que usamos)
+    with op.get_context().autocommit_block():
+        op.execute(sa.text(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_comuneros_datos_dinamicos_gin" '
+            'ON "comuneros" USING gin ("datos_dinamicos" jsonb_path_ops)'
+        ))
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute(sa.text('DROP INDEX CONCURRENTLY IF EXISTS "ix_comuneros_datos_dinamicos_gin"'))
@@ -0,0 +1,64 @@
+"""versiones_tablas repartida en shards (sin fila caliente por tabla)
+
+Revision ID: 5c2e8d41a7f0
+Revises: a3f19c07d2b8
+Create Date: 2026-03-17 10:31:57.204418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2e8d41a7f0'
+down_revision: Union[str, Sequence[str], None] = 'a3f19c07d2b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SHARDS = 64
+
+
+def _bump(conflicto: str, valores: str) -> str:
+    return (
+        "CREATE OR REPLACE FUNCTION cv_bump_version() RETURNS trigger "
+        "LANGUAGE plpgsql AS $$ "
+        "BEGIN "
+        f"INSERT INTO versiones_tablas {valores} "
+        f"ON CONFLICT {conflicto} DO UPDATE SET version = versiones_tablas.version + 1; "
+        "RETURN NULL; "
+        "END $$"
+    )
+
+
+def upgrade():
+    """
+    La fila actual de cada tabla queda como shard 0 (la suma arranca donde
+    estaba la versión: las ETags vigentes siguen valiendo).
+    """
+    op.add_column(
+        "versiones_tablas",
+        sa.Column("shard", sa.SmallInteger(), nullable=False, server_default=sa.text("0")),
+    )
+    op.alter_column("versiones_tablas", "shard", server_default=None)
+    op.execute(sa.text('ALTER TABLE "versiones_tablas" DROP CONSTRAINT "versiones_tablas_pkey"'))
+    op.execute(sa.text('ALTER TABLE "versiones_tablas" ADD CONSTRAINT "versiones_tablas_pkey" PRIMARY KEY ("tabla", "shard")'))
+    op.execute(sa.text(_bump(
+        "(tabla, shard)",
+        f"(tabla, shard, version) VALUES (TG_TABLE_NAME, mod(pg_backend_pid(), {SHARDS}), 1)",
+    )))
+
+
+def downgrade():
+    op.execute(sa.text(_bump("(tabla)", "(tabla, version) VALUES (TG_TABLE_NAME, 1)")))
+    op.execute(sa.text(
+        'UPDATE "versiones_tablas" v SET "version" = s.total '
+        'FROM (SELECT "tabla", sum("version") AS total FROM "versiones_tablas" GROUP BY "tabla") s '
+        'WHERE v."tabla" = s."tabla" AND v."shard" = 0'
+    ))
+    op.execute(sa.text('DELETE FROM "versiones_tablas" WHERE "shard" <> 0'))
+    op.execute(sa.text('ALTER TABLE "versiones_tablas" DROP CONSTRAINT "versiones_tablas_pkey"'))
+    op.drop_column("versiones_tablas", "shard")
+    op.execute(sa.text('ALTER TABLE "versiones_tablas" ADD CONSTRAINT "versiones_tablas_pkey" PRIMARY KEY ("tabla")'))
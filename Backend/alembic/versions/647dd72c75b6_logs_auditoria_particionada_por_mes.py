@@ -0,0 +1,154 @@
+"""logs_auditoria particionada por mes (RANGE timestamp) + menos índices
+
+Revision ID: 647dd72c75b6
+Revises: 15c11e9d0d4d
+Create Date: 2026-03-11 09:41:18.227105
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '647dd72c75b6'
+down_revision: Union[str, Sequence[str], None] = '15c11e9d0d4d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+MESES_ADELANTE = 3
+
+# índices de una columna que sobran: id (la PK), accion (poco selectivo),
+# entidad / entidad_id (cubiertos por ix_logs_entidad_entidad_id_version)
+INDICES_SOBRANTES = (
+    "ix_logs_auditoria_id",
+    "ix_logs_auditoria_accion",
+    "ix_logs_auditoria_entidad",
+    "ix_logs_auditoria_entidad_id",
+)
+
+# índices que quedan: los de la tabla vieja se renombran y se enganchan al padre en el ATTACH
+INDICES = {
+    "ix_logs_auditoria_usuario_id": '("usuario_id")',
+    "ix_logs_auditoria_timestamp": '("timestamp")',
+    "ix_logs_entidad_entidad_id_version": '("entidad", "entidad_id", "version")',
+}
+
+
+def _mes_siguiente(d: datetime) -> datetime:
+    return datetime(d.year + d.month // 12, d.month % 12 + 1, 1)
+
+
+def upgrade():
+    """
+    Sin copiar filas: la tabla actual pasa a ser la partición "historico"
+    (MINVALUE .. fin del mes en curso) y desde el mes siguiente hay una
+    partición por mes.
+
+    Fuera de la transacción principal (autocommit, sin bloquear lecturas ni
+    escrituras): la PK nueva (id, timestamp) con CONCURRENTLY y el CHECK del
+    rango, agregado NOT VALID (lock breve, sin escaneo) y validado aparte
+    (SHARE UPDATE EXCLUSIVE: escanea pero deja leer y escribir). Con el CHECK
+    ya válido, el ATTACH de la transacción principal no escanea: el
+    ACCESS EXCLUSIVE del RENAME dura lo que tarda el catálogo, no la historia.
+
+    OJO: el CHECK rechaza filas con timestamp >= corte desde que se agrega;
+    correr la migración lejos del fin de mes (corte = 1° del mes siguiente).
+    """
+    conn = op.get_bind()
+    with op.get_context().autocommit_block():
+        op.execute(sa.text(
+            'CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS "logs_auditoria_historico_pkey" '
+            'ON "logs_auditoria" ("id", "timestamp")'
+        ))
+
+        maximo = conn.execute(sa.text('SELECT max("timestamp") FROM "logs_auditoria"')).scalar()
+        ahora = datetime.now(timezone.utc).replace(tzinfo=None)
+        corte = _mes_siguiente(max(ahora, maximo or ahora))
+
+        op.execute(sa.text(
+            f'ALTER TABLE "logs_auditoria" ADD CONSTRAINT "logs_auditoria_historico_rango" '
+            f'CHECK ("timestamp" < \'{corte:%Y-%m-%d}\') NOT VALID'
+        ))
+        op.execute(sa.text('ALTER TABLE "logs_auditoria" VALIDATE CONSTRAINT "logs_auditoria_historico_rango"'))
+
+    # --- la tabla vieja queda como partición histórica
+    for nombre in INDICES_SOBRANTES:
+        op.execute(sa.text(f'DROP INDEX IF EXISTS "{nombre}"'))
+    op.execute(sa.text('ALTER TABLE "logs_auditoria" RENAME TO "logs_auditoria_historico"'))
+    for nombre in INDICES:
+        op.execute(sa.text(f'ALTER INDEX IF EXISTS "{nombre}" RENAME TO "{nombre}_historico"'))
+    op.execute(sa.text('ALTER TABLE "logs_auditoria_historico" DROP CONSTRAINT "logs_auditoria_pkey"'))
+    op.execute(sa.text(
+        'ALTER TABLE "logs_auditoria_historico" ADD CONSTRAINT "logs_auditoria_historico_pkey" '
+        'PRIMARY KEY USING INDEX "logs_auditoria_historico_pkey"'
+    ))
+    op.execute(sa.text(
+        'ALTER TABLE "logs_auditoria_historico" '
+        'RENAME CONSTRAINT "logs_auditoria_usuario_id_fkey" TO "logs_auditoria_historico_usuario_id_fkey"'
+    ))
+
+    # --- padre particionado
+    op.execute(sa.text(
+        'CREATE TABLE "logs_auditoria" ('
+        ' "id" integer NOT NULL DEFAULT nextval(\'logs_auditoria_id_seq\'),'
+        ' "usuario_id" integer NOT NULL,'
+        ' "accion" accion_enum NOT NULL,'
+        ' "entidad" varchar(100) NOT NULL,'
+        ' "entidad_id" integer NOT NULL,'
+        ' "version" integer NOT NULL,'
+        ' "datos_anteriores" jsonb,'
+        ' "datos_nuevos" jsonb,'
+        ' "cambios" jsonb,'
+        ' "timestamp" timestamp without time zone NOT NULL,'
+        ' CONSTRAINT "logs_auditoria_pkey" PRIMARY KEY ("id", "timestamp"),'
+        ' CONSTRAINT "logs_auditoria_usuario_id_fkey" FOREIGN KEY ("usuario_id")'
+        '   REFERENCES "usuarios" ("id") ON DELETE CASCADE'
+        ') PARTITION BY RANGE ("timestamp")'
+    ))
+    op.execute(sa.text('ALTER SEQUENCE "logs_auditoria_id_seq" OWNED BY "logs_auditoria"."id"'))
+    for nombre, columnas in INDICES.items():
+        op.execute(sa.text(f'CREATE INDEX "{nombre}" ON "logs_auditoria" {columnas}'))
+
+    # --- ATTACH de la histórica: el CHECK válido implica el rango, no hay escaneo
+    op.execute(sa.text(
+        f'ALTER TABLE "logs_auditoria" ATTACH PARTITION "logs_auditoria_historico" '
+        f'FOR VALUES FROM (MINVALUE) TO (\'{corte:%Y-%m-%d}\')'
+    ))
+    op.execute(sa.text('ALTER TABLE "logs_auditoria_historico" DROP CONSTRAINT "logs_auditoria_historico_rango"'))
+
+    # --- meses siguientes + DEFAULT (después, el roll-forward lo hace la app / app.jobs.mantener_logs)
+    mes = corte
+    for _ in range(MESES_ADELANTE):
+        siguiente = _mes_siguiente(mes)
+        op.execute(sa.text(
+            f'CREATE TABLE "logs_auditoria_p{mes:%Y%m}" PARTITION OF "logs_auditoria" '
+            f'FOR VALUES FROM (\'{mes:%Y-%m-%d}\') TO (\'{siguiente:%Y-%m-%d}\')'
+        ))
+        mes = siguiente
+    op.execute(sa.text('CREATE TABLE "logs_auditoria_default" PARTITION OF "logs_auditoria" DEFAULT'))
+
+
+def downgrade():
+    # OJO: copia todas las filas (las particiones ya retenidas no vuelven: están en los .csv.gz)
+    op.execute(sa.text(
+        'CREATE TABLE "logs_auditoria_plana" (LIKE "logs_auditoria" INCLUDING DEFAULTS)'
+    ))
+    op.execute(sa.text('INSERT INTO "logs_auditoria_plana" SELECT * FROM "logs_auditoria"'))
+    op.execute(sa.text('ALTER SEQUENCE "logs_auditoria_id_seq" OWNED BY "logs_auditoria_plana"."id"'))
+    op.execute(sa.text('DROP TABLE "logs_auditoria"'))  # arrastra las particiones
+    op.execute(sa.text('ALTER TABLE "logs_auditoria_plana" RENAME TO "logs_auditoria"'))
+
+    op.execute(sa.text('ALTER TABLE "logs_auditoria" ADD CONSTRAINT "logs_auditoria_pkey" PRIMARY KEY ("id")'))
+    op.execute(sa.text(
+        'ALTER TABLE "logs_auditoria" ADD CONSTRAINT "logs_auditoria_usuario_id_fkey" '
+        'FOREIGN KEY ("usuario_id") REFERENCES "usuarios" ("id") ON DELETE CASCADE'
+    ))
+    for nombre, columnas in INDICES.items():
+        op.execute(sa.text(f'CREATE INDEX "{nombre}" ON "logs_auditoria" {columnas}'))
+    for nombre in INDICES_SOBRANTES:
+        columna = nombre.removeprefix("ix_logs_auditoria_")
+        op.execute(sa.text(f'CREATE INDEX "{nombre}" ON "logs_auditoria" ("{columna}")'))
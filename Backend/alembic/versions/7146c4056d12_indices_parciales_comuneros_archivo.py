@@ -0,0 +1,100 @@
+"""índices parciales (filas vivas) en comuneros + comuneros_archivo
+
+Revision ID: 7146c4056d12
+Revises: ca7736c23dfd
+Create Date: 2026-03-09 15:27:31.440873
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7146c4056d12'
+down_revision: Union[str, Sequence[str], None] = 'ca7736c23dfd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# nombre -> (definición nueva parcial, definición vieja completa)
+INDICES = {
+    "ix_comuneros_nombre": (
+        '("nombre") WHERE is_deleted = false',
+        '("nombre")',
+    ),
+    "ix_comunero_nombre_documento": (
+        '("nombre", "documento") WHERE is_deleted = false',
+        '("nombre", "documento")',
+    ),
+    "ix_comuneros_created_at_id": (
+        '("created_at", "id") WHERE is_deleted = false',
+        '("created_at", "id")',
+    ),
+    "ix_comuneros_datos_dinamicos_gin": (
+        'USING gin ("datos_dinamicos" jsonb_path_ops) WHERE is_deleted = false',
+        'USING gin ("datos_dinamicos" jsonb_path_ops)',
+    ),
+}
+
+
+def _reemplazar(nombre: str, definicion: str) -> None:
+    # crear al lado + swap: la tabla nunca queda sin índice
+    op.execute(sa.text(f'DROP INDEX CONCURRENTLY IF EXISTS "{nombre}_nuevo"'))
+    op.execute(sa.text(f'CREATE INDEX CONCURRENTLY "{nombre}_nuevo" ON "comuneros" {definicion}'))
+    op.execute(sa.text(f'DROP INDEX CONCURRENTLY IF EXISTS "{nombre}"'))
+    op.execute(sa.text(f'ALTER INDEX "{nombre}_nuevo" RENAME TO "{nombre}"'))
+
+
+def upgrade():
+    op.create_table(
+        "comuneros_archivo",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("nombre", sa.String(length=150), nullable=False),
+        sa.Column("documento", sa.String(length=50), nullable=False),
+        sa.Column("datos_dinamicos", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("creado_por", sa.Integer(), nullable=False),
+        sa.Column("is_deleted", sa.Boolean(), server_default=sa.text("true"), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("archivado_en", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.ForeignKeyConstraint(["creado_por"], ["usuarios.id"], ondelete="RESTRICT"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_comuneros_archivo_documento"), "comuneros_archivo", ["documento"], unique=False)
+    op.create_index(op.f("ix_comuneros_archivo_archivado_en"), "comuneros_archivo", ["archivado_en"], unique=False)
+
+    with op.get_context().autocommit_block():
+        for nombre, (nueva, _) in INDICES.items():
+            _reemplazar(nombre, nueva)
+
+        # candidatos del job de archivo (solo eliminadas: índice chico)
+        op.execute(sa.text(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_comuneros_eliminados_updated_at" '
+            'ON "comuneros" ("updated_at") WHERE is_deleted = true'
+        ))
+
+        # reemplazados por los parciales / por ix_comuneros_created_at_id
+        op.execute(sa.text('DROP INDEX CONCURRENTLY IF EXISTS "ix_comuneros_is_deleted"'))
+        op.execute(sa.text('DROP INDEX CONCURRENTLY IF EXISTS "ix_comuneros_created_at"'))
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute(sa.text('CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_comuneros_created_at" ON "comuneros" ("created_at")'))
+        op.execute(sa.text('CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_comuneros_is_deleted" ON "comuneros" ("is_deleted")'))
+        op.execute(sa.text('DROP INDEX CONCURRENTLY IF EXISTS "ix_comuneros_eliminados_updated_at"'))
+        for nombre, (_, vieja) in INDICES.items():
+            _reemplazar(nombre, vieja)
+
+    # los archivados vuelven a la tabla viva (eliminados) antes de borrar el archivo
+    op.execute(sa.text(
+        "INSERT INTO comuneros (id, nombre, documento, datos_dinamicos, creado_por, is_deleted, created_at, updated_at) "
+        "SELECT id, nombre, documento, datos_dinamicos, creado_por, true, created_at, updated_at "
+        "FROM comuneros_archivo ON CONFLICT DO NOTHING"
+    ))
+    op.drop_index(op.f("ix_comuneros_archivo_archivado_en"), table_name="comuneros_archivo")
+    op.drop_index(op.f("ix_comuneros_archivo_documento"), table_name="comuneros_archivo")
+    op.drop_table("comuneros_archivo")
@@ -0,0 +1,38 @@
+"""campos_formulario.indexado + función cv_fecha
+
+Revision ID: 7e76f7809632
+Revises: 5385701c64fd
+Create Date: 2026-03-04 11:20:37.845120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e76f7809632'
+down_revision: Union[str, Sequence[str], None] = '5385701c64fd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.add_column(
+        "campos_formulario",
+        sa.Column("indexado", sa.Boolean(), nullable=False, server_default=sa.text("false")),
+    )
+
+    # Wrapper IMMUTABLE de to_date para índices de expresión en campos tipo date
+    op.execute(sa.text(
+        "CREATE OR REPLACE FUNCTION cv_fecha(text) RETURNS date "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE "
+        "AS $$ SELECT to_date($1, 'YYYY-MM-DD') $$"
+    ))
+
+
+def downgrade():
+    # Los índices ix_comuneros_campo_<id> dependen de cv_fecha (si hay campos date)
+    op.execute(sa.text("DROP FUNCTION IF EXISTS cv_fecha(text) CASCADE"))
+    op.drop_column("campos_formulario", "indexado")
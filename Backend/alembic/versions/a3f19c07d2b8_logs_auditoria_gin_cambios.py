@@ -0,0 +1,66 @@
+"""logs_auditoria: GIN sobre cambios (búsqueda por campo cambiado y valor)
+
+Revision ID: a3f19c07d2b8
+Revises: ce4d9495cb30
+Create Date: 2026-03-16 09:48:31.502617
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f19c07d2b8'
+down_revision: Union[str, Sequence[str], None] = 'ce4d9495cb30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# nombre -> (expresión, sufijo de los índices de cada partición)
+INDICES = {
+    "ix_logs_cambios_gin": ('USING gin ("cambios" jsonb_path_ops)', "cambios_gin"),
+    "ix_logs_cambios_claves_gin": ('USING gin (cv_claves("cambios"))', "cambios_claves_gin"),
+}
+
+
+def _particiones(conn) -> list[str]:
+    return list(conn.execute(sa.text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'logs_auditoria'::regclass ORDER BY c.relname"
+    )).scalars())
+
+
+def upgrade():
+    """
+    Dos GIN: jsonb_path_ops sobre cambios para `cambios @> {ruta: {"a": v}}`
+    (hash de ruta + valor: exacto, sin recheck de valores iguales en otras
+    rutas) y uno sobre el conjunto de rutas, cv_claves(cambios), para buscar
+    solo por la clave (jsonb_path_ops no sirve para `?`).
+    Mismo esquema que dd5a209d5545: ON ONLY en el padre + CONCURRENTLY por partición + ATTACH.
+    """
+    op.execute(sa.text(
+        "CREATE OR REPLACE FUNCTION cv_claves(jsonb) RETURNS text[] "
+        "LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE "
+        "AS $$ SELECT array(SELECT jsonb_object_keys($1)) $$"
+    ))
+
+    conn = op.get_bind()
+    particiones = _particiones(conn)
+
+    for nombre, (expresion, sufijo) in INDICES.items():
+        op.execute(sa.text(f'CREATE INDEX IF NOT EXISTS "{nombre}" ON ONLY "logs_auditoria" {expresion}'))
+
+    with op.get_context().autocommit_block():
+        for nombre, (expresion, sufijo) in INDICES.items():
+            for particion in particiones:
+                hijo = f"{particion}_{sufijo}"
+                op.execute(sa.text(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{hijo}" ON "{particion}" {expresion}'))
+                op.execute(sa.text(f'ALTER INDEX "{nombre}" ATTACH PARTITION "{hijo}"'))
+
+
+def downgrade():
+    for nombre in INDICES:
+        op.execute(sa.text(f'DROP INDEX IF EXISTS "{nombre}"'))
+    op.execute(sa.text("DROP FUNCTION IF EXISTS cv_claves(jsonb)"))
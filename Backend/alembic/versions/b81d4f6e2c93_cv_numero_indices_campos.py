@@ -0,0 +1,63 @@
+"""función cv_numero + índices de campos numéricos sobre ella
+
+Revision ID: b81d4f6e2c93
+Revises: 5c2e8d41a7f0
+Create Date: 2026-03-18 09:12:44.610382
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81d4f6e2c93'
+down_revision: Union[str, Sequence[str], None] = '5c2e8d41a7f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TIPOS_NUMERICOS = ("number", "float", "int", "integer")
+
+
+def _reconstruir_indices(plantilla: str) -> None:
+    """
+    ix_comuneros_campo_<id> de los campos numéricos indexados, con la expresión
+    nueva (la de app.utils.filtros.expresion_campo; si no coinciden el planner
+    no usa el índice). `plantilla` recibe la expresión (datos_dinamicos ->> 'campo').
+    """
+    conn = op.get_bind()
+    campos = conn.execute(
+        sa.text(
+            "SELECT id, nombre_campo FROM campos_formulario "
+            "WHERE indexado AND activo AND lower(trim(tipo)) = ANY(:tipos)"
+        ),
+        {"tipos": list(TIPOS_NUMERICOS)},
+    ).all()
+
+    with op.get_context().autocommit_block():
+        for campo_id, nombre_campo in campos:
+            nombre = f"ix_comuneros_campo_{campo_id}"
+            valor = "(datos_dinamicos ->> '{}')".format(nombre_campo.replace("'", "''"))
+            conn.exec_driver_sql(f'DROP INDEX CONCURRENTLY IF EXISTS "{nombre}"')
+            conn.exec_driver_sql(
+                f'CREATE INDEX CONCURRENTLY "{nombre}" ON comuneros (({plantilla.format(valor)})) '
+                "WHERE is_deleted = false"
+            )
+
+
+def upgrade():
+    # cast a numeric que da NULL (en vez de error) si el texto no es un número
+    op.execute(sa.text(
+        "CREATE OR REPLACE FUNCTION cv_numero(text) RETURNS numeric "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE "
+        "AS $$ SELECT CASE WHEN $1 ~ '^\\s*-?[0-9]+(\\.[0-9]+)?([eE][-+]?[0-9]{1,4})?\\s*$' "
+        "THEN $1::numeric END $$"
+    ))
+    _reconstruir_indices("cv_numero({})")
+
+
+def downgrade():
+    _reconstruir_indices("CAST({} AS NUMERIC)")
+    op.execute(sa.text("DROP FUNCTION IF EXISTS cv_numero(text)"))
@@ -0,0 +1,52 @@
+"""trabajos: jobs en background genéricos (operaciones masivas)
+
+Revision ID: ca7736c23dfd
+Revises: 26bb0f779ff2
+Create Date: 2026-03-08 09:12:44.905117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ca7736c23dfd'
+down_revision: Union[str, Sequence[str], None] = '26bb0f779ff2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.create_table(
+        "trabajos",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("tipo", sa.String(length=50), nullable=False),
+        sa.Column("usuario_id", sa.Integer(), nullable=False),
+        sa.Column("estado", sa.String(length=20), server_default=sa.text("'pendiente'"), nullable=False),
+        sa.Column("parametros", postgresql.JSONB(astext_type=sa.Text()), server_default=sa.text("'{}'::jsonb"), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=True),
+        sa.Column("procesados", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("afectados", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("resultado", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column("mensaje", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("iniciado_en", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finalizado_en", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["usuario_id"], ["usuarios.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_trabajos_id"), "trabajos", ["id"], unique=False)
+    op.create_index(op.f("ix_trabajos_tipo"), "trabajos", ["tipo"], unique=False)
+    op.create_index(op.f("ix_trabajos_usuario_id"), "trabajos", ["usuario_id"], unique=False)
+    op.create_index(op.f("ix_trabajos_estado"), "trabajos", ["estado"], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f("ix_trabajos_estado"), table_name="trabajos")
+    op.drop_index(op.f("ix_trabajos_usuario_id"), table_name="trabajos")
+    op.drop_index(op.f("ix_trabajos_tipo"), table_name="trabajos")
+    op.drop_index(op.f("ix_trabajos_id"), table_name="trabajos")
+    op.drop_table("trabajos")
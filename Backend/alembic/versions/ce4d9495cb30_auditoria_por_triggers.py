@@ -0,0 +1,137 @@
+"""backend de auditoría "trigger": cv_auditar() + triggers por sentencia
+
+Revision ID: ce4d9495cb30
+Revises: dd5a209d5545
+Create Date: 2026-03-13 11:22:05.640193
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ce4d9495cb30'
+down_revision: Union[str, Sequence[str], None] = 'dd5a209d5545'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# tabla -> (columna de baja lógica, valor que significa "eliminado")
+TABLAS_AUDITADAS = {
+    "comuneros": ("is_deleted", "true"),
+    "campos_formulario": ("activo", "false"),
+    "usuarios": ("activo", "false"),
+}
+
+TRIGGERS = (
+    ("INSERT", "ins", "NEW TABLE AS nuevas"),
+    ("UPDATE", "upd", "OLD TABLE AS viejas NEW TABLE AS nuevas"),
+    ("DELETE", "del", "OLD TABLE AS viejas"),
+)
+
+
+def upgrade():
+    """
+    Los triggers quedan instalados siempre; solo auditan si la transacción fija
+    app.usuario_id, cosa que la app hace con AUDITORIA_BACKEND=trigger.
+    """
+    op.execute(sa.text(
+        "CREATE OR REPLACE FUNCTION cv_snap(tabla text, fila jsonb) RETURNS jsonb "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$ "
+        "SELECT CASE tabla "
+        "WHEN 'usuarios' THEN (fila - 'hashed_password') || jsonb_build_object('rol', lower(fila->>'rol')) "
+        "ELSE fila END "
+        "$$"
+    ))
+    op.execute(sa.text(
+        "CREATE OR REPLACE FUNCTION cv_diff_jsonb(antes jsonb, despues jsonb) RETURNS jsonb "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$ "
+        "WITH claves AS ("
+        " SELECT k FROM jsonb_object_keys(antes) AS k UNION SELECT k FROM jsonb_object_keys(despues) AS k"
+        "), objetos AS ("
+        " SELECT k, jsonb_typeof(antes->k) = 'object' AND jsonb_typeof(despues->k) = 'object' AS anidado FROM claves"
+        "), rutas AS ("
+        " SELECT k AS ruta, antes->k AS v0, despues->k AS v1, antes ? k AS h0, despues ? k AS h1"
+        " FROM objetos WHERE NOT anidado"
+        " UNION ALL"
+        " SELECT o.k || '.' || s, antes->o.k->s, despues->o.k->s, (antes->o.k) ? s, (despues->o.k) ? s"
+        " FROM objetos o CROSS JOIN LATERAL ("
+        "  SELECT jsonb_object_keys(CASE WHEN o.anidado THEN antes->o.k ELSE '{}' END) AS s"
+        "  UNION SELECT jsonb_object_keys(CASE WHEN o.anidado THEN despues->o.k ELSE '{}' END)"
+        " ) sub"
+        ") "
+        "SELECT coalesce(jsonb_object_agg(ruta,"
+        " CASE WHEN h0 THEN jsonb_build_object('de', v0) ELSE '{}' END"
+        " || CASE WHEN h1 THEN jsonb_build_object('a', v1) ELSE '{}' END), '{}') "
+        "FROM rutas WHERE h0 IS DISTINCT FROM h1 OR v0 IS DISTINCT FROM v1 "
+        "$$"
+    ))
+    op.execute(sa.text(
+        "CREATE OR REPLACE FUNCTION cv_auditar() RETURNS trigger "
+        "LANGUAGE plpgsql AS $$ "
+        "DECLARE "
+        " usuario integer := nullif(current_setting('app.usuario_id', true), '')::integer; "
+        " modo text := coalesce(nullif(current_setting('app.auditoria_modo', true), ''), 'completo'); "
+        " cada integer := greatest(coalesce(nullif(current_setting('app.auditoria_checkpoint', true), '')::integer, 20), 1); "
+        " marca text := TG_ARGV[0]; "
+        " eliminado boolean := TG_ARGV[1]::boolean; "
+        " filas_id integer[]; "
+        " filas_antes jsonb[]; "
+        " filas_despues jsonb[]; "
+        "BEGIN "
+        " IF usuario IS NULL OR current_setting('app.auditar', true) = 'off' THEN RETURN NULL; END IF; "
+        " IF TG_OP = 'INSERT' THEN "
+        "  SELECT array_agg(n.id), array_agg(NULL::jsonb), array_agg(to_jsonb(n)) "
+        "  INTO filas_id, filas_antes, filas_despues FROM nuevas n; "
+        " ELSIF TG_OP = 'UPDATE' THEN "
+        "  SELECT array_agg(n.id), array_agg(to_jsonb(v)), array_agg(to_jsonb(n)) "
+        "  INTO filas_id, filas_antes, filas_despues FROM nuevas n JOIN viejas v ON v.id = n.id; "
+        " ELSE "
+        "  SELECT array_agg(v.id), array_agg(to_jsonb(v)), array_agg(NULL::jsonb) "
+        "  INTO filas_id, filas_antes, filas_despues FROM viejas v; "
+        " END IF; "
+        " IF filas_id IS NULL THEN RETURN NULL; END IF; "
+        # mismo lock por registro que log_crud.registrar_log: versiones sin carreras
+        " PERFORM pg_advisory_xact_lock(hashtext(TG_TABLE_NAME), i) FROM unnest(filas_id) AS i ORDER BY i; "
+        " INSERT INTO logs_auditoria (usuario_id, accion, entidad, entidad_id, version,"
+        "  datos_anteriores, datos_nuevos, cambios, \"timestamp\") "
+        " SELECT usuario, "
+        "  (CASE WHEN f.antes IS NULL THEN 'CREAR' WHEN f.despues IS NULL THEN 'ELIMINAR' "
+        "   WHEN (f.despues->>marca)::boolean = eliminado AND (f.antes->>marca)::boolean <> eliminado THEN 'ELIMINAR' "
+        "   ELSE 'EDITAR' END)::accion_enum, "
+        "  TG_TABLE_NAME, f.id, f.version, "
+        "  CASE WHEN f.solo_diff THEN NULL ELSE f.antes END, "
+        "  CASE WHEN f.solo_diff AND mod(f.version - 1, cada) <> 0 THEN NULL ELSE f.despues END, "
+        "  CASE WHEN f.antes IS NOT NULL AND f.despues IS NOT NULL THEN cv_diff_jsonb(f.antes, f.despues) END, "
+        "  timezone('utc', clock_timestamp()) "
+        " FROM ("
+        "  SELECT t.id, t.antes, t.despues, "
+        "   modo = 'diff' AND t.antes IS NOT NULL AND t.despues IS NOT NULL AS solo_diff, "
+        "   coalesce((SELECT max(l.version) FROM logs_auditoria l "
+        "             WHERE l.entidad = TG_TABLE_NAME AND l.entidad_id = t.id), 0) + 1 AS version "
+        "  FROM unnest(filas_id, filas_antes, filas_despues) AS u(id, a, d) "
+        "  CROSS JOIN LATERAL (SELECT u.id, cv_snap(TG_TABLE_NAME, u.a) AS antes, cv_snap(TG_TABLE_NAME, u.d) AS despues) t"
+        " ) f "
+        " WHERE f.antes IS DISTINCT FROM f.despues; "
+        " RETURN NULL; "
+        "END $$"
+    ))
+
+    for tabla, (marca, eliminado) in TABLAS_AUDITADAS.items():
+        for evento, sufijo, transicion in TRIGGERS:
+            op.execute(sa.text(
+                f'CREATE TRIGGER "trg_{tabla}_auditoria_{sufijo}" '
+                f'AFTER {evento} ON "{tabla}" REFERENCING {transicion} '
+                f"FOR EACH STATEMENT EXECUTE FUNCTION cv_auditar('{marca}', '{eliminado}')"
+            ))
+
+
+def downgrade():
+    for tabla in TABLAS_AUDITADAS:
+        for _, sufijo, _ in TRIGGERS:
+            op.execute(sa.text(f'DROP TRIGGER IF EXISTS "trg_{tabla}_auditoria_{sufijo}" ON "{tabla}"'))
+    op.execute(sa.text("DROP FUNCTION IF EXISTS cv_auditar()"))
+    op.execute(sa.text("DROP FUNCTION IF EXISTS cv_diff_jsonb(jsonb, jsonb)"))
+    op.execute(sa.text("DROP FUNCTION IF EXISTS cv_snap(text, jsonb)"))
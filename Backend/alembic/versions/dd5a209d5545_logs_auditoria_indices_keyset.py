@@ -0,0 +1,62 @@
+"""logs_auditoria: índices keyset (usuario|entidad, timestamp DESC, id DESC)
+
+Revision ID: dd5a209d5545
+Revises: 647dd72c75b6
+Create Date: 2026-03-12 10:07:44.918273
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'dd5a209d5545'
+down_revision: Union[str, Sequence[str], None] = '647dd72c75b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# nombre -> (columnas, sufijo de los índices de cada partición)
+INDICES = {
+    "ix_logs_usuario_ts_id": ('("usuario_id", "timestamp" DESC, "id" DESC)', "usuario_ts_id"),
+    "ix_logs_entidad_ts_id": ('("entidad", "entidad_id", "timestamp" DESC, "id" DESC)', "entidad_ts_id"),
+}
+
+
+def _particiones(conn) -> list[str]:
+    return list(conn.execute(sa.text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'logs_auditoria'::regclass ORDER BY c.relname"
+    )).scalars())
+
+
+def upgrade():
+    """
+    En una tabla particionada no hay CREATE INDEX CONCURRENTLY: se crea el
+    índice ON ONLY en el padre (inválido, instantáneo), uno CONCURRENTLY por
+    partición y se adjuntan; con todas adjuntas el del padre queda válido.
+    Las particiones que se creen después lo heredan solas.
+    """
+    conn = op.get_bind()
+    particiones = _particiones(conn)
+
+    for nombre, (columnas, sufijo) in INDICES.items():
+        op.execute(sa.text(f'CREATE INDEX IF NOT EXISTS "{nombre}" ON ONLY "logs_auditoria" {columnas}'))
+
+    with op.get_context().autocommit_block():
+        for nombre, (columnas, sufijo) in INDICES.items():
+            for particion in particiones:
+                hijo = f"{particion}_{sufijo}"
+                op.execute(sa.text(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{hijo}" ON "{particion}" {columnas}'))
+                op.execute(sa.text(f'ALTER INDEX "{nombre}" ATTACH PARTITION "{hijo}"'))
+
+    # el prefijo usuario_id del índice nuevo cubre el FK (ON DELETE CASCADE) y el filtro
+    op.execute(sa.text('DROP INDEX IF EXISTS "ix_logs_auditoria_usuario_id"'))
+
+
+def downgrade():
+    op.execute(sa.text('CREATE INDEX IF NOT EXISTS "ix_logs_auditoria_usuario_id" ON "logs_auditoria" ("usuario_id")'))
+    for nombre in INDICES:
+        op.execute(sa.text(f'DROP INDEX IF EXISTS "{nombre}"'))
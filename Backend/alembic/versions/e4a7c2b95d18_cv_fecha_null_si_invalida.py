@@ -0,0 +1,47 @@
+"""cv_fecha devuelve NULL con texto que no es fecha (en vez de error)
+
+Revision ID: e4a7c2b95d18
+Revises: b81d4f6e2c93
+Create Date: 2026-03-18 11:47:03.518226
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a7c2b95d18'
+down_revision: Union[str, Sequence[str], None] = 'b81d4f6e2c93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    """
+    Mismo criterio que CV_FECHA_DDL (models/comunero.py). Sin REINDEX: para las
+    fechas válidas el resultado no cambia, y una inválida nunca pudo entrar en un
+    ix_comuneros_campo_<id> (la versión anterior hacía fallar el INSERT).
+    """
+    op.execute(sa.text(
+        "CREATE OR REPLACE FUNCTION cv_fecha(text) RETURNS date "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE "
+        "AS $$ SELECT CASE WHEN $1 ~ '^\\s*[0-9]{4}-[0-9]{1,2}-[0-9]{1,2}\\s*$' THEN "
+        "CASE WHEN split_part($1, '-', 1)::int >= 1 "
+        "AND split_part($1, '-', 2)::int BETWEEN 1 AND 12 "
+        "AND split_part($1, '-', 3)::int >= 1 THEN "
+        "CASE WHEN split_part($1, '-', 3)::int <= extract(day from "
+        "make_date(split_part($1, '-', 1)::int, split_part($1, '-', 2)::int, 1) "
+        "+ interval '1 month' - interval '1 day') "
+        "THEN make_date(split_part($1, '-', 1)::int, split_part($1, '-', 2)::int, split_part($1, '-', 3)::int) "
+        "END END END $$"
+    ))
+
+
+def downgrade():
+    op.execute(sa.text(
+        "CREATE OR REPLACE FUNCTION cv_fecha(text) RETURNS date "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE "
+        "AS $$ SELECT to_date($1, 'YYYY-MM-DD') $$"
+    ))
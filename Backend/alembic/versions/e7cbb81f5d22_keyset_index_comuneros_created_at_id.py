@@ -0,0 +1,32 @@
+"""Keyset index comuneros (created_at, id)
+
+Revision ID: e7cbb81f5d22
+Revises: 80dd1e915f55
+Create Date: 2026-03-02 10:14:08.512377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7cbb81f5d22'
+down_revision: Union[str, Sequence[str], None] = '80dd1e915f55'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    # CONCURRENTLY no puede ir dentro de la transacción de Alembic
+    with op.get_context().autocommit_block():
+        op.execute(sa.text(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_comuneros_created_at_id" '
+            'ON "comuneros" ("created_at", "id")'
+        ))
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute(sa.text('DROP INDEX CONCURRENTLY IF EXISTS "ix_comuneros_created_at_id"'))
@@ -0,0 +1,57 @@
+"""versiones_tablas + triggers por sentencia (ETags)
+
+Revision ID: fe2e1ae0acb3
+Revises: 4dddf807da6a
+Create Date: 2026-03-06 10:14:52.118304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fe2e1ae0acb3'
+down_revision: Union[str, Sequence[str], None] = '4dddf807da6a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLAS_VERSIONADAS = ("comuneros", "campos_formulario", "usuarios")
+
+
+def upgrade():
+    op.create_table(
+        "versiones_tablas",
+        sa.Column("tabla", sa.String(length=100), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("tabla"),
+    )
+
+    op.execute(sa.text(
+        "CREATE OR REPLACE FUNCTION cv_bump_version() RETURNS trigger "
+        "LANGUAGE plpgsql AS $$ "
+        "BEGIN "
+        "INSERT INTO versiones_tablas (tabla, version) VALUES (TG_TABLE_NAME, 1) "
+        "ON CONFLICT (tabla) DO UPDATE SET version = versiones_tablas.version + 1; "
+        "RETURN NULL; "
+        "END $$"
+    ))
+
+    for tabla in TABLAS_VERSIONADAS:
+        op.execute(sa.text(
+            f'INSERT INTO versiones_tablas (tabla, version) VALUES (\'{tabla}\', 1)'
+        ))
+        op.execute(sa.text(
+            f'CREATE TRIGGER "trg_{tabla}_version" '
+            f'AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON "{tabla}" '
+            f'FOR EACH STATEMENT EXECUTE FUNCTION cv_bump_version()'
+        ))
+
+
+def downgrade():
+    for tabla in TABLAS_VERSIONADAS:
+        op.execute(sa.text(f'DROP TRIGGER IF EXISTS "trg_{tabla}_version" ON "{tabla}"'))
+    op.execute(sa.text("DROP FUNCTION IF EXISTS cv_bump_version()"))
+    op.drop_table("versiones_tablas")
@@ -1,9 +1,14 @@
+import threading
+import time
 from functools import lru_cache
-from typing import Generator
+from typing import AsyncGenerator, Generator, Optional
 
 from dotenv import load_dotenv
+from fastapi import Request
+from jose import JWTError, jwt
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 
 
@@ -34,11 +39,41 @@ class Settings(BaseSettings):
     DB_PASSWORD: str
     DB_NAME: str
 
+    # ====== Pools de conexiones ======
+    # Presupuesto TOTAL contra max_connections de Postgres (todos los workers):
+    # se reparte entre procesos y, dentro de cada uno, entre el engine sync y el async
+    DB_MAX_CONEXIONES: int = 100         # lo que la app puede abrir (<= max_connections)
+    DB_CONEXIONES_RESERVADAS: int = 10   # fuera de los pools: LISTEN, cron, alembic, psql
+    WEB_WORKERS: int = 1                 # procesos (gunicorn -w / uvicorn --workers)
+    DB_POOL_FRACCION_ASYNC: float = 0.5  # parte de cada worker para el engine async
+
+    # ====== Réplica de lectura (opcional) ======
+    DB_READ_HOST: Optional[str] = None  # sin valor -> las lecturas van a la primaria
+    DB_READ_PORT: Optional[int] = None  # default: DB_PORT
+    READ_PIN_SECONDS: int = 5           # tras escribir, el usuario lee de la primaria N segundos
+
     # ====== Security ======
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
 
+    # ====== Performance ======
+    COUNT_CACHE_TTL_SECONDS: int = 30  # cache de X-Total-Count exacto
+    BULK_MAX_REGISTROS: int = 50000    # tope de POST /comuneros/bulk
+    VALIDACION_MAX_REGISTROS: int = 200000  # tope de POST /comuneros/validate (no escribe)
+    BULK_BATCH_SIZE: int = 1000        # filas por INSERT multi-row
+    ARCHIVO_DIAS: int = 90             # eliminados más viejos que esto -> comuneros_archivo
+    CONFORMIDAD_PAUSA_MS: int = 50     # pausa entre chunks corregidos del job de conformidad
+    ESCUCHA_NOTIFY: bool = True        # LISTEN/NOTIFY para invalidar el validador de campos
+
+    # ====== Auditoría ======
+    AUDITORIA_BACKEND: str = "orm"     # "orm" (registrar_log en el CRUD) | "trigger" (triggers en Postgres)
+    AUDITORIA_MODO: str = "completo"   # "completo" (antes/después enteros) | "diff" (solo cambios + checkpoints)
+    AUDITORIA_CHECKPOINT_CADA: int = 20  # modo diff: snapshot completo cada N versiones de una entidad
+    LOGS_PARTICIONES_ADELANTE: int = 3   # particiones mensuales creadas por adelantado
+    LOGS_RETENCION_MESES: int = 24       # particiones más viejas se vuelcan y se sacan (0 = nunca)
+    LOGS_ARCHIVO_DIR: str = "archivo_logs"  # destino de los .csv.gz de la retención
+
     @property
     def DATABASE_URL(self) -> str:
         return (
@@ -46,6 +81,15 @@ class Settings(BaseSettings):
             f"@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
         )
 
+    @property
+    def DATABASE_READ_URL(self) -> Optional[str]:
+        if not self.DB_READ_HOST:
+            return None
+        return (
+            f"postgresql+psycopg://{self.DB_USER}:{self.DB_PASSWORD}"
+            f"@{self.DB_READ_HOST}:{self.DB_READ_PORT or self.DB_PORT}/{self.DB_NAME}"
+        )
+
 
 @lru_cache
 def get_settings() -> Settings:
@@ -62,13 +106,39 @@ class Base(DeclarativeBase):
     pass
 
 
+# ===============================
+# Tamaño de los pools
+# ===============================
+def pool_engine(s: Settings, asincrono: bool) -> dict[str, int]:
+    """
+    pool_size/max_overflow de un engine. Con 20 + 40 fijos por engine, 4 workers
+    podían pedir 480 conexiones a la primaria (engine + async_engine) contra
+    max_connections = 100 por defecto: los picos terminaban en
+    "too many clients" en vez de esperar en el pool.
+
+    Por worker: (DB_MAX_CONEXIONES - DB_CONEXIONES_RESERVADAS) // WEB_WORKERS,
+    repartido sync/async según DB_POOL_FRACCION_ASYNC; en cada engine la mitad
+    queda abierta (pool_size) y la otra mitad es overflow. La réplica es otro
+    servidor con su propio max_connections: sus engines usan el mismo reparto.
+    Mínimo 1 + 1 por engine aunque el presupuesto no alcance.
+    """
+    por_worker = max(2, (s.DB_MAX_CONEXIONES - s.DB_CONEXIONES_RESERVADAS) // max(1, s.WEB_WORKERS))
+    asincronas = min(por_worker - 1, max(1, round(por_worker * s.DB_POOL_FRACCION_ASYNC)))
+    total = asincronas if asincrono else por_worker - asincronas
+    pool_size = max(1, total // 2)
+    return {"pool_size": pool_size, "max_overflow": max(1, total - pool_size)}
+
+
+POOL_SYNC = pool_engine(settings, asincrono=False)
+POOL_ASYNC = pool_engine(settings, asincrono=True)
+
+
 # ===============================
 # Engine (Optimizado)
 # ===============================
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_size=20,
-    max_overflow=40,
+    **POOL_SYNC,
     pool_pre_ping=True,
     echo=settings.DEBUG,
     future=True,
@@ -94,4 +164,148 @@ def get_db() -> Generator[Session, None, None]:
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# ===============================
+# Réplica de lectura
+# ===============================
+# Sin DB_READ_HOST, read_engine ES engine (mismo pool): get_read_db == get_db.
+read_engine = (
+    create_engine(
+        settings.DATABASE_READ_URL,
+        **POOL_SYNC,
+        pool_pre_ping=True,
+        echo=settings.DEBUG,
+        future=True,
+    )
+    if settings.DATABASE_READ_URL
+    else engine
+)
+
+ReadSessionLocal = sessionmaker(
+    bind=read_engine,
+    autoflush=False,
+    autocommit=False,
+    expire_on_commit=False,
+)
+
+
+# -----------------------
+# Staleness: pin a la primaria tras escribir
+# -----------------------
+# La réplica va con lag: quien acaba de escribir debe leer su propia escritura.
+# Cada escritura OK (ver middleware en main.py) fija al usuario a la primaria
+# READ_PIN_SECONDS. Se registra en proceso y en la cookie PIN_COOKIE, para que
+# el pin también valga si la siguiente request cae en otro worker.
+PIN_COOKIE = "cv_pin_primaria"
+
+_pin_lock = threading.Lock()
+_pins: dict[int, float] = {}
+_PINS_MAX = 10000
+
+
+def usuario_id_de_request(request: Request) -> Optional[int]:
+    """`sub` del Bearer token, sin tocar la DB (None si no hay token válido)."""
+    esquema, _, token = (request.headers.get("authorization") or "").partition(" ")
+    if esquema.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        return int(payload.get("sub"))
+    except (JWTError, TypeError, ValueError):
+        return None
+
+
+def fijar_a_primaria(usuario_id: int, segundos: Optional[int] = None) -> None:
+    segundos = settings.READ_PIN_SECONDS if segundos is None else segundos
+    if segundos <= 0:
+        return
+    ahora = time.monotonic()
+    with _pin_lock:
+        if len(_pins) >= _PINS_MAX:
+            for k in [k for k, hasta in _pins.items() if hasta <= ahora]:
+                _pins.pop(k, None)
+        _pins[usuario_id] = ahora + segundos
+
+
+def fijado_a_primaria(request: Request) -> bool:
+    if request.cookies.get(PIN_COOKIE):
+        return True
+    usuario_id = usuario_id_de_request(request)
+    if usuario_id is None:
+        return False
+    with _pin_lock:
+        hasta = _pins.get(usuario_id)
+    return hasta is not None and hasta > time.monotonic()
+
+
+# ===============================
+# Dependency: DB Session de lectura
+# ===============================
+def get_read_db(request: Request) -> Generator[Session, None, None]:
+    """
+    Sesión para endpoints de solo lectura: la réplica, salvo que no haya
+    réplica o el usuario esté fijado a la primaria por una escritura reciente.
+    """
+    if read_engine is engine or fijado_a_primaria(request):
+        db = SessionLocal()
+    else:
+        db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# ===============================
+# Async (routers calientes: auth, listado, estadísticas, exportación)
+# ===============================
+# Un endpoint `def` ocupa un worker del threadpool de AnyIO (40 por defecto)
+# mientras espera a Postgres: ese threadpool, no el pool de conexiones, era el
+# techo de concurrencia. Los endpoints `async def` esperan en el event loop.
+# Mismo URL: SQLAlchemy elige el dialecto async de psycopg 3.
+# El CRUD sync se reutiliza tal cual vía AsyncSession.run_sync().
+async_engine = create_async_engine(
+    settings.DATABASE_URL,
+    **POOL_ASYNC,
+    pool_pre_ping=True,
+    echo=settings.DEBUG,
+)
+
+async_read_engine = (
+    create_async_engine(
+        settings.DATABASE_READ_URL,
+        **POOL_ASYNC,
+        pool_pre_ping=True,
+        echo=settings.DEBUG,
+    )
+    if settings.DATABASE_READ_URL
+    else async_engine
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=async_read_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Equivalente async de get_read_db (misma política de pin a la primaria)."""
+    if async_read_engine is async_engine or fijado_a_primaria(request):
+        factory = AsyncSessionLocal
+    else:
+        factory = AsyncReadSessionLocal
+    async with factory() as db:
+        yield db
@@ -1,4 +1,4 @@
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import DataError, IntegrityError
 from psycopg.errors import UniqueViolation
 from fastapi import Request
 from fastapi.responses import JSONResponse
@@ -38,4 +38,15 @@ def integrity_error_to_http(request: Request, exc: IntegrityError) -> JSONRespon
             "detail": "Error de integridad en base de datos.",
             "code": "INTEGRITY_ERROR",
         },
-    )
\ No newline at end of file
+    )
+
+def data_error_to_http(request: Request, exc: DataError) -> JSONResponse:
+    # Valor que Postgres no pudo convertir (cast inválido, fecha fuera de rango, ...):
+    # es un problema del dato pedido, no un 500.
+    return JSONResponse(
+        status_code=422,
+        content={
+            "detail": "Valor inválido para el tipo de dato en base de datos.",
+            "code": "DATA_ERROR",
+        },
+    )
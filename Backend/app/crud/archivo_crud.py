@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.util import ClauseAdapter
+
+from app.config import settings
+from app.crud.log_crud import sin_auditoria
+from app.crud.trabajos_crud import finalizar_trabajo, iniciar_trabajo
+from app.models.comunero import Comunero, ComuneroArchivo
+from app.models.trabajo import Trabajo
+
+logger = logging.getLogger(__name__)
+
+# columnas compartidas por comuneros y comuneros_archivo
+COLUMNAS = ("id", "nombre", "documento", "datos_dinamicos", "creado_por", "is_deleted", "created_at", "updated_at")
+
+# tope de archivados que no pudieron volver reportados con detalle en el resultado del trabajo
+MAX_NO_DESARCHIVADOS = 1000
+
+
+# -----------------------
+# ARCHIVAR (comuneros -> comuneros_archivo)
+# -----------------------
+def archivar_lote(db: Session, corte: datetime, limite: int) -> int:
+    """
+    Mueve hasta `limite` eliminados con updated_at < corte, en UNA sentencia:
+      WITH movidos AS (DELETE FROM comuneros WHERE id IN (... FOR UPDATE SKIP LOCKED) RETURNING ...)
+      INSERT INTO comuneros_archivo SELECT ... FROM movidos
+    El candidato sale de ix_comuneros_eliminados_updated_at. No hace commit.
+    """
+    candidatos = (
+        select(Comunero.id)
+        .where(Comunero.is_deleted == True, Comunero.updated_at < corte)  # noqa: E712
+        .order_by(Comunero.updated_at)
+        .limit(limite)
+        .with_for_update(skip_locked=True)
+    )
+    movidos = (
+        delete(Comunero)
+        .where(Comunero.id.in_(candidatos.scalar_subquery()))
+        .returning(*[getattr(Comunero, c) for c in COLUMNAS])
+        .cte("movidos")
+    )
+    stmt = (
+        insert(ComuneroArchivo.__table__)
+        .from_select(list(COLUMNAS), select(*[movidos.c[c] for c in COLUMNAS]))
+        .add_cte(movidos)
+        # rowcount no es confiable con un CTE que tiene RETURNING: contamos ids
+        .returning(ComuneroArchivo.__table__.c.id)
+    )
+    with sin_auditoria(db):
+        return len(db.execute(stmt).all())
+
+
+def archivar_eliminados(
+    db: Session,
+    dias: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    trabajo: Optional[Trabajo] = None,
+) -> int:
+    """
+    Archiva por lotes (commit por lote: locks cortos) hasta no quedar candidatos.
+    Si viene `trabajo`, su progreso se commitea junto con cada lote.
+    """
+    dias = settings.ARCHIVO_DIAS if dias is None else dias
+    batch_size = batch_size or settings.BULK_BATCH_SIZE
+    corte = datetime.now(timezone.utc) - timedelta(days=dias)
+
+    total = 0
+    while True:
+        n = archivar_lote(db, corte, batch_size)
+        if trabajo is not None:
+            trabajo.procesados += n
+            trabajo.afectados += n
+        db.commit()
+        total += n
+        if n < batch_size:
+            return total
+
+
+def ejecutar_archivo(bind: Engine, trabajo_id: int, dias: Optional[int] = None) -> None:
+    """Versión job (POST /comuneros/archivo): progreso en GET /trabajos/{id}."""
+    with Session(bind=bind, expire_on_commit=False) as db:
+        try:
+            trabajo = iniciar_trabajo(db, trabajo_id)
+            total = archivar_eliminados(db, dias, trabajo=trabajo)
+            finalizar_trabajo(db, trabajo_id, resultado={"archivados": total})
+        except Exception:
+            db.rollback()
+            logger.exception("Trabajo %s falló", trabajo_id)
+            finalizar_trabajo(db, trabajo_id, error="Error interno durante el archivo")
+
+
+# -----------------------
+# DESARCHIVAR (para restaurar)
+# -----------------------
+def criterio_en_archivo(criterio: list) -> list:
+    """Reescribe predicados sobre Comunero (filtros, ids) para comuneros_archivo (mismos nombres)."""
+    adapter = ClauseAdapter(ComuneroArchivo.__table__, adapt_on_names=True)
+    return [adapter.traverse(c) for c in criterio]
+
+
+def desarchivar(db: Session, criterio: list) -> tuple[int, list[dict[str, Any]]]:
+    """
+    Devuelve a `comuneros` (todavía eliminados) los archivados que matcheen `criterio`,
+    para que el restore normal los procese. En UNA sentencia:
+      WITH insertados AS (INSERT INTO comuneros SELECT ... FROM comuneros_archivo WHERE ...
+                          ON CONFLICT DO NOTHING RETURNING id)
+      DELETE FROM comuneros_archivo WHERE id IN (SELECT id FROM insertados)
+    Solo sale del archivo lo que entró: un documento ya usado por una fila viva
+    (uq_comuneros_documento), aunque llegue en paralelo, no aborta el lote.
+    -> (desarchivados, los que se quedaron en el archivo: hasta MAX_NO_DESARCHIVADOS
+    {id, documento}). No hace commit.
+    """
+    criterio_archivo = criterio_en_archivo(criterio)
+    insertados = (
+        pg_insert(Comunero.__table__)
+        .from_select(
+            list(COLUMNAS),
+            select(*[getattr(ComuneroArchivo, c) for c in COLUMNAS]).where(*criterio_archivo),
+        )
+        .on_conflict_do_nothing()
+        .returning(Comunero.__table__.c.id)
+        .cte("insertados")
+    )
+    archivo = ComuneroArchivo.__table__
+    stmt = (
+        delete(archivo)
+        .where(archivo.c.id.in_(select(insertados.c.id)))
+        .add_cte(insertados)
+        .returning(archivo.c.id)
+    )
+    with sin_auditoria(db):
+        desarchivados = len(db.execute(stmt).all())
+
+    # lo movido ya no se ve en el archivo (misma transacción): queda lo que chocó
+    no_desarchivados = db.execute(
+        select(ComuneroArchivo.id, ComuneroArchivo.documento)
+        .where(*criterio_archivo)
+        .order_by(ComuneroArchivo.id)
+        .limit(MAX_NO_DESARCHIVADOS)
+    ).all()
+    return desarchivados, [{"id": r.id, "documento": r.documento} for r in no_desarchivados]
@@ -7,6 +7,8 @@ from sqlalchemy.orm import Session
 
 from app.models.campos_formulario import CampoFormulario
 from app.crud.log_crud import registrar_log
+from app.utils.indices_campos import validar_indexable
+from app.utils.validation import invalidar_validador, notificar_cambio_campos
 
 
 # -----------------------
@@ -20,6 +22,7 @@ def _snap_campo(c: CampoFormulario) -> dict[str, Any]:
         "obligatorio": c.obligatorio,
         "opciones": c.opciones,
         "activo": c.activo,
+        "indexado": c.indexado,
         # si tu modelo ya tiene created_at/updated_at/orden, se incluirán si existen
         "created_at": getattr(c, "created_at", None).isoformat() if getattr(c, "created_at", None) else None,
         "updated_at": getattr(c, "updated_at", None).isoformat() if getattr(c, "updated_at", None) else None,
@@ -31,6 +34,8 @@ def _snap_campo(c: CampoFormulario) -> dict[str, Any]:
 # CREATE
 # -----------------------
 def crear_campo(db: Session, data, usuario_actual):
+    validar_indexable(data.tipo, data.indexado)
+
     nuevo = CampoFormulario(**data.model_dump())
 
     db.add(nuevo)
@@ -46,7 +51,9 @@ def crear_campo(db: Session, data, usuario_actual):
         datos_nuevos=_snap_campo(nuevo),
     )
 
+    notificar_cambio_campos(db)  # ✅ los otros workers recompilan el validador
     db.commit()
+    invalidar_validador()
     db.refresh(nuevo)
     return nuevo
 
@@ -67,6 +74,8 @@ def actualizar_campo(db: Session, campo: CampoFormulario, data, usuario_actual):
     for key, value in data.model_dump(exclude_unset=True).items():
         setattr(campo, key, value)
 
+    validar_indexable(campo.tipo, campo.indexado)
+
     db.flush()
 
     registrar_log(
@@ -79,7 +88,9 @@ def actualizar_campo(db: Session, campo: CampoFormulario, data, usuario_actual):
         datos_nuevos=_snap_campo(campo),
     )
 
+    notificar_cambio_campos(db)  # ✅ los otros workers recompilan el validador
     db.commit()
+    invalidar_validador()
     db.refresh(campo)
     return campo
 
@@ -103,4 +114,6 @@ def eliminar_campo(db: Session, campo: CampoFormulario, usuario_actual):
         datos_nuevos=_snap_campo(campo),
     )
 
-    db.commit()
\ No newline at end of file
+    notificar_cambio_campos(db)  # ✅ los otros workers recompilan el validador
+    db.commit()
+    invalidar_validador()
@@ -1,20 +1,42 @@
 from __future__ import annotations
 
-from typing import Any, Optional
+import logging
+from typing import Any, Iterable, Optional
 
-from sqlalchemy import and_, or_, select
+from datetime import datetime
+from types import SimpleNamespace
+
+from fastapi import HTTPException, status
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import Boolean, Integer, Text, any_, bindparam, cast, func, literal, literal_column, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY, DOUBLE_PRECISION, JSONB, insert as pg_insert
+from sqlalchemy.engine import Engine
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.models.comunero import Comunero
-from app.utils.validation import validar_campos_dinamicos
-from app.crud.log_crud import registrar_log
+from app.schemas.comunero_schema import ComuneroCreate
+from app.crud.archivo_crud import desarchivar
+from app.crud.trabajos_crud import finalizar_trabajo, iniciar_trabajo
+from app.utils.validation import (
+    validador_campos,
+    validar_campos_dinamicos,
+    validar_datos_dinamicos,
+    validar_patch_dinamico,
+)
+from app.utils.filtros import condiciones_dinamicas
+from app.crud.log_crud import auditado_por_trigger, auditar_como, registrar_log, registrar_logs_bulk
+from app.utils.conteo import clave_filtros, contar_exacto, estimar_filas
+from app.utils.pagination import decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
 
 
 # -----------------------
 # Helpers
 # -----------------------
-def _snap_comunero(c: Comunero) -> dict[str, Any]:
+def snap_comunero(c: Comunero) -> dict[str, Any]:
     """Snapshot serializable para auditoría."""
     return {
         "id": c.id,
@@ -28,6 +50,21 @@ def _snap_comunero(c: Comunero) -> dict[str, Any]:
     }
 
 
+def cursor_comunero(c: Comunero) -> str:
+    """Cursor opaco que apunta justo después de `c` en el orden del listado."""
+    return encode_cursor(c.created_at, c.id)
+
+
+def _decode_cursor_comunero(cursor: str) -> tuple[datetime, int]:
+    created_at, last_id = decode_cursor(cursor, 2)
+    if not isinstance(created_at, datetime) or not isinstance(last_id, int):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="cursor inválido",
+        )
+    return created_at, last_id
+
+
 # -----------------------
 # CREATE
 # -----------------------
@@ -52,7 +89,7 @@ def crear_comunero(db: Session, data, usuario_actual):
             entidad="comuneros",
             entidad_id=nuevo.id,
             datos_anteriores=None,
-            datos_nuevos=_snap_comunero(nuevo),
+            datos_nuevos=snap_comunero(nuevo),
         )
 
         db.commit()
@@ -64,42 +101,618 @@ def crear_comunero(db: Session, data, usuario_actual):
         raise  # 👈 lo maneja el handler global (409/400)
 
 
+# -----------------------
+# BULK CREATE
+# -----------------------
+_LARGO_NOMBRE = Comunero.__table__.c.nombre.type.length
+_LARGO_DOCUMENTO = Comunero.__table__.c.documento.type.length
+
+
+def _validar_registro_bulk(validador, registro: Any) -> ComuneroCreate:
+    """Registro crudo -> ComuneroCreate válido, o HTTPException(400) con el motivo."""
+    if not isinstance(registro, dict):
+        raise HTTPException(status_code=400, detail="El registro debe ser un objeto JSON")
+    try:
+        data = ComuneroCreate.model_validate(registro)
+    except ValidationError as e:
+        err = e.errors()[0]
+        loc = ".".join(str(x) for x in err["loc"])
+        raise HTTPException(status_code=400, detail=f"{loc}: {err['msg']}")
+
+    # largos de columna: un valor largo abortaría el INSERT de todo el batch
+    if len(data.nombre) > _LARGO_NOMBRE:
+        raise HTTPException(status_code=400, detail=f"nombre supera {_LARGO_NOMBRE} caracteres")
+    if len(data.documento) > _LARGO_DOCUMENTO:
+        raise HTTPException(status_code=400, detail=f"documento supera {_LARGO_DOCUMENTO} caracteres")
+
+    validar_datos_dinamicos(validador, data.datos_dinamicos)
+    return data
+
+
+COLUMNAS_RETURNING = (
+    Comunero.id,
+    Comunero.nombre,
+    Comunero.documento,
+    Comunero.datos_dinamicos,
+    Comunero.creado_por,
+    Comunero.is_deleted,
+    Comunero.created_at,
+    Comunero.updated_at,
+)
+
+
+def registrar_logs_comuneros(db: Session, usuario_id: int, entradas: Iterable[tuple[str, int, Any, Any]]) -> None:
+    """1 INSERT (executemany) de logs: entradas = [(accion, entidad_id, antes, nuevo)]."""
+    registrar_logs_bulk(db, usuario_id=usuario_id, entidad="comuneros", entradas=entradas)
+
+
+def _insertar_batch(db: Session, filas: list[dict[str, Any]], usuario_id: int) -> dict[str, tuple[int, str]]:
+    """
+    1 INSERT multi-row (ON CONFLICT DO NOTHING sobre uq_comuneros_documento)
+    + 1 INSERT de logs. Devuelve {documento: (id, "CREAR")} de lo insertado;
+    lo que falte chocó con un documento existente.
+    """
+    insertados = db.execute(
+        pg_insert(Comunero)
+        .values(filas)
+        .on_conflict_do_nothing(constraint="uq_comuneros_documento")
+        .returning(*COLUMNAS_RETURNING)
+    ).all()
+
+    registrar_logs_comuneros(db, usuario_id, (("CREAR", r.id, None, snap_comunero(r)) for r in insertados))
+    return {r.documento: (r.id, "CREAR") for r in insertados}
+
+
+def _upsert_batch(db: Session, filas: list[dict[str, Any]], usuario_id: int) -> dict[str, tuple[int, str]]:
+    """
+    Upsert por documento:
+    1) SELECT ... FOR UPDATE de los que ya existen (snapshot "antes" para auditoría)
+    2) INSERT multi-row ... ON CONFLICT (documento) DO UPDATE ... WHERE <cambia algo>
+       RETURNING ..., xmax = 0  (true = fila nueva)
+    3) logs CREAR/EDITAR en un solo INSERT
+    Un documento existente sin cambios no se reescribe ni se audita (SIN_CAMBIOS).
+    Un documento eliminado (soft) se reactiva.
+    """
+    documentos = [f["documento"] for f in filas]
+    antes = {
+        r.documento: r
+        for r in db.execute(
+            select(*COLUMNAS_RETURNING).where(Comunero.documento.in_(documentos)).with_for_update()
+        )
+    }
+
+    stmt = pg_insert(Comunero).values(filas)
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_comuneros_documento",
+        set_={
+            "nombre": stmt.excluded.nombre,
+            "datos_dinamicos": stmt.excluded.datos_dinamicos,
+            "is_deleted": False,
+            "updated_at": func.now(),
+        },
+        where=or_(
+            Comunero.nombre.is_distinct_from(stmt.excluded.nombre),
+            Comunero.datos_dinamicos.is_distinct_from(stmt.excluded.datos_dinamicos),
+            Comunero.is_deleted == True,  # noqa: E712
+        ),
+    ).returning(*COLUMNAS_RETURNING, literal_column("comuneros.xmax = 0", Boolean).label("insertado"))
+
+    escritos = db.execute(stmt).all()
+
+    entradas = []
+    auditar = not auditado_por_trigger(db, usuario_id)  # con el backend "trigger" no se arman snapshots
+    resultado = {doc: (r.id, "SIN_CAMBIOS") for doc, r in antes.items()}
+    for r in escritos:
+        previo = antes.get(r.documento)
+        accion = "CREAR" if r.insertado or previo is None else "EDITAR"
+        if auditar:
+            entradas.append((accion, r.id, snap_comunero(previo) if accion == "EDITAR" else None, snap_comunero(r)))
+        resultado[r.documento] = (r.id, accion)
+
+    registrar_logs_comuneros(db, usuario_id, entradas)
+    return resultado
+
+
+def preparar_lote_bulk(
+    validador,
+    registros: Iterable[tuple[int, Any]],
+    usuario_id: int,
+) -> tuple[list[dict[str, Any]], list[tuple[int, dict[str, Any]]]]:
+    """
+    Valida en memoria (0 queries por fila) pares (fila, registro).
+    -> (resultado por fila, [(índice en resultados, fila lista para INSERT)])
+    Un documento repetido dentro de `registros` se reporta en su 2da aparición.
+    """
+    resultados: list[dict[str, Any]] = []
+    validas: list[tuple[int, dict[str, Any]]] = []
+    vistos: set[str] = set()
+
+    for fila, registro in registros:
+        documento = registro.get("documento") if isinstance(registro, dict) else None
+        try:
+            data = _validar_registro_bulk(validador, registro)
+        except HTTPException as e:
+            resultados.append({
+                "fila": fila, "ok": False, "documento": documento,
+                "error": e.detail, "code": "VALIDACION",
+            })
+            continue
+
+        if data.documento in vistos:
+            resultados.append({
+                "fila": fila, "ok": False, "documento": data.documento,
+                "error": "Documento repetido dentro del lote", "code": "DOCUMENTO_DUPLICADO",
+            })
+            continue
+        vistos.add(data.documento)
+
+        resultados.append({"fila": fila, "ok": True, "documento": data.documento})
+        validas.append((
+            len(resultados) - 1,
+            {
+                "nombre": data.nombre,
+                "documento": data.documento,
+                "datos_dinamicos": data.datos_dinamicos,
+                "creado_por": usuario_id,
+            },
+        ))
+
+    return resultados, validas
+
+
+def insertar_lote_bulk(
+    db: Session,
+    resultados: list[dict[str, Any]],
+    lote: list[tuple[int, dict[str, Any]]],
+    usuario_id: int,
+    actualizar: bool = False,
+) -> bool:
+    """
+    Inserta (o con `actualizar`, hace upsert de) `lote` (salida de preparar_lote_bulk)
+    y completa `resultados` con id/accion o DOCUMENTO_DUPLICADO. No hace commit.
+    -> True si hubo conflictos.
+    """
+    batch = _upsert_batch if actualizar else _insertar_batch
+    ids = batch(db, [f for _, f in lote], usuario_id)
+
+    conflictos = False
+    for idx, fila in lote:
+        if fila["documento"] in ids:
+            resultados[idx]["id"], resultados[idx]["accion"] = ids[fila["documento"]]
+        else:
+            conflictos = True
+            resultados[idx].update({
+                "ok": False,
+                "error": "Ya existe un comunero con ese documento.",
+                "code": "DOCUMENTO_DUPLICADO",
+            })
+    return conflictos
+
+
+def crear_comuneros_bulk(
+    db: Session,
+    registros: list[Any],
+    usuario_actual,
+    atomico: bool = False,
+    batch_size: Optional[int] = None,
+    actualizar: bool = False,
+) -> dict[str, Any]:
+    """
+    Alta masiva: valida todo en memoria contra UNA carga de CampoFormulario y
+    luego inserta en batches (INSERT multi-row + logs en bloque).
+
+    - parcial (default): cada batch es su propia transacción; los inválidos y
+      los documentos duplicados se reportan por fila y el resto se inserta.
+    - atomico: una sola transacción; si alguna fila falla no se inserta nada.
+    - actualizar: upsert por documento (los existentes se editan, no son error).
+
+    Devuelve el resumen con un resultado por fila (fila = posición 1-based).
+    """
+    batch_size = batch_size or settings.BULK_BATCH_SIZE
+
+    # 1) Validación en memoria
+    resultados, validas = preparar_lote_bulk(
+        validador_campos(db),
+        enumerate(registros, start=1),
+        usuario_actual.id,
+    )
+
+    hubo_errores = len(validas) < len(resultados)
+
+    # 2) Inserción por batches
+    if not (atomico and hubo_errores):
+        try:
+            for inicio in range(0, len(validas), batch_size):
+                lote = validas[inicio:inicio + batch_size]
+                if insertar_lote_bulk(db, resultados, lote, usuario_actual.id, actualizar=actualizar):
+                    hubo_errores = True
+
+                if atomico and hubo_errores:
+                    break
+                if not atomico:
+                    db.commit()
+
+            if atomico and hubo_errores:
+                db.rollback()
+            else:
+                db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+    # 3) Atómico con errores: nada quedó escrito
+    if atomico and hubo_errores:
+        for r in resultados:
+            r.pop("id", None)
+            r.pop("accion", None)
+            if r["ok"]:
+                r.update({"ok": False, "error": "Revertido: el lote tiene filas con error", "code": "REVERTIDO"})
+
+    ok = [r for r in resultados if r["ok"]]
+    return {
+        "modo": "atomico" if atomico else "parcial",
+        "total": len(resultados),
+        "insertados": sum(1 for r in ok if r["accion"] == "CREAR"),
+        "actualizados": sum(1 for r in ok if r["accion"] == "EDITAR"),
+        "errores": len(resultados) - len(ok),
+        "resultados": resultados,
+    }
+
+
+def upsert_comunero(db: Session, documento: str, data, usuario_actual) -> tuple[Any, str]:
+    """
+    PUT por documento: crea o reemplaza (nombre + datos_dinamicos) en una sola
+    transacción, sin IntegrityError/409 de por medio.
+    -> (fila, "CREAR" | "EDITAR" | "SIN_CAMBIOS")
+    """
+    registro = {"nombre": data.nombre, "documento": documento, "datos_dinamicos": data.datos_dinamicos}
+    valido = _validar_registro_bulk(validador_campos(db), registro)
+
+    fila = {
+        "nombre": valido.nombre,
+        "documento": valido.documento,
+        "datos_dinamicos": valido.datos_dinamicos,
+        "creado_por": usuario_actual.id,
+    }
+    try:
+        comunero_id, accion = _upsert_batch(db, [fila], usuario_actual.id)[documento]
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return db.get(Comunero, comunero_id, populate_existing=True), accion
+
+
+# -----------------------
+# VALIDACIÓN EN SECO (dry-run del bulk)
+# -----------------------
+_LOTE_COMUNEROS = TypeAdapter(list[ComuneroCreate])
+
+
+def validar_lote_comuneros(db: Session, registros: list[Any], actualizar: bool = False) -> dict[str, Any]:
+    """
+    Valida `registros` como lo haría POST /comuneros/bulk, sin escribir nada,
+    pero reportando TODOS los errores de TODAS las filas:
+    - esquema (nombre/documento/datos_dinamicos): una sola validación Pydantic
+      del lote entero (list[ComuneroCreate], en Rust) -> todos los errores con su fila
+    - largos de columna, documento repetido en el lote
+    - documento ya registrado (1 query; no es error si actualizar=True)
+    - datos_dinamicos: validador compilado por columnas (errores_lote)
+    """
+    errores: list[list[dict[str, Any]]] = [[] for _ in registros]
+
+    def agregar(i: int, campo: str, code: str, error: str) -> None:
+        errores[i].append({"campo": campo, "code": code, "error": error})
+
+    try:
+        _LOTE_COMUNEROS.validate_python(registros)
+    except ValidationError as e:
+        for err in e.errors():
+            i, *loc = err["loc"]
+            campo = ".".join(str(x) for x in loc)
+            detalle = f"{campo}: {err['msg']}" if campo else err["msg"]
+            agregar(i, campo, "VALIDACION", detalle)
+
+    # filas con forma válida (objeto con nombre/documento texto) siguen chequeándose
+    documentos: dict[str, int] = {}
+    candidatas: list[int] = []
+    for i, r in enumerate(registros):
+        if not isinstance(r, dict):
+            continue
+        nombre, documento = r.get("nombre"), r.get("documento")
+        if isinstance(nombre, str) and len(nombre) > _LARGO_NOMBRE:
+            agregar(i, "nombre", "VALIDACION", f"nombre supera {_LARGO_NOMBRE} caracteres")
+        if isinstance(documento, str):
+            if len(documento) > _LARGO_DOCUMENTO:
+                agregar(i, "documento", "VALIDACION", f"documento supera {_LARGO_DOCUMENTO} caracteres")
+            elif documento in documentos:
+                agregar(i, "documento", "DOCUMENTO_DUPLICADO", "Documento repetido dentro del lote")
+            else:
+                documentos[documento] = i
+        if isinstance(r.get("datos_dinamicos", {}), dict):
+            candidatas.append(i)
+
+    if documentos and not actualizar:
+        existentes = db.execute(
+            select(Comunero.documento).where(Comunero.documento == any_(bindparam("docs", list(documentos), type_=ARRAY(Text))))
+        ).scalars().all()
+        for doc in existentes:
+            agregar(documentos[doc], "documento", "DOCUMENTO_DUPLICADO", "Documento ya registrado")
+
+    lote = [registros[i].get("datos_dinamicos") or {} for i in candidatas]
+    for i, errs in zip(candidatas, validador_campos(db).errores_lote(lote)):
+        for campo, code, error in errs:
+            agregar(i, campo, code, error)
+
+    filas = [
+        {
+            "fila": i + 1,
+            "documento": r.get("documento") if isinstance(r, dict) else None,
+            "errores": errs,
+        }
+        for i, (r, errs) in enumerate(zip(registros, errores))
+        if errs
+    ]
+    return {
+        "total": len(registros),
+        "validos": len(registros) - len(filas),
+        "invalidos": len(filas),
+        "filas": filas,
+    }
+
+
 # -----------------------
 # READ + FILTERS
 # -----------------------
+def _query_listado(db: Session, filtros_and: Optional[dict], filtros_or: Optional[dict]):
+    return select(Comunero).where(
+        Comunero.is_deleted == False,  # noqa: E712  (= false, no IS false: empata índices parciales)
+        *condiciones_dinamicas(db, filtros_and, filtros_or),
+    )
+
+
+def _paginar(query, skip: int, limit: int, cursor: Optional[str]):
+    """
+    Orden estable: (created_at DESC, id DESC), servido por ix_comuneros_created_at_id.
+    - cursor: keyset pagination (no escanea filas saltadas). Si viene, ignora skip.
+    - skip: offset clásico (compatibilidad).
+    """
+    query = query.order_by(Comunero.created_at.desc(), Comunero.id.desc())
+
+    if cursor:
+        created_at, last_id = _decode_cursor_comunero(cursor)
+        query = query.where(
+            tuple_(Comunero.created_at, Comunero.id) < tuple_(created_at, last_id)
+        )
+    else:
+        query = query.offset(skip)
+
+    return query.limit(limit)
+
+
 def listar_comuneros(
     db: Session,
     skip: int = 0,
     limit: int = 20,
     filtros_and: Optional[dict] = None,
     filtros_or: Optional[dict] = None,
+    cursor: Optional[str] = None,
 ):
-    query = select(Comunero).where(Comunero.is_deleted.is_(False))
+    query = _paginar(_query_listado(db, filtros_and, filtros_or), skip, limit, cursor)
+    return db.execute(query).scalars().all()
 
-    and_conditions = []
-    if filtros_and:
-        for key, value in filtros_and.items():
-            and_conditions.append(Comunero.datos_dinamicos[key].astext == str(value))
 
-    if and_conditions:
-        query = query.where(and_(*and_conditions))
+# -----------------------
+# READ (sparse fieldsets)
+# -----------------------
+COLUMNAS_PROYECTABLES = (
+    "id",
+    "nombre",
+    "documento",
+    "datos_dinamicos",
+    "creado_por",
+    "is_deleted",
+    "created_at",
+    "updated_at",
+)
+
+
+def parse_fields(fields: str) -> tuple[list[str], list[str]]:
+    """
+    "id,nombre,datos.zona" -> (["id", "nombre"], ["zona"]). Campo desconocido -> 400.
+    """
+    columnas: list[str] = []
+    datos: list[str] = []
+
+    for f in (x.strip() for x in fields.split(",")):
+        if not f:
+            continue
+        if f.startswith("datos."):
+            key = f[len("datos."):]
+            if not key:
+                raise HTTPException(status_code=400, detail="fields: 'datos.' requiere una clave")
+            if key not in datos:
+                datos.append(key)
+        elif f in COLUMNAS_PROYECTABLES:
+            if f not in columnas:
+                columnas.append(f)
+        else:
+            raise HTTPException(status_code=400, detail=f"fields: campo no válido '{f}'")
+
+    if not columnas and not datos:
+        raise HTTPException(status_code=400, detail="fields no puede estar vacío")
+
+    # datos_dinamicos completo ya incluye cualquier datos.<clave>
+    if "datos_dinamicos" in columnas:
+        datos = []
+
+    return columnas, datos
+
+
+def listar_comuneros_filas(
+    db: Session,
+    skip: int = 0,
+    limit: int = 20,
+    filtros_and: Optional[dict] = None,
+    filtros_or: Optional[dict] = None,
+    cursor: Optional[str] = None,
+):
+    """
+    Igual que listar_comuneros pero devuelve Rows Core con las columnas de
+    ComuneroResponse (COLUMNAS_PROYECTABLES): sin hidratar ORM, para serializar
+    directo a JSON. Los Rows sirven para cursor_comunero (.created_at/.id).
+    """
+    select_cols = [getattr(Comunero, c) for c in COLUMNAS_PROYECTABLES]
+    query = _paginar(
+        _query_listado(db, filtros_and, filtros_or).with_only_columns(*select_cols),
+        skip,
+        limit,
+        cursor,
+    )
+    return db.execute(query).all()
 
-    if filtros_or:
-        or_conditions = [
-            Comunero.datos_dinamicos[key].astext == str(value)
-            for key, value in filtros_or.items()
-        ]
-        query = query.where(or_(*or_conditions))
 
-    query = query.offset(skip).limit(limit)
-    return db.execute(query).scalars().all()
+def listar_comuneros_proyectado(
+    db: Session,
+    fields: str,
+    skip: int = 0,
+    limit: int = 20,
+    filtros_and: Optional[dict] = None,
+    filtros_or: Optional[dict] = None,
+    cursor: Optional[str] = None,
+):
+    """
+    Igual que listar_comuneros pero con SELECT Core de solo las columnas y rutas
+    JSON pedidas (datos_dinamicos->'clave'): sin hidratar ORM ni leer el JSONB
+    entero. Devuelve (items como dicts, última fila para el cursor | None).
+    """
+    columnas, datos = parse_fields(fields)
+
+    # id/created_at siempre: los necesita el cursor (se omiten si no se pidieron)
+    select_cols = [getattr(Comunero, c) for c in columnas]
+    select_cols += [Comunero.datos_dinamicos[k] for k in datos]
+    select_cols += [Comunero.id, Comunero.created_at]
+
+    query = _paginar(
+        _query_listado(db, filtros_and, filtros_or).with_only_columns(*select_cols),
+        skip,
+        limit,
+        cursor,
+    )
+    rows = db.execute(query).all()
+
+    n = len(columnas)
+    items = []
+    for row in rows:
+        item = dict(zip(columnas, row[:n]))
+        if datos:
+            item["datos_dinamicos"] = {
+                k: v for k, v in zip(datos, row[n:n + len(datos)]) if v is not None
+            }
+        items.append(item)
+
+    ultimo = rows[-1] if rows else None
+    return items, ultimo
+
+
+def contar_comuneros(
+    db: Session,
+    filtros_and: Optional[dict] = None,
+    filtros_or: Optional[dict] = None,
+    exacto: bool = False,
+) -> int:
+    """
+    Total del listado con esos filtros (ignora paginación).
+    - aproximado: estimación del planner para ESE predicado (no escanea)
+    - exacto: COUNT(*) cacheado unos segundos por set de filtros normalizado
+    """
+    query = _query_listado(db, filtros_and, filtros_or)
+    if not exacto:
+        return estimar_filas(db, query.with_only_columns(Comunero.id))
+    return contar_exacto(
+        db,
+        query.with_only_columns(Comunero.id),
+        clave_filtros("comuneros", filtros_and or {}, filtros_or or {}),
+    )
+
+
+# -----------------------
+# SEARCH (pg_trgm)
+# -----------------------
+def _decode_cursor_busqueda(cursor: str) -> tuple[float, int]:
+    score, last_id = decode_cursor(cursor, 2)
+    if isinstance(score, bool) or not isinstance(score, (int, float)) or not isinstance(last_id, int):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="cursor inválido",
+        )
+    return float(score), last_id
+
+
+def buscar_comuneros(
+    db: Session,
+    q: str,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    filtros_and: Optional[dict] = None,
+    filtros_or: Optional[dict] = None,
+):
+    """
+    Búsqueda difusa por nombre/documento, rankeada por similitud.
+
+    Match (todo servible por ix_comuneros_nombre_trgm / ix_comuneros_documento_trgm):
+    - nombre ILIKE '%q%' o q <% nombre  (word_similarity: tolera errores de tipeo)
+    - documento ILIKE '%q%'
+    Orden: score DESC, id DESC con keyset sobre (score, id).
+
+    Devuelve [(Comunero, score)].
+    """
+    termino = bindparam("q", q)
+    escapado = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    patron = bindparam("patron", f"%{escapado}%")
+
+    # similarity() es real (float4): su texto corto ("0.5714286") no es el valor
+    # que compara Postgres al promoverlo a float8. Casteado UNA vez a double: el
+    # mismo valor exacto en ORDER BY, en el keyset y en el cursor.
+    score = cast(
+        func.greatest(
+            func.word_similarity(termino, Comunero.nombre),
+            func.similarity(termino, Comunero.documento),
+        ),
+        DOUBLE_PRECISION,
+    )
+
+    query = (
+        select(Comunero, score.label("score"))
+        .where(
+            Comunero.is_deleted == False,  # noqa: E712
+            or_(
+                Comunero.nombre.ilike(patron, escape="\\"),
+                termino.op("<%")(Comunero.nombre),
+                Comunero.documento.ilike(patron, escape="\\"),
+            ),
+            *condiciones_dinamicas(db, filtros_and, filtros_or),
+        )
+        .order_by(score.desc(), Comunero.id.desc())
+    )
+
+    if cursor:
+        last_score, last_id = _decode_cursor_busqueda(cursor)
+        query = query.where(tuple_(score, Comunero.id) < tuple_(literal(last_score, DOUBLE_PRECISION), last_id))
+
+    return db.execute(query.limit(limit)).all()
+
+
+def cursor_busqueda(c: Comunero, score: float) -> str:
+    return encode_cursor(score, c.id)
 
 
 # -----------------------
 # UPDATE
 # -----------------------
 def actualizar_comunero(db: Session, comunero: Comunero, data, usuario_actual):
-    antes = _snap_comunero(comunero)
+    antes = snap_comunero(comunero)
 
     validar_campos_dinamicos(db, data.datos_dinamicos)
 
@@ -117,7 +730,7 @@ def actualizar_comunero(db: Session, comunero: Comunero, data, usuario_actual):
             entidad="comuneros",
             entidad_id=comunero.id,
             datos_anteriores=antes,
-            datos_nuevos=_snap_comunero(comunero),
+            datos_nuevos=snap_comunero(comunero),
         )
 
         db.commit()
@@ -129,11 +742,97 @@ def actualizar_comunero(db: Session, comunero: Comunero, data, usuario_actual):
         raise  # 👈 lo maneja el handler global
 
 
+# -----------------------
+# PATCH (merge patch en el servidor)
+# -----------------------
+_COLUMNAS_SNAP = ("id", "nombre", "documento", "datos_dinamicos", "creado_por", "is_deleted", "created_at", "updated_at")
+
+
+def parchear_comunero(db: Session, comunero_id: int, patch: dict[str, Any], usuario_actual):
+    """
+    PATCH sin load-modify-write:
+    - valida SOLO las claves tocadas contra validador_campos()
+    - 1 sentencia: WITH antes AS (SELECT ... FOR UPDATE)
+                   UPDATE ... SET datos_dinamicos = (datos_dinamicos || :set) - :borrar
+                   WHERE <algo cambia> RETURNING nuevo + antes
+    - no-op (nada cambia) -> no hay UPDATE efectivo ni log; devuelve la fila actual
+
+    Devuelve el Comunero (nuevo o actual) o None si no existe / está eliminado.
+    """
+    valores: dict[str, Any] = {}
+    cambia = []
+
+    for col in ("nombre", "documento"):
+        if col in patch:
+            if not isinstance(patch[col], str) or not patch[col].strip():
+                raise HTTPException(status_code=400, detail=f"{col} no puede ser vacío")
+            valores[col] = patch[col]
+            cambia.append(getattr(Comunero, col).is_distinct_from(patch[col]))
+
+    datos_patch = patch.get("datos_dinamicos")
+    if datos_patch:
+        validar_patch_dinamico(validador_campos(db), datos_patch)
+
+        poner = {k: v for k, v in datos_patch.items() if v is not None}
+        borrar = [k for k, v in datos_patch.items() if v is None]
+
+        nuevos_datos = Comunero.datos_dinamicos
+        if poner:
+            nuevos_datos = nuevos_datos.op("||")(cast(literal(poner, JSONB), JSONB))
+        if borrar:
+            nuevos_datos = nuevos_datos.op("-", return_type=JSONB)(literal(borrar, ARRAY(Text)))
+        valores["datos_dinamicos"] = nuevos_datos
+        cambia.append(nuevos_datos.is_distinct_from(Comunero.datos_dinamicos))
+
+    if cambia:
+        antes = (
+            select(*[getattr(Comunero, c) for c in _COLUMNAS_SNAP])
+            .where(Comunero.id == comunero_id, Comunero.is_deleted == False)  # noqa: E712
+            .with_for_update()
+            .cte("antes")
+        )
+        stmt = (
+            update(Comunero)
+            .where(Comunero.id == antes.c.id, or_(*cambia))
+            .values(**valores)
+            .returning(Comunero, *[antes.c[c].label(f"antes_{c}") for c in _COLUMNAS_SNAP])
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+
+        try:
+            row = db.execute(stmt).first()
+            if row is not None:
+                nuevo = row[0]
+                registrar_log(
+                    db,
+                    usuario_id=usuario_actual.id,
+                    accion="EDITAR",
+                    entidad="comuneros",
+                    entidad_id=nuevo.id,
+                    datos_anteriores=snap_comunero(
+                        SimpleNamespace(**{c: getattr(row, f"antes_{c}") for c in _COLUMNAS_SNAP})
+                    ),
+                    datos_nuevos=snap_comunero(nuevo),
+                )
+                db.commit()
+                return nuevo
+            db.rollback()  # suelta el FOR UPDATE
+        except IntegrityError:
+            db.rollback()
+            raise  # 👈 lo maneja el handler global (409 documento duplicado)
+
+    # no-op (o no existe): sin UPDATE ni auditoría
+    actual = db.get(Comunero, comunero_id)
+    if not actual or actual.is_deleted:
+        return None
+    return actual
+
+
 # -----------------------
 # DELETE (SOFT)
 # -----------------------
 def eliminar_comunero(db: Session, comunero: Comunero, usuario_actual):
-    antes = _snap_comunero(comunero)
+    antes = snap_comunero(comunero)
 
     comunero.is_deleted = True
 
@@ -147,7 +846,7 @@ def eliminar_comunero(db: Session, comunero: Comunero, usuario_actual):
             entidad="comuneros",
             entidad_id=comunero.id,
             datos_anteriores=antes,
-            datos_nuevos=_snap_comunero(comunero),
+            datos_nuevos=snap_comunero(comunero),
         )
 
         db.commit()
@@ -155,4 +854,111 @@ def eliminar_comunero(db: Session, comunero: Comunero, usuario_actual):
 
     except IntegrityError:
         db.rollback()
-        raise
\ No newline at end of file
+        raise
+
+
+# -----------------------
+# DELETE / RESTORE MASIVO (job por chunks)
+# -----------------------
+def _criterio_seleccion(db: Session, ids: Optional[list[int]], filtros_and: Optional[dict], filtros_or: Optional[dict]) -> list:
+    criterio = list(condiciones_dinamicas(db, filtros_and, filtros_or))
+    if ids:
+        criterio.append(Comunero.id == any_(bindparam(None, ids, type_=ARRAY(Integer))))
+    return criterio
+
+
+def _cambiar_estado_chunk(db: Session, criterio: list, eliminar: bool, desde_id: int, limite: int):
+    """
+    1 sentencia por chunk:
+      WITH objetivo AS (SELECT id, updated_at ... WHERE id > :desde ORDER BY id LIMIT n FOR UPDATE)
+      UPDATE comuneros SET is_deleted = :eliminar ... FROM objetivo RETURNING nuevo + updated_at previo
+    Solo toca filas que cambian (is_deleted = not eliminar).
+    """
+    objetivo = (
+        select(Comunero.id, Comunero.updated_at)
+        .where(
+            Comunero.is_deleted == (not eliminar),
+            Comunero.id > desde_id,
+            *criterio,
+        )
+        .order_by(Comunero.id)
+        .limit(limite)
+        .with_for_update()
+        .cte("objetivo")
+    )
+    return db.execute(
+        update(Comunero)
+        .where(Comunero.id == objetivo.c.id)
+        .values(is_deleted=eliminar, updated_at=func.now())
+        .returning(*COLUMNAS_RETURNING, objetivo.c.updated_at.label("antes_updated_at"))
+        .execution_options(synchronize_session=False)
+    ).all()
+
+
+def _entrada_cambio_estado(r, accion: str) -> tuple[str, int, dict[str, Any], dict[str, Any]]:
+    nuevo = snap_comunero(r)
+    antes = {**nuevo, "is_deleted": not r.is_deleted,
+             "updated_at": r.antes_updated_at.isoformat() if r.antes_updated_at else None}
+    return accion, r.id, antes, nuevo
+
+
+def ejecutar_cambio_estado_masivo(
+    bind: Engine,
+    trabajo_id: int,
+    eliminar: bool,
+    ids: Optional[list[int]] = None,
+    filtros_and: Optional[dict] = None,
+    filtros_or: Optional[dict] = None,
+) -> None:
+    """
+    Soft-delete (eliminar=True) o restore de todo lo que matchee ids/filtros, en
+    chunks de BULK_BATCH_SIZE: cada chunk es UPDATE ... RETURNING + logs en un
+    INSERT + progreso del trabajo, y su propio commit (locks cortos).
+    """
+    accion = "ELIMINAR" if eliminar else "EDITAR"
+
+    with Session(bind=bind, expire_on_commit=False) as db:
+        try:
+            criterio = _criterio_seleccion(db, ids, filtros_and, filtros_or)
+
+            # restaurar también alcanza a los ya archivados: vuelven a la tabla viva
+            # (aún eliminados) y el loop de abajo los restaura y audita como al resto
+            desarchivados, no_desarchivados = 0, []
+            if not eliminar:
+                desarchivados, no_desarchivados = desarchivar(db, criterio)
+                db.commit()
+
+            total = db.execute(
+                select(func.count()).where(Comunero.is_deleted == (not eliminar), *criterio)
+            ).scalar_one()
+            trabajo = iniciar_trabajo(db, trabajo_id, total=total)
+            auditar_como(db, trabajo.usuario_id)
+
+            desde_id = 0
+            while True:
+                filas = _cambiar_estado_chunk(db, criterio, eliminar, desde_id, settings.BULK_BATCH_SIZE)
+                if not filas:
+                    break
+
+                registrar_logs_comuneros(db, trabajo.usuario_id, (_entrada_cambio_estado(r, accion) for r in filas))
+
+                trabajo.procesados += len(filas)
+                trabajo.afectados += len(filas)
+                db.commit()
+
+                desde_id = max(r.id for r in filas)
+
+            resultado = {"afectados": trabajo.afectados}
+            if not eliminar:
+                resultado["desarchivados"] = desarchivados
+                # documento tomado por una fila viva: siguen en el archivo
+                resultado["no_desarchivados"] = no_desarchivados
+            finalizar_trabajo(db, trabajo_id, resultado=resultado)
+
+        except HTTPException as e:
+            db.rollback()
+            finalizar_trabajo(db, trabajo_id, error=str(e.detail))
+        except Exception:
+            db.rollback()
+            logger.exception("Trabajo %s falló", trabajo_id)
+            finalizar_trabajo(db, trabajo_id, error="Error interno durante el trabajo")
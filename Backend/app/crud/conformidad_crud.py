@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import copy
+import json
+import logging
+import time
+from typing import Any, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import any_, bindparam, cast, func, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.types import Integer
+
+from app.config import settings
+from app.crud.comunero_crud import COLUMNAS_RETURNING, registrar_logs_comuneros, snap_comunero
+from app.crud.log_crud import auditar_como
+from app.crud.trabajos_crud import finalizar_trabajo, iniciar_trabajo
+from app.models.campos_formulario import CampoFormulario
+from app.models.comunero import Comunero
+from app.models.trabajo import Trabajo
+from app.utils.validation import ValidadorCampos, is_empty
+
+logger = logging.getLogger(__name__)
+
+# lo que hace "no conforme" a una fila que antes lo era
+ATRIBUTOS_CONFORMIDAD = ("nombre_campo", "tipo", "obligatorio", "opciones", "activo")
+
+_VACIOS_JSON = ('null', '""', '[]', '{}')
+
+
+def firma_conformidad(campo: CampoFormulario) -> tuple:
+    return tuple(json.dumps(getattr(campo, a), sort_keys=True, default=str) for a in ATRIBUTOS_CONFORMIDAD)
+
+
+# -----------------------
+# Chequeo / corrección de UN campo
+# -----------------------
+class _Regla:
+    """Validador de un solo campo + la corrección pedida (default / remapeo)."""
+
+    def __init__(self, campo: CampoFormulario, default: Any = None, remapeo: Optional[dict[str, Any]] = None):
+        self.nombre = campo.nombre_campo
+        self.tipo = str(campo.tipo or "").strip().lower()
+        validador = ValidadorCampos([campo])
+        self.chequeo = validador.chequeos[self.nombre]
+        self.obligatorio = self.nombre in validador.obligatorios
+        self.default = default
+        self.remapeo = remapeo or {}
+
+    def error(self, valor: Any) -> Optional[str]:
+        if is_empty(valor):
+            return "OBLIGATORIO" if self.obligatorio else None
+        err = self.chequeo(valor)
+        return err[1] if err else None
+
+    def validar_correccion(self) -> None:
+        """default y destinos del remapeo deben cumplir la definición nueva (o 400)."""
+        if self.default is not None and self.chequeo(self.default) is not None:
+            raise HTTPException(status_code=400, detail=f"default no es válido para '{self.nombre}'")
+        for origen, destino in self.remapeo.items():
+            valor = [destino] if self.tipo == "multiselect" and isinstance(destino, str) else destino
+            if destino is None or self.chequeo(valor) is not None:
+                raise HTTPException(status_code=400, detail=f"remapeo '{origen}' -> {destino!r} no es válido")
+
+    def corregir(self, code: str, valor: Any) -> Any:
+        """Valor corregido, o None si no hay corrección aplicable."""
+        if code == "OBLIGATORIO":
+            return self.default
+        if isinstance(valor, str) and valor in self.remapeo:
+            return self.remapeo[valor]
+        if self.tipo == "multiselect" and isinstance(valor, list) and any(
+            isinstance(x, str) and x in self.remapeo for x in valor
+        ):
+            nuevo: list[Any] = []
+            for x in valor:
+                x = self.remapeo.get(x, x) if isinstance(x, str) else x
+                if x not in nuevo:
+                    nuevo.append(x)
+            return nuevo if self.chequeo(nuevo) is None else None
+        return None
+
+
+def validar_correccion(campo: CampoFormulario, default: Any = None, remapeo: Optional[dict[str, Any]] = None) -> None:
+    _Regla(campo, default, remapeo).validar_correccion()
+
+
+def _aplicar_grupo(db: Session, regla: _Regla, ids: list[int], viejo: Any, code: str, nuevo: Any):
+    """
+    UPDATE de un grupo (mismo valor viejo -> mismo valor nuevo) dentro de un chunk:
+      WITH antes AS (SELECT ... WHERE id = ANY(:ids) AND <sigue con el valor viejo>
+                     FOR UPDATE SKIP LOCKED)
+      UPDATE ... SET datos_dinamicos = datos_dinamicos || {campo: nuevo} RETURNING nuevo + antes
+    - SKIP LOCKED: una fila que alguien está editando se saltea (no bloquea tráfico vivo)
+    - re-chequea el valor viejo: si cambió desde el scan, no se pisa
+    """
+    valor_actual = Comunero.datos_dinamicos[regla.nombre]
+    if code == "OBLIGATORIO":
+        sigue_igual = func.coalesce(valor_actual, cast(literal("null"), JSONB)).in_(
+            [cast(literal(v), JSONB) for v in _VACIOS_JSON]
+        )
+    else:
+        sigue_igual = valor_actual == cast(literal(json.dumps(viejo)), JSONB)
+
+    antes = (
+        select(Comunero.id, Comunero.datos_dinamicos, Comunero.updated_at)
+        .where(
+            Comunero.id == any_(bindparam("ids", ids, type_=ARRAY(Integer))),
+            Comunero.is_deleted == False,  # noqa: E712
+            sigue_igual,
+        )
+        .with_for_update(skip_locked=True)
+        .cte("antes")
+    )
+    return db.execute(
+        update(Comunero)
+        .where(Comunero.id == antes.c.id)
+        .values(
+            datos_dinamicos=Comunero.datos_dinamicos.op("||")(cast(literal({regla.nombre: nuevo}, JSONB), JSONB)),
+            updated_at=func.now(),
+        )
+        .returning(
+            *COLUMNAS_RETURNING,
+            antes.c.datos_dinamicos.label("antes_datos"),
+            antes.c.updated_at.label("antes_updated_at"),
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+
+
+def _entrada_log(u) -> tuple[str, int, dict[str, Any], dict[str, Any]]:
+    """(EDITAR, id, antes, después) de una fila devuelta por _aplicar_grupo."""
+    snap = snap_comunero(u)
+    antes = {
+        **snap,
+        "datos_dinamicos": u.antes_datos or {},
+        "updated_at": u.antes_updated_at.isoformat() if u.antes_updated_at else None,
+    }
+    return "EDITAR", u.id, antes, snap
+
+
+# -----------------------
+# JOB
+# -----------------------
+def ejecutar_conformidad(
+    bind: Engine,
+    trabajo_id: int,
+    campo_id: int,
+    aplicar: bool = False,
+    default: Any = None,
+    remapeo: Optional[dict[str, Any]] = None,
+    muestras: int = 20,
+) -> None:
+    """
+    Revisa que los comuneros vivos cumplan la definición ACTUAL de un campo.
+
+    - Lectura: un SELECT id, documento, datos_dinamicos->campo con cursor del
+      servidor (yield_per), en una conexión aparte. Es MVCC: no toma locks.
+    - Reporte (trabajo.resultado, actualizado por chunk): revisados, no conformes
+      por código y hasta `muestras` filas de ejemplo.
+    - aplicar=True: corrige por chunk (default para OBLIGATORIO, remapeo para
+      valores inválidos) con UPDATEs cortos, commit y pausa CONFORMIDAD_PAUSA_MS
+      entre chunks. Cada fila corregida queda auditada (EDITAR).
+    """
+    with Session(bind=bind, expire_on_commit=False) as db:
+        try:
+            campo = db.get(CampoFormulario, campo_id)
+            if campo is None:
+                raise HTTPException(status_code=404, detail="Campo no encontrado")
+            regla = _Regla(campo, default, remapeo)
+
+            total = db.execute(
+                select(func.count()).where(Comunero.is_deleted == False)  # noqa: E712
+            ).scalar_one()
+            trabajo: Trabajo = iniciar_trabajo(db, trabajo_id, total=total)
+            auditar_como(db, trabajo.usuario_id)
+
+            resultado: dict[str, Any] = {
+                "campo": regla.nombre,
+                "revisados": 0,
+                "no_conformes": 0,
+                "por_codigo": {},
+                "corregidos": 0,
+                "omitidos": 0,  # sin corrección aplicable, o editados/bloqueados durante el job
+                "muestras": [],
+            }
+
+            consulta = (
+                select(
+                    Comunero.id,
+                    Comunero.documento,
+                    Comunero.datos_dinamicos[regla.nombre].label("valor"),
+                )
+                .where(Comunero.is_deleted == False)  # noqa: E712
+                .order_by(Comunero.id)
+            )
+
+            with bind.connect() as lectura:
+                filas = lectura.execution_options(yield_per=settings.BULK_BATCH_SIZE).execute(consulta)
+                for particion in filas.partitions():
+                    grupos: dict[tuple[str, str], tuple[Any, str, Any, list[int]]] = {}
+
+                    for r in particion:
+                        code = regla.error(r.valor)
+                        if code is None:
+                            continue
+                        resultado["no_conformes"] += 1
+                        resultado["por_codigo"][code] = resultado["por_codigo"].get(code, 0) + 1
+                        if len(resultado["muestras"]) < muestras:
+                            resultado["muestras"].append(
+                                {"id": r.id, "documento": r.documento, "valor": r.valor, "code": code}
+                            )
+
+                        nuevo = regla.corregir(code, r.valor) if aplicar else None
+                        if nuevo is None:
+                            if aplicar:
+                                resultado["omitidos"] += 1
+                            continue
+                        clave = (code, json.dumps(r.valor, sort_keys=True))
+                        grupos.setdefault(clave, (r.valor, code, nuevo, []))[3].append(r.id)
+
+                    corregidas = []
+                    for viejo, code, nuevo, ids in grupos.values():
+                        actualizadas = _aplicar_grupo(db, regla, ids, viejo, code, nuevo)
+                        resultado["omitidos"] += len(ids) - len(actualizadas)
+                        corregidas += actualizadas
+                    registrar_logs_comuneros(db, trabajo.usuario_id, (_entrada_log(u) for u in corregidas))
+
+                    resultado["revisados"] += len(particion)
+                    resultado["corregidos"] += len(corregidas)
+                    trabajo.procesados = resultado["revisados"]
+                    trabajo.afectados = resultado["corregidos"]
+                    trabajo.resultado = copy.deepcopy(resultado)  # JSONB: asignar copia, no mutar in-place
+                    db.commit()
+
+                    if corregidas and settings.CONFORMIDAD_PAUSA_MS > 0:
+                        time.sleep(settings.CONFORMIDAD_PAUSA_MS / 1000)
+
+            finalizar_trabajo(db, trabajo_id, resultado=resultado)
+
+        except HTTPException as e:
+            db.rollback()
+            finalizar_trabajo(db, trabajo_id, error=str(e.detail))
+        except Exception:
+            db.rollback()
+            logger.exception("Trabajo %s falló", trabajo_id)
+            finalizar_trabajo(db, trabajo_id, error="Error interno durante el trabajo")
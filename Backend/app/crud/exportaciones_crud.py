@@ -1,11 +1,29 @@
+from typing import Optional
+
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.models.comunero import Comunero
+from app.crud.archivo_crud import COLUMNAS, criterio_en_archivo
+from app.models.comunero import Comunero, ComuneroArchivo
+from app.utils.filtros import condiciones_dinamicas
+
 
+def obtener_comuneros_para_exportacion(
+    db: Session,
+    include_deleted: bool = False,
+    filtros_and: Optional[dict] = None,
+    filtros_or: Optional[dict] = None,
+):
+    criterio = condiciones_dinamicas(db, filtros_and, filtros_or)
 
-def obtener_comuneros_para_exportacion(db: Session, include_deleted: bool = False):
-    q = select(Comunero)
     if not include_deleted:
-        q = q.where(Comunero.is_deleted.is_(False))
-    return db.execute(q).scalars().all()
\ No newline at end of file
+        q = select(Comunero).where(
+            Comunero.is_deleted == False,  # noqa: E712  (empata índices parciales)
+            *criterio,
+        )
+        return db.execute(q).scalars().all()
+
+    # eliminados incluye los ya movidos a comuneros_archivo
+    vivos = select(*[getattr(Comunero, c) for c in COLUMNAS]).where(*criterio)
+    archivados = select(*[getattr(ComuneroArchivo, c) for c in COLUMNAS]).where(*criterio_en_archivo(criterio))
+    return db.execute(vivos.union_all(archivados)).all()
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.crud.comunero_crud import insertar_lote_bulk, preparar_lote_bulk
+from app.crud.log_crud import auditar_como
+from app.models.importacion import Importacion
+from app.utils.import_helper import FilaIlegible, fila_a_registro, iter_filas_csv, iter_filas_xlsx, mapear_columnas
+from app.utils.validation import validador_campos
+
+logger = logging.getLogger(__name__)
+
+# tope de filas con error guardadas con detalle (el resto solo se cuenta)
+MAX_ERRORES_DETALLE = 1000
+
+
+# -----------------------
+# CREATE / READ
+# -----------------------
+def crear_importacion(db: Session, usuario_id: int, archivo: str, formato: str) -> Importacion:
+    job = Importacion(usuario_id=usuario_id, archivo=archivo, formato=formato)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def obtener_importacion(db: Session, importacion_id: int) -> Optional[Importacion]:
+    return db.get(Importacion, importacion_id)
+
+
+# -----------------------
+# JOB (background)
+# -----------------------
+def _ahora() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _procesar_chunk(db: Session, job: Importacion, validador, chunk: list[tuple[int, Any]]) -> None:
+    """Valida + inserta un chunk y actualiza el progreso del job en la MISMA transacción."""
+    ilegibles = [
+        {"fila": n, "ok": False, "documento": None, "error": r.error, "code": "CODIFICACION"}
+        for n, r in chunk if isinstance(r, FilaIlegible)
+    ]
+    legibles = [(n, r) for n, r in chunk if not isinstance(r, FilaIlegible)]
+    resultados, validas = preparar_lote_bulk(validador, legibles, job.usuario_id)
+    if validas:
+        insertar_lote_bulk(db, resultados, validas, job.usuario_id)
+
+    fallidas = [r for r in resultados if not r["ok"]]
+    job.filas_procesadas += len(chunk)
+    job.insertados += len(resultados) - len(fallidas)
+    fallidas = sorted(ilegibles + fallidas, key=lambda r: r["fila"])
+    job.errores += len(fallidas)
+
+    lugar = MAX_ERRORES_DETALLE - len(job.errores_detalle)
+    if fallidas and lugar > 0:
+        # reasignar (no append) para que el ORM detecte el cambio en el JSONB
+        job.errores_detalle = job.errores_detalle + fallidas[:lugar]
+
+    db.commit()
+
+
+def ejecutar_importacion(
+    bind: Engine,
+    importacion_id: int,
+    path: str,
+    mapeo: Optional[dict[str, str]] = None,
+    codificacion: Optional[str] = None,
+) -> None:
+    """
+    Lee la planilla en streaming y la importa por chunks de BULK_BATCH_SIZE filas
+    (misma validación/INSERT que POST /comuneros/bulk). Cada chunk se commitea
+    junto con el progreso, así GET /importaciones/{id} siempre refleja lo escrito.
+    `codificacion` (solo CSV): None = detectarla. Borra `path` al terminar.
+    """
+    with Session(bind=bind, expire_on_commit=False) as db:
+        job = db.get(Importacion, importacion_id)
+        job.estado = "procesando"
+        job.iniciado_en = _ahora()
+        db.commit()
+        auditar_como(db, job.usuario_id)
+
+        try:
+            validador = validador_campos(db)
+            tipos = validador.tipos
+
+            filas = iter_filas_xlsx(path) if job.formato == "xlsx" else iter_filas_csv(path, codificacion)
+            _, encabezado = next(filas, (None, None))
+            if not encabezado:
+                raise ValueError("El archivo está vacío")
+            if isinstance(encabezado, FilaIlegible):
+                raise ValueError(f"Encabezado: {encabezado.error}")
+
+            columnas, ignoradas = mapear_columnas(encabezado, tipos, mapeo)
+            faltan = {"nombre", "documento"} - set(columnas.values())
+            if faltan:
+                raise ValueError(f"Faltan columnas obligatorias: {', '.join(sorted(faltan))}")
+
+            chunk: list[tuple[int, Any]] = []
+            for n, celdas in filas:
+                if isinstance(celdas, FilaIlegible):
+                    chunk.append((n, celdas))
+                elif all(c is None or (isinstance(c, str) and not c.strip()) for c in celdas):
+                    continue  # filas en blanco (muy común al final de un xlsx)
+                else:
+                    chunk.append((n, fila_a_registro(celdas, columnas, tipos)))
+                if len(chunk) >= settings.BULK_BATCH_SIZE:
+                    _procesar_chunk(db, job, validador, chunk)
+                    chunk = []
+            if chunk:
+                _procesar_chunk(db, job, validador, chunk)
+
+            job.estado = "completado"
+            if ignoradas:
+                job.mensaje = f"Columnas ignoradas: {', '.join(ignoradas)}"
+
+        except Exception as e:
+            db.rollback()
+            logger.exception("Importación %s falló", importacion_id)
+            job = db.get(Importacion, importacion_id)
+            job.estado = "fallido"
+            job.mensaje = str(e) if isinstance(e, ValueError) else "Error interno durante la importación"
+
+        finally:
+            job.finalizado_en = _ahora()
+            db.commit()
+            try:
+                os.remove(path)
+            except OSError:
+                pass
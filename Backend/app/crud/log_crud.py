@@ -1,16 +1,232 @@
 from __future__ import annotations
 
-from typing import Any, Optional
+import json
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Iterable, Iterator, Optional
 
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from sqlalchemy import and_, any_, bindparam, event, func, insert, or_, select, text, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.types import Integer, Text
 
+from app.config import settings
 from app.models.log_auditoria import LogAuditoria
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.particiones import asegurar_particiones, mes_actual, retener_particiones, sumar_meses
+
+
+# ===============================
+# Diff entre snapshots
+# ===============================
+_FALTA = object()
+
+
+def _cambio(viejo: Any, nuevo: Any) -> dict[str, Any]:
+    # sin "de" = clave agregada; sin "a" = clave quitada
+    c: dict[str, Any] = {}
+    if viejo is not _FALTA:
+        c["de"] = viejo
+    if nuevo is not _FALTA:
+        c["a"] = nuevo
+    return c
+
+
+def _distintos(a: Any, b: Any) -> bool:
+    return type(a) is not type(b) or a != b
+
+
+def diff_snapshots(antes: dict[str, Any], despues: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """
+    {ruta: {"de": viejo, "a": nuevo}} con lo que cambió entre dos snapshots.
+    ruta = clave de primer nivel, o "clave.subclave" cuando ambos lados son
+    dicts (datos_dinamicos, opciones): editar un campo dinámico no copia el resto.
+    """
+    cambios: dict[str, dict[str, Any]] = {}
+    for clave in [*antes, *(k for k in despues if k not in antes)]:
+        v0, v1 = antes.get(clave, _FALTA), despues.get(clave, _FALTA)
+        if not _distintos(v0, v1):
+            continue
+        if isinstance(v0, dict) and isinstance(v1, dict):
+            for sub in [*v0, *(k for k in v1 if k not in v0)]:
+                s0, s1 = v0.get(sub, _FALTA), v1.get(sub, _FALTA)
+                if _distintos(s0, s1):
+                    cambios[f"{clave}.{sub}"] = _cambio(s0, s1)
+        else:
+            cambios[clave] = _cambio(v0, v1)
+    return cambios
+
+
+def aplicar_cambios(
+    estado: dict[str, Any],
+    cambios: dict[str, dict[str, Any]],
+    *,
+    hacia_atras: bool = False,
+) -> dict[str, Any]:
+    """Snapshot después (o antes, con hacia_atras) de `cambios`. No muta `estado`."""
+    lado = "de" if hacia_atras else "a"
+    nuevo = dict(estado)
+    copiados: set[str] = set()
+    for ruta, c in cambios.items():
+        # las claves de primer nivel son columnas (sin "."); la subclave puede tener "."
+        clave, _, sub = ruta.partition(".")
+        destino = nuevo
+        if sub:
+            if clave not in copiados:
+                nuevo[clave] = dict(nuevo.get(clave) or {})
+                copiados.add(clave)
+            destino, clave = nuevo[clave], sub
+        if lado in c:
+            destino[clave] = c[lado]
+        else:
+            destino.pop(clave, None)
+    return nuevo
+
+
+# ===============================
+# Backend de auditoría: "orm" | "trigger"
+# ===============================
+# Con "trigger", los triggers de models/log_auditoria.py escriben los logs en
+# la misma transacción (también los UPDATE/INSERT masivos) y registrar_log no
+# hace nada. Necesitan el usuario que actúa: auditar_como() lo guarda en la
+# sesión y se fija con set_config(..., true) (= SET LOCAL) al empezar cada
+# transacción, porque muere con el commit.
+_USUARIO_AUDITORIA = "auditoria_usuario_id"
+
+
+def auditoria_por_trigger() -> bool:
+    return settings.AUDITORIA_BACKEND == "trigger"
+
+
+def _fijar_usuario(conn: Connection, usuario_id: int) -> None:
+    conn.execute(
+        text(
+            "SELECT set_config('app.usuario_id', :usuario, true), "
+            "set_config('app.auditoria_modo', :modo, true), "
+            "set_config('app.auditoria_checkpoint', :cada, true)"
+        ),
+        {
+            "usuario": str(usuario_id),
+            "modo": settings.AUDITORIA_MODO,
+            "cada": str(settings.AUDITORIA_CHECKPOINT_CADA),
+        },
+    )
+
+
+def auditar_como(db: Session, usuario_id: int) -> None:
+    """Backend "trigger": lo que escriba `db` desde ahora queda a nombre de `usuario_id`."""
+    if not auditoria_por_trigger():
+        return
+    db.info[_USUARIO_AUDITORIA] = usuario_id
+    if db.in_transaction():
+        _fijar_usuario(db.connection(), usuario_id)
+
+
+@event.listens_for(Session, "after_begin")
+def _usuario_en_transaccion(session, transaction, connection):
+    usuario_id = session.info.get(_USUARIO_AUDITORIA)
+    if usuario_id is not None:
+        _fijar_usuario(connection, usuario_id)
+
+
+def auditado_por_trigger(db: Session, usuario_id: int) -> bool:
+    """True si los triggers ya auditan lo que escribe `db` como `usuario_id`."""
+    return auditoria_por_trigger() and db.info.get(_USUARIO_AUDITORIA) == usuario_id
+
+
+@contextmanager
+def sin_auditoria(db: Session) -> Iterator[None]:
+    """Movimientos que no cambian el registro (comuneros <-> comuneros_archivo): el trigger no los audita."""
+    if not auditoria_por_trigger():
+        yield
+        return
+    db.execute(text("SELECT set_config('app.auditar', 'off', true)"))
+    try:
+        yield
+    finally:
+        db.execute(text("SELECT set_config('app.auditar', 'on', true)"))
 
 
 # ===============================
 # CREATE (Auditoría automática)
 # ===============================
+def _bloquear_versiones(db: Session, entidad: str, ids: list[int]) -> None:
+    """
+    Modo diff: dos escrituras concurrentes de la misma entidad leerían el
+    mismo MAX(version) y la cadena de diffs quedaría con versiones repetidas.
+    Lock advisory por registro hasta el commit (el mismo que toma cv_auditar):
+    el segundo espera y lee la versión ya commiteada. Un UNIQUE (entidad,
+    entidad_id, version) no sirve: en la tabla particionada tendría que
+    incluir timestamp. `ids` ordenados: sin deadlocks entre lotes.
+    """
+    db.execute(
+        text(
+            "SELECT pg_advisory_xact_lock(hashtext(:entidad), i) "
+            "FROM unnest(CAST(:ids AS integer[])) AS i ORDER BY i"
+        ),
+        {"entidad": entidad, "ids": ids},
+    )
+
+
+def _ultimas_versiones(db: Session, entidad: str, ids: Iterable[int]) -> dict[int, int]:
+    """{entidad_id: última versión} en 1 query (índice entidad, entidad_id, version)."""
+    ids = sorted(set(ids))
+    if not ids:
+        return {}
+    if settings.AUDITORIA_MODO == "diff":
+        _bloquear_versiones(db, entidad, ids)
+    return dict(
+        db.execute(
+            select(LogAuditoria.entidad_id, func.max(LogAuditoria.version))
+            .where(
+                LogAuditoria.entidad == entidad,
+                LogAuditoria.entidad_id == any_(bindparam("ids", ids, type_=ARRAY(Integer))),
+            )
+            .group_by(LogAuditoria.entidad_id)
+        ).all()
+    )
+
+
+def _fila_log(
+    usuario_id: int,
+    accion: str,
+    entidad: str,
+    entidad_id: int,
+    version: Any,  # int; en modo completo, subquery del INSERT (ver registrar_log)
+    antes: Optional[dict[str, Any]],
+    despues: Optional[dict[str, Any]],
+) -> dict[str, Any]:
+    """
+    Valores de un log según AUDITORIA_MODO:
+    - completo: antes y después enteros (+ cambios)
+    - diff: solo cambios; cada AUDITORIA_CHECKPOINT_CADA versiones (y siempre
+      en la 1) también el snapshot después, como base para reconstruir.
+    Sin antes o sin después (CREAR / borrado físico) no hay diff: va entero.
+    """
+    fila = {
+        "usuario_id": usuario_id,
+        "accion": accion,
+        "entidad": entidad,
+        "entidad_id": entidad_id,
+        "version": version,
+        "datos_anteriores": antes,
+        "datos_nuevos": despues,
+        "cambios": None,
+    }
+    if antes is None or despues is None:
+        return fila
+
+    fila["cambios"] = diff_snapshots(antes, despues)
+    if settings.AUDITORIA_MODO == "diff":
+        fila["datos_anteriores"] = None
+        checkpoint = (version - 1) % max(settings.AUDITORIA_CHECKPOINT_CADA, 1) == 0
+        if not checkpoint:
+            fila["datos_nuevos"] = None
+    return fila
+
+
 def registrar_log(
     db: Session,
     *,
@@ -20,14 +236,21 @@ def registrar_log(
     entidad_id: int,
     datos_anteriores: Optional[dict[str, Any]] = None,
     datos_nuevos: Optional[dict[str, Any]] = None,
-) -> LogAuditoria:
+) -> Optional[LogAuditoria]:
+    if auditado_por_trigger(db, usuario_id):
+        return None  # ya lo escribió el trigger de la tabla
+    if settings.AUDITORIA_MODO == "diff":
+        version = _ultimas_versiones(db, entidad, [entidad_id]).get(entidad_id, 0) + 1
+    else:
+        # completo: cada fila se basta sola, una versión repetida por carrera no
+        # rompe nada; va como subquery del INSERT (sin SELECT previo ni lock)
+        version = (
+            select(func.coalesce(func.max(LogAuditoria.version), 0) + 1)
+            .where(LogAuditoria.entidad == entidad, LogAuditoria.entidad_id == entidad_id)
+            .scalar_subquery()
+        )
     log = LogAuditoria(
-        usuario_id=usuario_id,
-        accion=accion,
-        entidad=entidad,
-        entidad_id=entidad_id,
-        datos_anteriores=datos_anteriores,
-        datos_nuevos=datos_nuevos,
+        **_fila_log(usuario_id, accion, entidad, entidad_id, version, datos_anteriores, datos_nuevos)
     )
     db.add(log)
     # OJO: no hacemos commit aquí por defecto para no romper transacciones del CRUD.
@@ -35,20 +258,106 @@ def registrar_log(
     return log
 
 
+def registrar_logs_bulk(
+    db: Session,
+    *,
+    usuario_id: int,
+    entidad: str,
+    entradas: Iterable[tuple[str, int, Any, Any]],
+) -> None:
+    """
+    1 query de versiones + 1 INSERT (executemany): entradas = [(accion, entidad_id, antes, nuevo)].
+    Puede ser un generador: con el backend "trigger" ni se recorre (no se arman snapshots).
+    """
+    if auditado_por_trigger(db, usuario_id):
+        return
+    entradas = list(entradas)
+    if not entradas:
+        return
+    versiones = _ultimas_versiones(db, entidad, (e[1] for e in entradas))
+    filas = []
+    for accion, entidad_id, antes, nuevo in entradas:
+        versiones[entidad_id] = versiones.get(entidad_id, 0) + 1
+        filas.append(_fila_log(usuario_id, accion, entidad, entidad_id, versiones[entidad_id], antes, nuevo))
+    db.execute(insert(LogAuditoria), filas)
+
+
 # ===============================
 # LIST (con filtros + paginación)
 # ===============================
+def _utc_naive(d: datetime) -> datetime:
+    # la columna es timestamp sin zona (UTC): comparar contra timestamptz impide podar en el plan
+    return d.astimezone(timezone.utc).replace(tzinfo=None) if d.tzinfo else d
+
+
+# sin las columnas JSONB: el resumen de /logs?detalle=false no las lee (ni des-TOASTea)
+COLUMNAS_RESUMEN = (
+    LogAuditoria.id,
+    LogAuditoria.usuario_id,
+    LogAuditoria.accion,
+    LogAuditoria.entidad,
+    LogAuditoria.entidad_id,
+    LogAuditoria.version,
+    LogAuditoria.timestamp,
+)
+
+
+def cursor_log(log) -> str:
+    """Cursor opaco que apunta justo después de `log` en el orden (timestamp DESC, id DESC)."""
+    return encode_cursor(log.timestamp, log.id)
+
+
+def _decode_cursor_log(cursor: str) -> tuple[datetime, int]:
+    ts, last_id = decode_cursor(cursor, 2)
+    if not isinstance(ts, datetime) or not isinstance(last_id, int):
+        raise HTTPException(status_code=400, detail="cursor inválido")
+    return ts, last_id
+
+
+def _valor_json(valor: Optional[str]) -> Any:
+    # de la query string: 30 / true / null / "30" son JSON; lo que no parsea (Norte) es texto
+    if valor is None:
+        return _FALTA
+    try:
+        return json.loads(valor)
+    except ValueError:
+        return valor
+
+
 def listar_logs(
     db: Session,
     *,
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
+    detalle: bool = True,
     usuario_id: Optional[int] = None,
     entidad: Optional[str] = None,
     accion: Optional[str] = None,
     entidad_id: Optional[int] = None,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    clave: Optional[str] = None,
+    de: Optional[str] = None,
+    a: Optional[str] = None,
 ):
-    q = select(LogAuditoria).order_by(LogAuditoria.timestamp.desc())
+    """
+    Orden (timestamp DESC, id DESC). Con `cursor` (keyset) se ignora skip: cada
+    página es un rango de índice ((usuario_id|entidad, entidad_id), timestamp, id),
+    no importa lo profunda que sea. detalle=False -> Rows de COLUMNAS_RESUMEN.
+
+    clave / de / a: logs cuyo `cambios` tiene esa ruta (y ese valor viejo /
+    nuevo, como JSON: ver _valor_json), vía los GIN de cambios. Los CREAR no
+    tienen cambios: no entran.
+    """
+    q = select(LogAuditoria) if detalle else select(*COLUMNAS_RESUMEN)
+    q = q.order_by(LogAuditoria.timestamp.desc(), LogAuditoria.id.desc())
+
+    # ✅ rango de fechas: Postgres poda las particiones mensuales que no lo tocan
+    if desde is not None:
+        q = q.where(LogAuditoria.timestamp >= _utc_naive(desde))
+    if hasta is not None:
+        q = q.where(LogAuditoria.timestamp < _utc_naive(hasta))
 
     if usuario_id is not None:
         q = q.where(LogAuditoria.usuario_id == usuario_id)
@@ -59,6 +368,165 @@ def listar_logs(
     if entidad_id is not None:
         q = q.where(LogAuditoria.entidad_id == entidad_id)
 
-    q = q.offset(skip).limit(limit)
+    # ✅ campo cambiado: con valor -> `@>` (ix_logs_cambios_gin); solo la ruta ->
+    # cv_claves(cambios) @> ARRAY[ruta] (ix_logs_cambios_claves_gin)
+    if clave:
+        buscado = _cambio(_valor_json(de), _valor_json(a))
+        if buscado:
+            q = q.where(LogAuditoria.cambios.contains({clave: buscado}))
+        else:
+            q = q.where(func.cv_claves(LogAuditoria.cambios, type_=ARRAY(Text)).contains([clave]))
+
+    if cursor:
+        ts, last_id = _decode_cursor_log(cursor)
+        q = q.where(tuple_(LogAuditoria.timestamp, LogAuditoria.id) < tuple_(ts, last_id))
+    elif skip:
+        q = q.offset(skip)
+
+    res = db.execute(q.limit(limit))
+    return res.scalars().all() if detalle else res.all()
+
+
+def obtener_log(db: Session, log_id: int) -> LogAuditoria:
+    # la PK es (id, timestamp): sin timestamp es un probe por partición
+    log = db.execute(select(LogAuditoria).where(LogAuditoria.id == log_id)).scalars().first()
+    if log is None:
+        raise HTTPException(status_code=404, detail="Log no encontrado")
+    return log
+
+
+# ===============================
+# Reconstrucción (modo diff)
+# ===============================
+def _es_base(log=LogAuditoria):
+    # log con el snapshot después entero: completo, CREAR, checkpoint del modo diff
+    return or_(log.cambios.is_(None), func.jsonb_typeof(log.datos_nuevos) == "object")
+
+
+def _estado_despues(log, estado: Optional[dict[str, Any]]) -> Optional[dict[str, Any]]:
+    if log.cambios is None or isinstance(log.datos_nuevos, dict):
+        return log.datos_nuevos
+    return aplicar_cambios(estado or {}, log.cambios)
+
+
+def _cadenas(
+    db: Session,
+    rangos: dict[tuple[str, int], tuple[int, int]],
+) -> dict[tuple[str, int], list]:
+    """
+    {(entidad, entidad_id): logs desde el último snapshot entero <= desde hasta
+    la versión hasta} para todos los `rangos` en UNA query (unnest de los
+    rangos + índice entidad, entidad_id, version), agrupados acá.
+    """
+    if not rangos:
+        return {}
+    claves = list(rangos)
+    k = (
+        func.unnest(
+            bindparam("entidades", [e for e, _ in claves], type_=ARRAY(Text)),
+            bindparam("entidad_ids", [i for _, i in claves], type_=ARRAY(Integer)),
+            bindparam("desdes", [rangos[c][0] for c in claves], type_=ARRAY(Integer)),
+            bindparam("hastas", [rangos[c][1] for c in claves], type_=ARRAY(Integer)),
+        )
+        .table_valued("entidad", "entidad_id", "desde", "hasta")
+        .render_derived(name="k")
+    )
+    b = aliased(LogAuditoria)
+    base = (
+        select(func.max(b.version))
+        .where(b.entidad == k.c.entidad, b.entidad_id == k.c.entidad_id, b.version <= k.c.desde, _es_base(b))
+        .scalar_subquery()
+    )
+    filas = db.execute(
+        select(
+            LogAuditoria.entidad,
+            LogAuditoria.entidad_id,
+            LogAuditoria.id,
+            LogAuditoria.version,
+            LogAuditoria.datos_nuevos,
+            LogAuditoria.cambios,
+        )
+        .select_from(k)
+        .join(
+            LogAuditoria,
+            and_(
+                LogAuditoria.entidad == k.c.entidad,
+                LogAuditoria.entidad_id == k.c.entidad_id,
+                LogAuditoria.version >= func.coalesce(base, 1),
+                LogAuditoria.version <= k.c.hasta,
+            ),
+        )
+        .order_by(LogAuditoria.entidad, LogAuditoria.entidad_id, LogAuditoria.version, LogAuditoria.id)
+    ).all()
+
+    cadenas: dict[tuple[str, int], list] = {c: [] for c in claves}
+    for f in filas:
+        cadenas[(f.entidad, f.entidad_id)].append(f)
+    return cadenas
+
+
+def reconstruir_version(db: Session, entidad: str, entidad_id: int, version: int) -> Optional[dict[str, Any]]:
+    """
+    Snapshot de la entidad tal como quedó en `version`: parte del último
+    snapshot entero y aplica los diffs siguientes (a lo sumo
+    AUDITORIA_CHECKPOINT_CADA - 1). None = la entidad no existía (borrado físico).
+    """
+    cadena = _cadenas(db, {(entidad, entidad_id): (version, version)})[(entidad, entidad_id)]
+    if not cadena or cadena[-1].version != version:
+        raise HTTPException(status_code=404, detail="Versión no encontrada")
+
+    estado = None
+    for log in cadena:
+        estado = _estado_despues(log, estado)
+    return estado
+
+
+def expandir_logs(db: Session, logs) -> dict[int, tuple[Optional[dict], Optional[dict]]]:
+    """
+    {log_id: (antes, después)} enteros para los logs guardados como diff.
+    Una sola query para todas las cadenas; los logs completos no cuestan nada.
+    """
+    por_entidad: dict[tuple[str, int], set[int]] = {}
+    versiones: dict[tuple[str, int], list[int]] = {}
+    for l in logs:
+        if l.cambios is not None and (l.datos_anteriores is None or l.datos_nuevos is None):
+            por_entidad.setdefault((l.entidad, l.entidad_id), set()).add(l.id)
+            versiones.setdefault((l.entidad, l.entidad_id), []).append(l.version)
+
+    cadenas = _cadenas(db, {c: (min(v), max(v)) for c, v in versiones.items()})
+    expandidos: dict[int, tuple[Optional[dict], Optional[dict]]] = {}
+    for clave, ids in por_entidad.items():
+        estado = None
+        for log in cadenas[clave]:
+            estado = _estado_despues(log, estado)
+            if log.id in ids:
+                expandidos[log.id] = (aplicar_cambios(estado or {}, log.cambios, hacia_atras=True), estado)
+    return expandidos
+
+
+# ===============================
+# Particiones (roll-forward + retención)
+# ===============================
+def mantener_particiones_logs(
+    bind: Engine,
+    *,
+    meses_adelante: Optional[int] = None,
+    retencion_meses: Optional[int] = None,
+    directorio: Optional[str] = None,
+) -> dict[str, Any]:
+    """
+    Crea las particiones de los próximos meses y, con retencion_meses > 0,
+    vuelca a .csv.gz y saca las anteriores al horizonte (mes actual - N).
+    """
+    meses_adelante = settings.LOGS_PARTICIONES_ADELANTE if meses_adelante is None else meses_adelante
+    retencion_meses = settings.LOGS_RETENCION_MESES if retencion_meses is None else retencion_meses
+    tabla = LogAuditoria.__tablename__
 
-    return db.execute(q).scalars().all()
\ No newline at end of file
+    with bind.connect() as conn:
+        creadas = asegurar_particiones(conn, tabla, "timestamp", meses_adelante)
+        conn.commit()
+        retenidas = []
+        if retencion_meses > 0:
+            corte = sumar_meses(mes_actual(), -retencion_meses)
+            retenidas = retener_particiones(conn, tabla, corte, directorio or settings.LOGS_ARCHIVO_DIR)
+    return {"creadas": creadas, "retenidas": retenidas}
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.trabajo import Trabajo
+
+
+# -----------------------
+# CREATE / READ
+# -----------------------
+def crear_trabajo(db: Session, tipo: str, usuario_id: int, parametros: Optional[dict[str, Any]] = None) -> Trabajo:
+    trabajo = Trabajo(tipo=tipo, usuario_id=usuario_id, parametros=parametros or {})
+    db.add(trabajo)
+    db.commit()
+    db.refresh(trabajo)
+    return trabajo
+
+
+def obtener_trabajo(db: Session, trabajo_id: int) -> Optional[Trabajo]:
+    return db.get(Trabajo, trabajo_id)
+
+
+# -----------------------
+# Ciclo de vida (lo usan los jobs)
+# -----------------------
+def _ahora() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def iniciar_trabajo(db: Session, trabajo_id: int, total: Optional[int] = None) -> Trabajo:
+    trabajo = db.get(Trabajo, trabajo_id)
+    trabajo.estado = "procesando"
+    trabajo.iniciado_en = _ahora()
+    trabajo.total = total
+    db.commit()
+    return trabajo
+
+
+def finalizar_trabajo(
+    db: Session,
+    trabajo_id: int,
+    error: Optional[str] = None,
+    resultado: Optional[dict[str, Any]] = None,
+) -> Trabajo:
+    trabajo = db.get(Trabajo, trabajo_id)
+    trabajo.estado = "fallido" if error else "completado"
+    trabajo.mensaje = error
+    if resultado is not None:
+        trabajo.resultado = resultado
+    trabajo.finalizado_en = _ahora()
+    db.commit()
+    return trabajo
@@ -0,0 +1,28 @@
+"""
+Archivo de comuneros eliminados (para cron / scheduler):
+
+    python -m app.jobs.archivar_comuneros            # usa ARCHIVO_DIAS
+    python -m app.jobs.archivar_comuneros --dias 30
+"""
+import argparse
+
+from app.config import SessionLocal, settings
+from app.crud.archivo_crud import archivar_eliminados
+
+# registra todos los modelos (FKs) antes de usar la sesión
+from app.models import usuario, comunero, campos_formulario, log_auditoria, version_tabla  # noqa: F401
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mueve comuneros eliminados hace más de N días a comuneros_archivo")
+    parser.add_argument("--dias", type=int, default=settings.ARCHIVO_DIAS)
+    parser.add_argument("--batch", type=int, default=settings.BULK_BATCH_SIZE)
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        total = archivar_eliminados(db, args.dias, args.batch)
+    print(f"Archivados: {total}")
+
+
+if __name__ == "__main__":
+    main()
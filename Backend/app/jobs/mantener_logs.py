@@ -0,0 +1,33 @@
+"""
+Particiones mensuales de logs_auditoria (para cron / scheduler, 1 vez por día alcanza):
+
+    python -m app.jobs.mantener_logs                  # usa LOGS_PARTICIONES_ADELANTE / LOGS_RETENCION_MESES
+    python -m app.jobs.mantener_logs --retencion 12 --dir /backups/logs
+    python -m app.jobs.mantener_logs --retencion 0    # solo roll-forward
+"""
+import argparse
+
+from app.config import engine, settings
+from app.crud.log_crud import mantener_particiones_logs
+
+# registra todos los modelos (FKs) antes de usar la sesión
+from app.models import usuario, comunero, campos_formulario, log_auditoria, version_tabla  # noqa: F401
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Crea particiones futuras de logs_auditoria y retiene las viejas")
+    parser.add_argument("--adelante", type=int, default=settings.LOGS_PARTICIONES_ADELANTE)
+    parser.add_argument("--retencion", type=int, default=settings.LOGS_RETENCION_MESES, help="meses (0 = no retener)")
+    parser.add_argument("--dir", default=settings.LOGS_ARCHIVO_DIR)
+    args = parser.parse_args()
+
+    r = mantener_particiones_logs(
+        engine, meses_adelante=args.adelante, retencion_meses=args.retencion, directorio=args.dir
+    )
+    print(f"Creadas: {', '.join(r['creadas']) or '-'}")
+    for p in r["retenidas"]:
+        print(f"Retenida: {p['particion']} ({p['filas']} filas) -> {p['archivo']}")
+
+
+if __name__ == "__main__":
+    main()
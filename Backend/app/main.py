@@ -1,14 +1,21 @@
-from fastapi import FastAPI
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import DataError, IntegrityError
 
-from app.config import settings, engine, Base
+from app.config import settings, engine, Base, PIN_COOKIE, fijar_a_primaria, usuario_id_de_request
 
 # ✅ Handler
-from app.core.exceptions import integrity_error_to_http
+from app.core.exceptions import data_error_to_http, integrity_error_to_http
+from app.crud.log_crud import mantener_particiones_logs
+from app.utils.notificaciones import Escucha
+from app.utils.serializacion import RespuestaJSON
+from app.utils.validation import CANAL_CAMPOS, invalidar_validador, registrar_escucha
 
 # Importar modelos para que SQLAlchemy los registre
-from app.models import usuario, comunero, campos_formulario, log_auditoria
+from app.models import usuario, comunero, campos_formulario, log_auditoria, version_tabla, importacion, trabajo
 
 # Routers
 from app.routers.auth import router as auth_router
@@ -16,15 +23,43 @@ from app.routers.comuneros import router as comuneros_router
 from app.routers.campos_formulario import router as campos_router
 from app.routers.estadisticas import router as estadisticas_router
 from app.routers.exportaciones import router as exportaciones_router
+from app.routers.importaciones import router as importaciones_router
+from app.routers.trabajos import router as trabajos_router
 from app.routers.logs import router as logs_router
 from app.routers.bootstrap import router as bootstrap_router
 
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # ✅ Particiones de logs_auditoria del mes actual + próximos (la retención va por cron).
+    # Los workers que arrancan juntos se serializan con un advisory lock; si la DB
+    # no responde la app arranca igual: la partición DEFAULT recibe los INSERTs.
+    try:
+        mantener_particiones_logs(engine, retencion_meses=0)
+    except Exception:
+        logger.exception("No se pudieron crear las particiones de logs_auditoria")
+
+    # ✅ Validador de campos: los cambios en otros workers llegan por NOTIFY
+    escucha = None
+    if settings.ESCUCHA_NOTIFY:
+        escucha = Escucha({CANAL_CAMPOS: invalidar_validador})
+        registrar_escucha(escucha.activa)
+        escucha.start()
+    yield
+    if escucha is not None:
+        registrar_escucha(lambda: False)
+        escucha.detener()
+
 
 def create_app() -> FastAPI:
     app = FastAPI(
         title=settings.APP_NAME,
         version=settings.APP_VERSION,
         debug=settings.DEBUG,
+        lifespan=lifespan,
+        default_response_class=RespuestaJSON,  # ✅ orjson
     )
 
     app.add_middleware(
@@ -36,16 +71,36 @@ def create_app() -> FastAPI:
         expose_headers=["*"],
     )
 
+    # ✅ Réplica de lectura: quien escribe queda fijado a la primaria READ_PIN_SECONDS
+    @app.middleware("http")
+    async def pin_primaria_tras_escritura(request: Request, call_next):
+        response = await call_next(request)
+        if request.method in {"POST", "PUT", "PATCH", "DELETE"} and response.status_code < 400:
+            usuario_id = usuario_id_de_request(request)
+            if usuario_id is not None and settings.READ_PIN_SECONDS > 0:
+                fijar_a_primaria(usuario_id)
+                response.set_cookie(
+                    PIN_COOKIE, "1", max_age=settings.READ_PIN_SECONDS, httponly=True, samesite="lax"
+                )
+        return response
+
     # ✅ Handler global: convierte IntegrityError a JSON (409/400)
     @app.exception_handler(IntegrityError)
     async def integrity_error_handler(request, exc):
         return integrity_error_to_http(request, exc)
 
+    # ✅ DataError (cast/conversión que falla en Postgres) -> 422
+    @app.exception_handler(DataError)
+    async def data_error_handler(request, exc):
+        return data_error_to_http(request, exc)
+
     app.include_router(auth_router)
     app.include_router(comuneros_router)
     app.include_router(campos_router)
     app.include_router(estadisticas_router)
     app.include_router(exportaciones_router)
+    app.include_router(importaciones_router)
+    app.include_router(trabajos_router)
     app.include_router(logs_router)
     app.include_router(bootstrap_router)
 
@@ -6,11 +6,14 @@ from sqlalchemy import (
     Integer,
     DateTime,
     Index,
+    text,
 )
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.config import Base
+from app.models.log_auditoria import auditar_tabla
+from app.models.version_tabla import versionar_tabla
 
 
 class CampoFormulario(Base):
@@ -67,6 +70,14 @@ class CampoFormulario(Base):
         index=True,
     )
 
+    # Opt-in: índice de expresión parcial sobre comuneros.datos_dinamicos->>'campo'
+    indexado: Mapped[bool] = mapped_column(
+        Boolean,
+        default=False,
+        nullable=False,
+        server_default=text("false"),
+    )
+
     # =========================
     # Auditoría
     # =========================
@@ -90,3 +101,10 @@ Index(
     CampoFormulario.tipo,
     CampoFormulario.activo,
 )
+
+
+# ✅ versiones_tablas (ETags): bump por statement
+versionar_tabla(CampoFormulario.__table__)
+
+# ✅ backend de auditoría "trigger" (sin efecto con el backend "orm")
+auditar_tabla(CampoFormulario.__table__, "activo", eliminado=False)
@@ -1,5 +1,6 @@
 from datetime import datetime
 from sqlalchemy import (
+    DDL,
     String,
     DateTime,
     ForeignKey,
@@ -7,11 +8,19 @@ from sqlalchemy import (
     Index,
     text,
     UniqueConstraint,
+    event,
     func,
 )
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.config import Base
+from app.models.log_auditoria import auditar_tabla
+from app.models.version_tabla import versionar_tabla
+
+
+# predicados de los índices parciales
+VIVOS = text("is_deleted = false")
+ELIMINADOS = text("is_deleted = true")
 
 
 class Comunero(Base):
@@ -19,10 +28,10 @@ class Comunero(Base):
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
 
+    # índice: ix_comuneros_nombre (parcial, filas vivas) en __table_args__
     nombre: Mapped[str] = mapped_column(
         String(150),
         nullable=False,
-        index=True,
     )
 
     # ✅ Sin unique=True acá (lo manejamos por constraint nombrado)
@@ -49,19 +58,19 @@ class Comunero(Base):
         back_populates="comuneros",
     )
 
+    # sin índice propio: los de lectura son parciales (WHERE is_deleted = false)
     is_deleted: Mapped[bool] = mapped_column(
         Boolean,
         nullable=False,
         server_default=text("false"),
-        index=True,
     )
 
     # ✅ Mejor en DB (consistente), y si quieres timezone=True también
+    # (orden por created_at: ix_comuneros_created_at_id)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         nullable=False,
         server_default=func.now(),
-        index=True,
     )
 
     updated_at: Mapped[datetime] = mapped_column(
@@ -75,6 +84,103 @@ class Comunero(Base):
         # ✅ UNIQUE con nombre fijo (clave para 409 confiable)
         UniqueConstraint("documento", name="uq_comuneros_documento"),
 
-        # ✅ Índice compuesto (como ya tenías)
-        Index("ix_comunero_nombre_documento", "nombre", "documento"),
-    )
\ No newline at end of file
+        # ✅ Índices de lectura PARCIALES (solo filas vivas): todas las lecturas
+        # filtran `is_deleted = false`, así que las eliminadas no pagan espacio ni
+        # mantenimiento. OJO: el planner solo los usa con `= false` literal,
+        # no con `IS false` (por eso `Comunero.is_deleted == False` en los CRUD).
+        Index("ix_comuneros_nombre", "nombre", postgresql_where=VIVOS),
+        Index("ix_comunero_nombre_documento", "nombre", "documento", postgresql_where=VIVOS),
+        # (búsqueda infix/fuzzy: ix_comuneros_nombre_trgm / _documento_trgm, GIN pg_trgm,
+        #  solo en su migración porque requieren la extensión)
+
+        # ✅ Keyset pagination del listado: ORDER BY created_at DESC, id DESC
+        Index("ix_comuneros_created_at_id", "created_at", "id", postgresql_where=VIVOS),
+
+        # ✅ Filtros por igualdad sobre datos_dinamicos (`@>` containment)
+        Index(
+            "ix_comuneros_datos_dinamicos_gin",
+            "datos_dinamicos",
+            postgresql_using="gin",
+            postgresql_ops={"datos_dinamicos": "jsonb_path_ops"},
+            postgresql_where=VIVOS,
+        ),
+
+        # ✅ Job de archivo: eliminadas más viejas que N días (índice chico)
+        Index("ix_comuneros_eliminados_updated_at", "updated_at", postgresql_where=ELIMINADOS),
+    )
+
+
+# ✅ Texto "YYYY-MM-DD" (lo que acepta la validación: también "2024-1-5") -> date,
+# o NULL si no es una fecha válida ("10/01/2024", "2024-02-30"): un dato sucio no
+# aborta el filtro ni el CREATE INDEX de ix_comuneros_campo_<id>.
+#
+# IMMUTABLE es correcto: el resultado depende solo del texto. to_date() es STABLE
+# por los patrones que leen el locale (TM...), no se usa; make_date/extract sobre
+# date/timestamp sin zona no leen ninguna configuración. Los CASE anidados fijan
+# el orden de evaluación: make_date solo recibe año/mes/día ya acotados (nunca
+# falla) y sin EXCEPTION la función sigue siendo SQL inlineable.
+CV_FECHA_SQL = (
+    "CREATE OR REPLACE FUNCTION cv_fecha(text) RETURNS date "
+    "LANGUAGE sql IMMUTABLE PARALLEL SAFE "
+    "AS $$ SELECT CASE WHEN $1 ~ '^\\s*[0-9]{4}-[0-9]{1,2}-[0-9]{1,2}\\s*$' THEN "
+    "CASE WHEN split_part($1, '-', 1)::int >= 1 "
+    "AND split_part($1, '-', 2)::int BETWEEN 1 AND 12 "
+    "AND split_part($1, '-', 3)::int >= 1 THEN "
+    "CASE WHEN split_part($1, '-', 3)::int <= extract(day from "
+    "make_date(split_part($1, '-', 1)::int, split_part($1, '-', 2)::int, 1) "
+    "+ interval '1 month' - interval '1 day') "
+    "THEN make_date(split_part($1, '-', 1)::int, split_part($1, '-', 2)::int, split_part($1, '-', 3)::int) "
+    "END END END $$"
+)
+CV_FECHA_DDL = DDL(CV_FECHA_SQL)
+
+event.listen(Comunero.__table__, "after_create", CV_FECHA_DDL)
+
+# ✅ cast a numeric que no revienta: un valor no numérico (dato viejo, import
+# sin validar) da NULL en vez de abortar todo el filtro / el CREATE INDEX.
+# Sin excepciones ni lookups: IMMUTABLE de verdad (sirve para ix_comuneros_campo_<id>).
+CV_NUMERO_DDL = DDL(
+    "CREATE OR REPLACE FUNCTION cv_numero(text) RETURNS numeric "
+    "LANGUAGE sql IMMUTABLE PARALLEL SAFE "
+    "AS $$ SELECT CASE WHEN $1 ~ '^\\s*-?[0-9]+(\\.[0-9]+)?([eE][-+]?[0-9]{1,4})?\\s*$' "
+    "THEN $1::numeric END $$"
+)
+
+event.listen(Comunero.__table__, "after_create", CV_NUMERO_DDL)
+
+
+# ✅ versiones_tablas (ETags): bump por statement
+versionar_tabla(Comunero.__table__)
+
+# ✅ backend de auditoría "trigger" (sin efecto con el backend "orm")
+auditar_tabla(Comunero.__table__, "is_deleted", eliminado=True)
+
+
+class ComuneroArchivo(Base):
+    """
+    Comuneros eliminados (soft) hace más de ARCHIVO_DIAS, movidos fuera de la
+    tabla viva por el job de archivo. Misma forma que `comuneros` + archivado_en
+    (mismo id: los logs de auditoría siguen apuntando bien). Restaurar los
+    devuelve a `comuneros`; la exportación con include_deleted los incluye.
+    """
+
+    __tablename__ = "comuneros_archivo"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    nombre: Mapped[str] = mapped_column(String(150), nullable=False)
+    documento: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
+    datos_dinamicos: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    creado_por: Mapped[int] = mapped_column(
+        ForeignKey("usuarios.id", ondelete="RESTRICT"),
+        nullable=False,
+    )
+    is_deleted: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default=text("true"))
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    archivado_en: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        index=True,
+    )
@@ -0,0 +1,70 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import (
+    String,
+    Integer,
+    DateTime,
+    ForeignKey,
+    Text,
+    text,
+    func,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.config import Base
+
+
+class Importacion(Base):
+    """Job de importación CSV/XLSX de comuneros (estado y progreso consultables)."""
+
+    __tablename__ = "importaciones"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+
+    usuario_id: Mapped[int] = mapped_column(
+        ForeignKey("usuarios.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+
+    archivo: Mapped[str] = mapped_column(String(255), nullable=False)
+    formato: Mapped[str] = mapped_column(String(10), nullable=False)  # csv | xlsx
+
+    # pendiente -> procesando -> completado | fallido
+    estado: Mapped[str] = mapped_column(
+        String(20),
+        nullable=False,
+        server_default=text("'pendiente'"),
+        index=True,
+    )
+
+    filas_procesadas: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+    insertados: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+    errores: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+
+    # primeras N filas con error (el resto solo suma en `errores`)
+    errores_detalle: Mapped[list] = mapped_column(
+        JSONB,
+        nullable=False,
+        server_default=text("'[]'::jsonb"),
+    )
+
+    mensaje: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+    )
+    iniciado_en: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    finalizado_en: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    @property
+    def filas_por_segundo(self) -> Optional[float]:
+        if not self.iniciado_en:
+            return None
+        fin = self.finalizado_en or datetime.now(timezone.utc)
+        segundos = (fin - self.iniciado_en).total_seconds()
+        return round(self.filas_procesadas / segundos, 1) if segundos > 0 else None
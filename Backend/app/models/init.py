@@ -1,4 +1,7 @@
 from .usuario import Usuario
-from .comunero import Comunero
+from .comunero import Comunero, ComuneroArchivo
 from .campos_formulario import CampoFormulario
 from .log_auditoria import LogAuditoria
+from .version_tabla import VersionTabla
+from .importacion import Importacion
+from .trabajo import Trabajo
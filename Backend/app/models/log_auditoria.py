@@ -2,16 +2,20 @@ from datetime import datetime
 from enum import Enum
 
 from sqlalchemy import (
+    DDL,
     String,
     DateTime,
     ForeignKey,
     Index,
     Enum as SAEnum,
+    event,
+    func,
 )
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.config import Base
+from app.config import Base, settings
+from app.utils.particiones import asegurar_particiones
 
 
 class AccionEnum(str, Enum):
@@ -21,48 +25,63 @@ class AccionEnum(str, Enum):
 
 
 class LogAuditoria(Base):
+    """
+    Particionada por mes (RANGE sobre timestamp): la PK incluye timestamp
+    porque Postgres lo exige. Particiones: app.utils.particiones + el job
+    app.jobs.mantener_logs (roll-forward y retención).
+    """
+
     __tablename__ = "logs_auditoria"
 
     id: Mapped[int] = mapped_column(
         primary_key=True,
-        index=True,
+        autoincrement=True,
     )
 
     usuario_id: Mapped[int] = mapped_column(
         ForeignKey("usuarios.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
 
     accion: Mapped[AccionEnum] = mapped_column(
         SAEnum(AccionEnum, name="accion_enum"),
         nullable=False,
-        index=True,
     )
 
     entidad: Mapped[str] = mapped_column(
         String(100),
         nullable=False,
-        index=True,
     )
 
     entidad_id: Mapped[int] = mapped_column(
         nullable=False,
-        index=True,
     )
 
+    # versión de la entidad (1, 2, 3... por entidad + entidad_id)
+    version: Mapped[int] = mapped_column(
+        nullable=False,
+    )
+
+    # modo "diff": solo en checkpoints (datos_nuevos) o vacíos; ver log_crud
     datos_anteriores: Mapped[dict | None] = mapped_column(
-        JSONB,
+        JSONB(none_as_null=True),
         nullable=True,
     )
 
     datos_nuevos: Mapped[dict | None] = mapped_column(
-        JSONB,
+        JSONB(none_as_null=True),
+        nullable=True,
+    )
+
+    # {ruta: {"de": viejo, "a": nuevo}} de lo que cambió (EDITAR/ELIMINAR)
+    cambios: Mapped[dict | None] = mapped_column(
+        JSONB(none_as_null=True),
         nullable=True,
     )
 
     timestamp: Mapped[datetime] = mapped_column(
         DateTime,
+        primary_key=True,
         default=datetime.utcnow,
         nullable=False,
         index=True,
@@ -71,11 +90,175 @@ class LogAuditoria(Base):
     # Relación ORM
     usuario = relationship("Usuario")
 
-    # Índice compuesto para búsquedas rápidas por entidad
+    # Índice compuesto para búsquedas rápidas por entidad (+ versión: reconstrucción)
     __table_args__ = (
         Index(
-            "ix_logs_entidad_entidad_id",
+            "ix_logs_entidad_entidad_id_version",
             "entidad",
             "entidad_id",
+            "version",
         ),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
     )
+
+
+# keyset de /logs (timestamp DESC, id DESC) por usuario y por registro: cada página es un rango de índice
+Index(
+    "ix_logs_usuario_ts_id",
+    LogAuditoria.usuario_id,
+    LogAuditoria.timestamp.desc(),
+    LogAuditoria.id.desc(),
+)
+Index(
+    "ix_logs_entidad_ts_id",
+    LogAuditoria.entidad,
+    LogAuditoria.entidad_id,
+    LogAuditoria.timestamp.desc(),
+    LogAuditoria.id.desc(),
+)
+
+# ✅ búsqueda por campo cambiado (GET /logs/cambios):
+# - ruta + valor: `cambios @> {ruta: {"a": v}}` (jsonb_path_ops: hash de ruta+valor, exacto)
+# - solo ruta: cv_claves(cambios) @> ARRAY[ruta] (jsonb_path_ops no sirve para `?`)
+CV_CLAVES_DDL = DDL(
+    "CREATE OR REPLACE FUNCTION cv_claves(jsonb) RETURNS text[] "
+    "LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE "
+    "AS $$ SELECT array(SELECT jsonb_object_keys($1)) $$"
+)
+
+# before_create: el índice de expresión se crea junto con la tabla
+event.listen(LogAuditoria.__table__, "before_create", CV_CLAVES_DDL)
+
+Index(
+    "ix_logs_cambios_gin",
+    LogAuditoria.cambios,
+    postgresql_using="gin",
+    postgresql_ops={"cambios": "jsonb_path_ops"},
+)
+Index(
+    "ix_logs_cambios_claves_gin",
+    func.cv_claves(LogAuditoria.cambios),
+    postgresql_using="gin",
+)
+
+
+@event.listens_for(LogAuditoria.__table__, "after_create")
+def _crear_particiones(target, connection, **kw):
+    # create_all / tests: sin particiones ningún INSERT entra
+    asegurar_particiones(connection, target.name, "timestamp", settings.LOGS_PARTICIONES_ADELANTE)
+
+
+# ===============================
+# Backend de auditoría "trigger" (AUDITORIA_BACKEND, ver log_crud)
+# ===============================
+# Triggers FOR EACH STATEMENT con tablas de transición: un INSERT en
+# logs_auditoria por sentencia, aunque toque miles de filas (también los
+# UPDATE masivos que el CRUD no audita). Solo auditan si la transacción trae
+# `app.usuario_id` (set_config(..., true) = SET LOCAL): con el backend "orm"
+# la app nunca lo fija y el trigger sale sin hacer nada.
+CV_SNAP_DDL = DDL(
+    "CREATE OR REPLACE FUNCTION cv_snap(tabla text, fila jsonb) RETURNS jsonb "
+    "LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$ "
+    "SELECT CASE tabla "
+    "WHEN 'usuarios' THEN (fila - 'hashed_password') || jsonb_build_object('rol', lower(fila->>'rol')) "
+    "ELSE fila END "
+    "$$"
+)
+
+# mismo formato que log_crud.diff_snapshots: {ruta: {"de": viejo, "a": nuevo}}
+CV_DIFF_JSONB_DDL = DDL(
+    "CREATE OR REPLACE FUNCTION cv_diff_jsonb(antes jsonb, despues jsonb) RETURNS jsonb "
+    "LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$ "
+    "WITH claves AS ("
+    " SELECT k FROM jsonb_object_keys(antes) AS k UNION SELECT k FROM jsonb_object_keys(despues) AS k"
+    "), objetos AS ("
+    " SELECT k, jsonb_typeof(antes->k) = 'object' AND jsonb_typeof(despues->k) = 'object' AS anidado FROM claves"
+    "), rutas AS ("
+    " SELECT k AS ruta, antes->k AS v0, despues->k AS v1, antes ? k AS h0, despues ? k AS h1"
+    " FROM objetos WHERE NOT anidado"
+    " UNION ALL"
+    " SELECT o.k || '.' || s, antes->o.k->s, despues->o.k->s, (antes->o.k) ? s, (despues->o.k) ? s"
+    " FROM objetos o CROSS JOIN LATERAL ("
+    "  SELECT jsonb_object_keys(CASE WHEN o.anidado THEN antes->o.k ELSE '{}' END) AS s"
+    "  UNION SELECT jsonb_object_keys(CASE WHEN o.anidado THEN despues->o.k ELSE '{}' END)"
+    " ) sub"
+    ") "
+    "SELECT coalesce(jsonb_object_agg(ruta,"
+    " CASE WHEN h0 THEN jsonb_build_object('de', v0) ELSE '{}' END"
+    " || CASE WHEN h1 THEN jsonb_build_object('a', v1) ELSE '{}' END), '{}') "
+    "FROM rutas WHERE h0 IS DISTINCT FROM h1 OR v0 IS DISTINCT FROM v1 "
+    "$$"
+)
+
+# TG_ARGV: (columna de baja lógica, valor que significa "eliminado") -> ELIMINAR
+CV_AUDITAR_DDL = DDL(
+    "CREATE OR REPLACE FUNCTION cv_auditar() RETURNS trigger "
+    "LANGUAGE plpgsql AS $$ "
+    "DECLARE "
+    " usuario integer := nullif(current_setting('app.usuario_id', true), '')::integer; "
+    " modo text := coalesce(nullif(current_setting('app.auditoria_modo', true), ''), 'completo'); "
+    " cada integer := greatest(coalesce(nullif(current_setting('app.auditoria_checkpoint', true), '')::integer, 20), 1); "
+    " marca text := TG_ARGV[0]; "
+    " eliminado boolean := TG_ARGV[1]::boolean; "
+    " filas_id integer[]; "
+    " filas_antes jsonb[]; "
+    " filas_despues jsonb[]; "
+    "BEGIN "
+    " IF usuario IS NULL OR current_setting('app.auditar', true) = 'off' THEN RETURN NULL; END IF; "
+    " IF TG_OP = 'INSERT' THEN "
+    "  SELECT array_agg(n.id), array_agg(NULL::jsonb), array_agg(to_jsonb(n)) "
+    "  INTO filas_id, filas_antes, filas_despues FROM nuevas n; "
+    " ELSIF TG_OP = 'UPDATE' THEN "
+    "  SELECT array_agg(n.id), array_agg(to_jsonb(v)), array_agg(to_jsonb(n)) "
+    "  INTO filas_id, filas_antes, filas_despues FROM nuevas n JOIN viejas v ON v.id = n.id; "
+    " ELSE "
+    "  SELECT array_agg(v.id), array_agg(to_jsonb(v)), array_agg(NULL::jsonb) "
+    "  INTO filas_id, filas_antes, filas_despues FROM viejas v; "
+    " END IF; "
+    " IF filas_id IS NULL THEN RETURN NULL; END IF; "
+    # mismo lock por registro que log_crud.registrar_log: versiones sin carreras
+    " PERFORM pg_advisory_xact_lock(hashtext(TG_TABLE_NAME), i) FROM unnest(filas_id) AS i ORDER BY i; "
+    " INSERT INTO logs_auditoria (usuario_id, accion, entidad, entidad_id, version,"
+    "  datos_anteriores, datos_nuevos, cambios, \"timestamp\") "
+    " SELECT usuario, "
+    "  (CASE WHEN f.antes IS NULL THEN 'CREAR' WHEN f.despues IS NULL THEN 'ELIMINAR' "
+    "   WHEN (f.despues->>marca)::boolean = eliminado AND (f.antes->>marca)::boolean <> eliminado THEN 'ELIMINAR' "
+    "   ELSE 'EDITAR' END)::accion_enum, "
+    "  TG_TABLE_NAME, f.id, f.version, "
+    "  CASE WHEN f.solo_diff THEN NULL ELSE f.antes END, "
+    "  CASE WHEN f.solo_diff AND mod(f.version - 1, cada) <> 0 THEN NULL ELSE f.despues END, "
+    "  CASE WHEN f.antes IS NOT NULL AND f.despues IS NOT NULL THEN cv_diff_jsonb(f.antes, f.despues) END, "
+    "  timezone('utc', clock_timestamp()) "
+    " FROM ("
+    "  SELECT t.id, t.antes, t.despues, "
+    "   modo = 'diff' AND t.antes IS NOT NULL AND t.despues IS NOT NULL AS solo_diff, "
+    "   coalesce((SELECT max(l.version) FROM logs_auditoria l "
+    "             WHERE l.entidad = TG_TABLE_NAME AND l.entidad_id = t.id), 0) + 1 AS version "
+    "  FROM unnest(filas_id, filas_antes, filas_despues) AS u(id, a, d) "
+    "  CROSS JOIN LATERAL (SELECT u.id, cv_snap(TG_TABLE_NAME, u.a) AS antes, cv_snap(TG_TABLE_NAME, u.d) AS despues) t"
+    " ) f "
+    " WHERE f.antes IS DISTINCT FROM f.despues; "
+    " RETURN NULL; "
+    "END $$"
+)
+
+
+def auditar_tabla(table, marca: str, eliminado: bool) -> None:
+    """Engancha los triggers de auditoría a `table` cuando se crea (create_all / tests)."""
+    for ddl in (CV_SNAP_DDL, CV_DIFF_JSONB_DDL, CV_AUDITAR_DDL):
+        event.listen(table, "after_create", ddl)
+    argumentos = f"'{marca}', '{str(eliminado).lower()}'"
+    for evento, sufijo, transicion in (
+        ("INSERT", "ins", "NEW TABLE AS nuevas"),
+        ("UPDATE", "upd", "OLD TABLE AS viejas NEW TABLE AS nuevas"),
+        ("DELETE", "del", "OLD TABLE AS viejas"),
+    ):
+        event.listen(
+            table,
+            "after_create",
+            DDL(
+                f"CREATE TRIGGER trg_%(table)s_auditoria_{sufijo} "
+                f"AFTER {evento} ON %(table)s REFERENCING {transicion} "
+                f"FOR EACH STATEMENT EXECUTE FUNCTION cv_auditar({argumentos})"
+            ),
+        )
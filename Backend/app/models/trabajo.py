@@ -0,0 +1,72 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import (
+    String,
+    Integer,
+    DateTime,
+    ForeignKey,
+    Text,
+    text,
+    func,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.config import Base
+
+
+class Trabajo(Base):
+    """
+    Job en background genérico (operaciones masivas, backfills, ...).
+    `tipo` dice qué hace; `parametros` con qué; el progreso se commitea por chunk.
+    """
+
+    __tablename__ = "trabajos"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+
+    tipo: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
+
+    usuario_id: Mapped[int] = mapped_column(
+        ForeignKey("usuarios.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+
+    # pendiente -> procesando -> completado | fallido
+    estado: Mapped[str] = mapped_column(
+        String(20),
+        nullable=False,
+        server_default=text("'pendiente'"),
+        index=True,
+    )
+
+    parametros: Mapped[dict] = mapped_column(
+        JSONB,
+        nullable=False,
+        server_default=text("'{}'::jsonb"),
+    )
+
+    total: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # si se conoce de antemano
+    procesados: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+    afectados: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+
+    resultado: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
+    mensaje: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+    )
+    iniciado_en: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    finalizado_en: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    @property
+    def filas_por_segundo(self) -> Optional[float]:
+        if not self.iniciado_en:
+            return None
+        fin = self.finalizado_en or datetime.now(timezone.utc)
+        segundos = (fin - self.iniciado_en).total_seconds()
+        return round(self.procesados / segundos, 1) if segundos > 0 else None
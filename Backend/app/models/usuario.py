@@ -10,6 +10,8 @@ from sqlalchemy import (
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.config import Base
+from app.models.log_auditoria import auditar_tabla
+from app.models.version_tabla import versionar_tabla
 
 
 # =========================
@@ -97,3 +99,10 @@ class Usuario(Base):
         back_populates="usuario",
         cascade="all, delete-orphan",
     )
+
+
+# ✅ versiones_tablas (ETags): bump por statement
+versionar_tabla(Usuario.__table__)
+
+# ✅ backend de auditoría "trigger" (sin efecto con el backend "orm")
+auditar_tabla(Usuario.__table__, "activo", eliminado=False)
@@ -0,0 +1,59 @@
+from sqlalchemy import BigInteger, DDL, SmallInteger, String, event
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.config import Base
+
+
+class VersionTabla(Base):
+    """
+    Marcador de cambios por tabla (para ETags).
+    Lo incrementa un trigger FOR EACH STATEMENT: 1 bump por INSERT/UPDATE/DELETE,
+    aunque toque miles de filas. Es transaccional: nadie ve la versión nueva
+    antes del commit que la generó.
+
+    Contador repartido en SHARDS filas por tabla (shard = backend % SHARDS):
+    con una sola fila, todos los que escriben la misma tabla hacían cola en
+    su lock hasta el commit. La versión de la tabla es la SUMA de sus filas
+    (cada commit la sube, así que nunca se repite). Una secuencia no sirve:
+    nextval se ve antes del commit y la ETag nueva podría servir datos viejos.
+    """
+
+    __tablename__ = "versiones_tablas"
+
+    tabla: Mapped[str] = mapped_column(String(100), primary_key=True)
+
+    shard: Mapped[int] = mapped_column(SmallInteger, primary_key=True, default=0)
+
+    version: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+        default=0,
+    )
+
+
+SHARDS = 64
+
+CV_BUMP_VERSION_DDL = DDL(
+    "CREATE OR REPLACE FUNCTION cv_bump_version() RETURNS trigger "
+    "LANGUAGE plpgsql AS $$ "
+    "BEGIN "
+    "INSERT INTO versiones_tablas (tabla, shard, version) "
+    f"VALUES (TG_TABLE_NAME, mod(pg_backend_pid(), {SHARDS}), 1) "
+    "ON CONFLICT (tabla, shard) DO UPDATE SET version = versiones_tablas.version + 1; "
+    "RETURN NULL; "
+    "END $$"
+)
+
+
+def versionar_tabla(table) -> None:
+    """Engancha el trigger de versión a `table` cuando se crea (create_all / tests)."""
+    event.listen(table, "after_create", CV_BUMP_VERSION_DDL)
+    event.listen(
+        table,
+        "after_create",
+        DDL(
+            "CREATE TRIGGER trg_%(table)s_version "
+            "AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %(table)s "
+            "FOR EACH STATEMENT EXECUTE FUNCTION cv_bump_version()"
+        ),
+    )
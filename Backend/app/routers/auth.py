@@ -1,12 +1,15 @@
 from datetime import datetime, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.config import settings, get_db
+from app.config import settings, get_async_db, get_db
 from app.models.usuario import Usuario, RolEnum
+from app.crud.log_crud import auditar_como
 from app.crud.usuario_crud import obtener_usuario_por_email
 from app.utils.security import verify_password
 
@@ -39,12 +42,12 @@ def create_access_token(data: dict, expires_minutes: int | None = None) -> str:
 # LOGIN
 # ===============================
 @router.post("/login")
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     # OAuth2PasswordRequestForm usa "username" como campo, aquí lo usamos como email
-    usuario = obtener_usuario_por_email(db, form_data.username)
+    usuario = await db.run_sync(obtener_usuario_por_email, form_data.username)
 
     if not usuario or not usuario.activo:
         raise HTTPException(
@@ -52,7 +55,8 @@ def login(
             detail="Credenciales inválidas",
         )
 
-    if not verify_password(form_data.password, usuario.hashed_password):
+    # bcrypt es CPU puro (~100ms): fuera del event loop
+    if not await run_in_threadpool(verify_password, form_data.password, usuario.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Credenciales inválidas",
@@ -71,16 +75,15 @@ def login(
 # ===============================
 # CURRENT USER
 # ===============================
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> Usuario:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No autorizado",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def _user_id_de_token(token: str) -> int:
     try:
         payload = jwt.decode(
             token,
@@ -89,13 +92,33 @@ def get_current_user(
         )
         user_id = payload.get("sub")
         if not user_id:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+            raise _credentials_exception()
+        return int(user_id)
+    except (JWTError, ValueError):
+        raise _credentials_exception()
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+) -> Usuario:
+    usuario = db.get(Usuario, _user_id_de_token(token))
+    if not usuario or not usuario.activo:
+        raise _credentials_exception()
 
-    usuario = db.get(Usuario, int(user_id))
+    # ✅ backend de auditoría "trigger": las escrituras de esta request quedan a su nombre
+    auditar_como(db, usuario.id)
+    return usuario
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> Usuario:
+    """Igual que get_current_user, para endpoints `async def` (no ocupa threadpool)."""
+    usuario = await db.get(Usuario, _user_id_de_token(token))
     if not usuario or not usuario.activo:
-        raise credentials_exception
+        raise _credentials_exception()
 
     return usuario
 
@@ -104,7 +127,7 @@ def get_current_user(
 # ME (TEST ACCESS)
 # ===============================
 @router.get("/me")
-def me(usuario: Usuario = Depends(get_current_user)):
+async def me(usuario: Usuario = Depends(get_current_user_async)):
     return {
         "ok": True,
         "user_id": usuario.id,
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 
 from app.config import get_db
 from app.models.campos_formulario import CampoFormulario
 from app.schemas.campos_formulario_schema import (
+    CampoConformidadRequest,
     CampoFormularioCreate,
     CampoFormularioUpdate,
     CampoFormularioResponse,
@@ -14,6 +15,11 @@ from app.crud.campos_crud import (
     actualizar_campo,
     eliminar_campo,
 )
+from app.crud.conformidad_crud import ejecutar_conformidad, firma_conformidad, validar_correccion
+from app.crud.trabajos_crud import crear_trabajo
+from app.schemas.trabajo_schema import TrabajoResponse
+from app.utils.etag import cabeceras_etag, etag_tablas, no_modificado
+from app.utils.indices_campos import firma_indice, sincronizar_indice_campo
 
 # ✅ Mantén tu auth actual (no rompemos nada)
 from app.routers.auth import get_current_user, require_admin
@@ -22,11 +28,35 @@ from app.models.usuario import Usuario, RolEnum
 router = APIRouter(prefix="/campos", tags=["Campos Formulario"])
 
 
+def _programar_indice(background_tasks: BackgroundTasks, db: Session, campo_id: int) -> None:
+    # CREATE INDEX CONCURRENTLY espera a toda transacción abierta más vieja, incluida
+    # la de esta sesión (db.refresh abre una) -> la soltamos antes de la tarea.
+    db.close()
+    background_tasks.add_task(sincronizar_indice_campo, db.get_bind(), campo_id)
+
+
+def _programar_conformidad(
+    background_tasks: BackgroundTasks,
+    db: Session,
+    campo: CampoFormulario,
+    admin: Usuario,
+    opciones: CampoConformidadRequest,
+):
+    """Trabajo de conformidad (reporte y, si se pide, corrección) sobre los comuneros vivos."""
+    parametros = {"campo_id": campo.id, **opciones.model_dump()}
+    trabajo = crear_trabajo(db, "conformidad_campo", admin.id, parametros)
+    # el job solo lee/actualiza comuneros en su propia sesión: no hace falta soltar esta
+    background_tasks.add_task(ejecutar_conformidad, db.get_bind(), trabajo.id, **parametros)
+    return trabajo
+
+
 # ===============================
 # LISTAR (ADMIN y OPERADOR)
 # ===============================
 @router.get("", response_model=list[CampoFormularioResponse])
 def get_campos(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user),
 ):
@@ -37,6 +67,12 @@ def get_campos(
             detail="No tienes permisos para esta acción",
         )
 
+    # ✅ El form pide /campos en cada render: 304 mientras no cambien
+    etag = etag_tablas(db, ("campos_formulario",))
+    if (no_mod := no_modificado(request, etag)) is not None:
+        return no_mod
+
+    response.headers.update(cabeceras_etag(etag))
     return listar_campos(db)
 
 
@@ -46,10 +82,17 @@ def get_campos(
 @router.post("", response_model=CampoFormularioResponse, status_code=status.HTTP_201_CREATED)
 def create_campo(
     payload: CampoFormularioCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     admin: Usuario = Depends(require_admin),
 ):
-    return crear_campo(db, payload, admin)
+    campo = crear_campo(db, payload, admin)
+
+    # ✅ índice por campo (CONCURRENTLY) fuera del request
+    if firma_indice(campo) is not None:
+        _programar_indice(background_tasks, db, campo.id)
+
+    return campo
 
 
 # ===============================
@@ -59,6 +102,8 @@ def create_campo(
 def update_campo(
     campo_id: int,
     payload: CampoFormularioUpdate,
+    background_tasks: BackgroundTasks,
+    response: Response,
     db: Session = Depends(get_db),
     admin: Usuario = Depends(require_admin),
 ):
@@ -66,7 +111,47 @@ def update_campo(
     if not campo:
         raise HTTPException(status_code=404, detail="Campo no encontrado")
 
-    return actualizar_campo(db, campo, payload, admin)
+    firma_antes = firma_indice(campo)
+    conformidad_antes = firma_conformidad(campo)
+    campo = actualizar_campo(db, campo, payload, admin)
+
+    # obligatorio/opciones/tipo/... cambiaron -> revisar que los comuneros sigan cumpliendo
+    # (solo reporte; corregir = POST /campos/{id}/conformidad con aplicar=true)
+    if campo.activo and firma_conformidad(campo) != conformidad_antes:
+        trabajo = _programar_conformidad(background_tasks, db, campo, admin, CampoConformidadRequest())
+        response.headers["X-Trabajo-Id"] = str(trabajo.id)
+
+    # indexado/activo/nombre/tipo cambiaron -> crear, reconstruir o borrar índice
+    if firma_indice(campo) != firma_antes:
+        _programar_indice(background_tasks, db, campo.id)
+
+    return campo
+
+
+# ===============================
+# CONFORMIDAD (solo ADMIN): reporte + backfill/remapeo opcional
+# ===============================
+@router.post(
+    "/{campo_id}/conformidad",
+    response_model=TrabajoResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def conformidad_campo(
+    campo_id: int,
+    payload: CampoConformidadRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    admin: Usuario = Depends(require_admin),
+):
+    campo = db.get(CampoFormulario, campo_id)
+    if not campo or not campo.activo:
+        raise HTTPException(status_code=404, detail="Campo no encontrado")
+
+    # default/remapeo inválidos -> 400 ya, no al final del job
+    validar_correccion(campo, payload.default, payload.remapeo)
+
+    # progreso: GET /trabajos/{id}
+    return _programar_conformidad(background_tasks, db, campo, admin, payload)
 
 
 # ===============================
@@ -75,6 +160,7 @@ def update_campo(
 @router.delete("/{campo_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_campo(
     campo_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     admin: Usuario = Depends(require_admin),
 ):
@@ -82,5 +168,11 @@ def delete_campo(
     if not campo:
         raise HTTPException(status_code=404, detail="Campo no encontrado")
 
+    tenia_indice = firma_indice(campo) is not None
     eliminar_campo(db, campo, admin)
+
+    # campo desactivado -> su índice ya no sirve
+    if tenia_indice:
+        _programar_indice(background_tasks, db, campo.id)
+
     return None
\ No newline at end of file
@@ -2,25 +2,46 @@
 from __future__ import annotations
 
 import json
-from typing import Any, Dict, Optional
+from typing import Any, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.config import get_db
+from app.config import get_async_read_db, get_db, get_read_db, settings
 from app.models.comunero import Comunero
 from app.schemas.comunero_schema import (
     ComuneroCreate,
     ComuneroUpdate,
+    ComuneroPatch,
+    ComuneroUpsert,
     ComuneroResponse,
+    ComuneroBulkResponse,
+    ComuneroValidacionResponse,
 )
 from app.crud.comunero_crud import (
     crear_comunero,
-    listar_comuneros,
+    crear_comuneros_bulk,
+    listar_comuneros_filas,
+    listar_comuneros_proyectado,
+    contar_comuneros,
+    cursor_comunero,
+    buscar_comuneros,
+    cursor_busqueda,
     actualizar_comunero,
+    parchear_comunero,
+    upsert_comunero,
+    validar_lote_comuneros,
+    ejecutar_cambio_estado_masivo,
     eliminar_comunero,
 )
-from app.routers.auth import get_current_user
+from app.crud.archivo_crud import ejecutar_archivo
+from app.crud.trabajos_crud import crear_trabajo
+from app.routers.auth import get_current_user, get_current_user_async, require_admin
+from app.schemas.trabajo_schema import ComuneroSeleccion, TrabajoResponse
+from app.utils.etag import cabeceras_etag, etag_tablas, no_modificado
+from app.utils.filtros import condiciones_dinamicas, parse_filtros_json
+from app.utils.serializacion import RespuestaJSON, filas_a_dicts
 from app.models.usuario import Usuario, RolEnum
 
 router = APIRouter(prefix="/comuneros", tags=["Comuneros"])
@@ -39,44 +60,257 @@ def create_comunero(
     return crear_comunero(db, payload, current_user)
 
 
+# ===============================
+# BULK CREATE (JSON array o NDJSON)
+# ===============================
+def _tope_bulk(n: int, tope: int) -> None:
+    if n > tope:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Máximo {tope} registros por lote",
+        )
+
+
+async def _leer_registros(request: Request, tope: int) -> list[Any]:
+    """
+    - application/x-ndjson (o application/jsonl): un objeto por línea, leído en streaming.
+      Una línea con JSON inválido queda como registro inválido (error por fila).
+    - resto: array JSON.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    if content_type in {"application/x-ndjson", "application/ndjson", "application/jsonl"}:
+        registros: list[Any] = []
+        pendiente = b""
+
+        def _agregar(linea: bytes) -> None:
+            if not linea.strip():
+                return
+            try:
+                registros.append(json.loads(linea))
+            except ValueError:
+                registros.append(None)
+            _tope_bulk(len(registros), tope)
+
+        async for chunk in request.stream():
+            pendiente += chunk
+            *lineas, pendiente = pendiente.split(b"\n")
+            for linea in lineas:
+                _agregar(linea)
+        _agregar(pendiente)
+        return registros
+
+    try:
+        registros = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="El cuerpo debe ser un array JSON o NDJSON",
+        )
+    if not isinstance(registros, list):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="El cuerpo debe ser un array JSON o NDJSON",
+        )
+    _tope_bulk(len(registros), tope)
+    return registros
+
+
+async def _leer_registros_bulk(request: Request) -> list[Any]:
+    return await _leer_registros(request, settings.BULK_MAX_REGISTROS)
+
+
+@router.post("/bulk", response_model=ComuneroBulkResponse)
+def bulk_create_comuneros(
+    response: Response,
+    modo: Literal["parcial", "atomico"] = Query(
+        "parcial",
+        description="parcial: inserta lo válido y reporta el resto | atomico: todo o nada",
+    ),
+    si_existe: Literal["error", "actualizar"] = Query(
+        "error",
+        description="Documento ya registrado: error (DOCUMENTO_DUPLICADO) o actualizar (upsert)",
+    ),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user),
+    # después de auth: no leemos cuerpos grandes de requests sin token
+    registros: list[Any] = Depends(_leer_registros_bulk),
+):
+    # admin y operador pueden crear (igual que POST /comuneros)
+    resultado = crear_comuneros_bulk(
+        db,
+        registros,
+        current_user,
+        atomico=(modo == "atomico"),
+        actualizar=(si_existe == "actualizar"),
+    )
+
+    # atómico fallido: nada se escribió
+    if modo == "atomico" and resultado["errores"]:
+        response.status_code = status.HTTP_400_BAD_REQUEST
+    return resultado
+
+
+# ===============================
+# VALIDATE (dry-run del bulk: todos los errores, nada se escribe)
+# ===============================
+async def _leer_registros_validacion(request: Request) -> list[Any]:
+    return await _leer_registros(request, settings.VALIDACION_MAX_REGISTROS)
+
+
+@router.post("/validate", response_model=ComuneroValidacionResponse)
+def validate_comuneros(
+    si_existe: Literal["error", "actualizar"] = Query(
+        "error",
+        description="Igual que /bulk: con actualizar, un documento ya registrado no es error",
+    ),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user),
+    registros: list[Any] = Depends(_leer_registros_validacion),
+):
+    # mismo cuerpo que /bulk (array JSON o NDJSON); miles de filas con error -> orjson directo
+    return RespuestaJSON(content=validar_lote_comuneros(db, registros, actualizar=(si_existe == "actualizar")))
+
+
 # ===============================
 # LIST + FILTERS + PAGINATION
 # ===============================
 @router.get("", response_model=list[ComuneroResponse])
-def list_comuneros(
+async def list_comuneros(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=200),
+    cursor: Optional[str] = Query(
+        None,
+        description="Cursor opaco (header X-Next-Cursor de la página anterior). Si viene, se ignora skip.",
+    ),
     # ✅ Swagger-friendly: recibe JSON como string y lo parseamos a dict
     filtros_and: Optional[str] = Query(
         None,
-        description='JSON string. Ej: {"zona":"A","sexo":"M"}',
+        description='JSON string. Ej: {"zona":"A","edad":{"between":[18,30]},"nombre_madre":{"prefix":"Mar"}}',
     ),
     filtros_or: Optional[str] = Query(
         None,
         description='JSON string. Ej: {"estado":["activo","pendiente"]}',
     ),
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user),
+    fields: Optional[str] = Query(
+        None,
+        description="Sparse fieldset. Ej: id,nombre,documento,datos.zona (solo esas columnas/rutas JSON)",
+    ),
+    total: Literal["approx", "exact", "none"] = Query(
+        "approx",
+        description="X-Total-Count: approx (estimación del planner, gratis), exact (COUNT cacheado) o none",
+    ),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Usuario = Depends(get_current_user_async),
 ):
     # admin y operador pueden listar
+    filtros_and_dict, filtros_or_dict = parse_filtros_json(filtros_and, filtros_or)
 
-    try:
-        filtros_and_dict: Optional[Dict[str, Any]] = json.loads(filtros_and) if filtros_and else None
-        filtros_or_dict: Optional[Dict[str, Any]] = json.loads(filtros_or) if filtros_or else None
-    except json.JSONDecodeError:
-        raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail="filtros_and/filtros_or deben ser JSON válido",
+    # CRUD sync sobre la conexión async (greenlet): sin worker del threadpool
+    return await db.run_sync(
+        _listar_comuneros_sync,
+        request,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        filtros_and_dict=filtros_and_dict,
+        filtros_or_dict=filtros_or_dict,
+        fields=fields,
+        total=total,
+    )
+
+
+def _listar_comuneros_sync(
+    db: Session,
+    request: Request,
+    *,
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+    filtros_and_dict: Optional[dict],
+    filtros_or_dict: Optional[dict],
+    fields: Optional[str],
+    total: str,
+):
+    # ✅ Conditional GET: si nada cambió en comuneros/campos, 304 sin query principal
+    etag = etag_tablas(db, ("comuneros", "campos_formulario"), sorted(request.query_params.multi_items()))
+    if (no_mod := no_modificado(request, etag)) is not None:
+        return no_mod
+
+    if fields:
+        items, ultimo = listar_comuneros_proyectado(
+            db=db,
+            fields=fields,
+            skip=skip,
+            limit=limit,
+            filtros_and=filtros_and_dict,
+            filtros_or=filtros_or_dict,
+            cursor=cursor,
+        )
+    else:
+        # camino rápido: filas Core -> dicts -> orjson (sin ORM ni ComuneroResponse)
+        rows = listar_comuneros_filas(
+            db=db,
+            skip=skip,
+            limit=limit,
+            filtros_and=filtros_and_dict,
+            filtros_or=filtros_or_dict,
+            cursor=cursor,
         )
+        items = filas_a_dicts(rows)
+        ultimo = rows[-1] if rows else None
+
+    headers = cabeceras_etag(etag)
+
+    # ✅ Página llena -> puede haber más: devolvemos el cursor de la siguiente
+    if len(items) == limit:
+        headers["X-Next-Cursor"] = cursor_comunero(ultimo)
+
+    if total != "none":
+        headers["X-Total-Count"] = str(
+            contar_comuneros(db, filtros_and_dict, filtros_or_dict, exacto=(total == "exact"))
+        )
+        headers["X-Total-Count-Type"] = total
+
+    # response_model=ComuneroResponse queda solo para OpenAPI: las columnas del
+    # SELECT son exactamente las de ComuneroResponse (o el subset de `fields`)
+    return RespuestaJSON(content=items, headers=headers)
 
-    return listar_comuneros(
+
+# ===============================
+# SEARCH (fuzzy, pg_trgm)
+# ===============================
+@router.get("/search", response_model=list[ComuneroResponse])
+def search_comuneros(
+    response: Response,
+    q: str = Query(..., min_length=3, max_length=150, description="Nombre o documento (parcial o con errores)"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Cursor opaco (header X-Next-Cursor)"),
+    filtros_and: Optional[str] = Query(None, description='JSON string. Ej: {"zona":"A"}'),
+    filtros_or: Optional[str] = Query(None, description='JSON string. Ej: {"estado":["activo","pendiente"]}'),
+    db: Session = Depends(get_read_db),
+    current_user: Usuario = Depends(get_current_user),
+):
+    # admin y operador pueden buscar
+    filtros_and_dict, filtros_or_dict = parse_filtros_json(filtros_and, filtros_or)
+
+    rows = buscar_comuneros(
         db=db,
-        skip=skip,
+        q=q.strip(),
         limit=limit,
+        cursor=cursor,
         filtros_and=filtros_and_dict,
         filtros_or=filtros_or_dict,
     )
 
+    if len(rows) == limit:
+        ultimo, score = rows[-1]
+        response.headers["X-Next-Cursor"] = cursor_busqueda(ultimo, score)
+
+    # ya vienen ordenados por similitud
+    return [c for c, _ in rows]
+
 
 # ===============================
 # UPDATE
@@ -118,6 +352,41 @@ def update_comunero(
     return actualizar_comunero(db, comunero, payload_full, current_user)
 
 
+# ===============================
+# UPSERT por documento
+# ===============================
+@router.put("/by-documento/{documento}", response_model=ComuneroResponse)
+def upsert_comunero_por_documento(
+    documento: str,
+    payload: ComuneroUpsert,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user),
+):
+    # admin y operador pueden crear/editar
+    comunero, accion = upsert_comunero(db, documento, payload, current_user)
+    if accion == "CREAR":
+        response.status_code = status.HTTP_201_CREATED
+    return comunero
+
+
+# ===============================
+# PATCH (merge patch, sin load-modify-write)
+# ===============================
+@router.patch("/{comunero_id}", response_model=ComuneroResponse)
+def patch_comunero(
+    comunero_id: int,
+    payload: ComuneroPatch,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user),
+):
+    # admin y operador pueden editar
+    comunero = parchear_comunero(db, comunero_id, payload.model_dump(exclude_unset=True), current_user)
+    if comunero is None:
+        raise HTTPException(status_code=404, detail="Comunero no encontrado")
+    return comunero
+
+
 # ===============================
 # DELETE (SOFT)
 # ===============================
@@ -137,4 +406,71 @@ def delete_comunero(
         raise HTTPException(status_code=403, detail="Solo administradores pueden eliminar")
 
     eliminar_comunero(db, comunero, current_user)
-    return None
\ No newline at end of file
+    return None
+
+
+# ===============================
+# DELETE / RESTORE MASIVO (job en background)
+# ===============================
+def _programar_cambio_estado(
+    bg: BackgroundTasks, db: Session, usuario: Usuario, seleccion: ComuneroSeleccion, eliminar: bool
+):
+    # filtros inválidos -> 400 ahora, no un trabajo fallido después
+    condiciones_dinamicas(db, seleccion.filtros_and, seleccion.filtros_or)
+
+    parametros = seleccion.model_dump(exclude_none=True)
+    trabajo = crear_trabajo(db, "comuneros_eliminar" if eliminar else "comuneros_restaurar", usuario.id, parametros)
+
+    # la sesión del request no debe quedar abierta mientras corre el job
+    bind = db.get_bind()
+    db.close()
+    bg.add_task(
+        ejecutar_cambio_estado_masivo,
+        bind,
+        trabajo.id,
+        eliminar,
+        seleccion.ids,
+        seleccion.filtros_and,
+        seleccion.filtros_or,
+    )
+    return trabajo
+
+
+@router.post("/bulk/eliminar", response_model=TrabajoResponse, status_code=status.HTTP_202_ACCEPTED)
+def bulk_delete_comuneros(
+    seleccion: ComuneroSeleccion,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_admin),
+):
+    # progreso en GET /trabajos/{id}
+    return _programar_cambio_estado(background_tasks, db, current_user, seleccion, eliminar=True)
+
+
+@router.post("/bulk/restaurar", response_model=TrabajoResponse, status_code=status.HTTP_202_ACCEPTED)
+def bulk_restore_comuneros(
+    seleccion: ComuneroSeleccion,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_admin),
+):
+    return _programar_cambio_estado(background_tasks, db, current_user, seleccion, eliminar=False)
+
+
+# ===============================
+# ARCHIVO (eliminados viejos -> comuneros_archivo)
+# ===============================
+@router.post("/archivo", response_model=TrabajoResponse, status_code=status.HTTP_202_ACCEPTED)
+def archivar_comuneros(
+    background_tasks: BackgroundTasks,
+    dias: int = Query(settings.ARCHIVO_DIAS, ge=0, description="Eliminados hace más de N días"),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_admin),
+):
+    # lo normal es correrlo por cron: python -m app.jobs.archivar_comuneros
+    trabajo = crear_trabajo(db, "comuneros_archivar", current_user.id, {"dias": dias})
+
+    bind = db.get_bind()
+    db.close()
+    background_tasks.add_task(ejecutar_archivo, bind, trabajo.id, dias)
+    return trabajo
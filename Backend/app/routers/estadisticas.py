@@ -1,14 +1,19 @@
 from datetime import datetime, timedelta, date
+from typing import Optional
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy import func, select, cast, Date
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.config import get_db
+from app.config import get_async_read_db
 from app.models.comunero import Comunero
 from app.models.usuario import Usuario
 from app.models.campos_formulario import CampoFormulario
-from app.routers.auth import get_current_user
+from app.routers.auth import get_current_user_async
+from app.utils.etag import cabeceras_etag, etag_tablas, no_modificado
+from app.utils.serializacion import RespuestaJSON
+from app.utils.filtros import condiciones_dinamicas, expresion_campo, parse_filtros_json
 from app.models.usuario import Usuario as UsuarioModel  # para type clarity
 
 
@@ -16,17 +21,46 @@ router = APIRouter(prefix="/estadisticas", tags=["Estadísticas"])
 
 
 @router.get("")
-def dashboard_stats(
+async def dashboard_stats(
+    request: Request,
     campo_top: str = Query("zona", description="Campo dinámico JSONB para agrupar TOP (ej: zona, sexo, estado)"),
     days: int = Query(7, ge=1, le=90, description="Rango de días para la serie"),
-    db: Session = Depends(get_db),
-    current_user: UsuarioModel = Depends(get_current_user),
+    filtros_and: Optional[str] = Query(None, description='JSON string. Acota los conteos de comuneros. Ej: {"zona":"A"}'),
+    filtros_or: Optional[str] = Query(None, description='JSON string. Ej: {"estado":["activo","pendiente"]}'),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: UsuarioModel = Depends(get_current_user_async),
 ):
+    filtros_and_dict, filtros_or_dict = parse_filtros_json(filtros_and, filtros_or)
+    return await db.run_sync(
+        _estadisticas_sync, request, campo_top, days, filtros_and_dict, filtros_or_dict
+    )
+
+
+def _estadisticas_sync(
+    db: Session,
+    request: Request,
+    campo_top: str,
+    days: int,
+    filtros_and_dict: Optional[dict],
+    filtros_or_dict: Optional[dict],
+):
+    # ✅ Conditional GET: datos + día (la serie y "nuevos_hoy" cambian a medianoche)
+    etag = etag_tablas(
+        db,
+        ("comuneros", "usuarios", "campos_formulario"),
+        datetime.utcnow().date().isoformat(),
+        sorted(request.query_params.multi_items()),
+    )
+    if (no_mod := no_modificado(request, etag)) is not None:
+        return no_mod
+    # Mismo compilador de filtros que el listado (GIN / índices por campo)
+    filtro_comuneros = condiciones_dinamicas(db, filtros_and_dict, filtros_or_dict)
+
     # ===============================
     # Totales
     # ===============================
     total_comuneros = db.execute(
-        select(func.count()).select_from(Comunero).where(Comunero.is_deleted == False)
+        select(func.count()).select_from(Comunero).where(Comunero.is_deleted == False, *filtro_comuneros)
     ).scalar_one()
 
     total_usuarios_activos = db.execute(
@@ -46,6 +80,7 @@ def dashboard_stats(
         select(func.count()).select_from(Comunero).where(
             Comunero.is_deleted == False,
             cast(Comunero.created_at, Date) == hoy,
+            *filtro_comuneros,
         )
     ).scalar_one()
 
@@ -62,6 +97,7 @@ def dashboard_stats(
         .where(
             Comunero.is_deleted == False,
             cast(Comunero.created_at, Date) >= start_date,
+            *filtro_comuneros,
         )
         .group_by("dia")
         .order_by("dia")
@@ -77,15 +113,17 @@ def dashboard_stats(
     # ===============================
     # TOP por campo dinámico JSONB
     # ===============================
-    # Comunero.datos_dinamicos[campo].astext -> valor del JSON
+    # datos_dinamicos->>'campo' con clave literal: misma expresión que
+    # ix_comuneros_campo_<id> si el campo está marcado como indexado
     top_rows = db.execute(
         select(
-            Comunero.datos_dinamicos[campo_top].astext.label("valor"),
+            expresion_campo(campo_top, "text").label("valor"),
             func.count().label("total"),
         )
         .where(
             Comunero.is_deleted == False,
             Comunero.datos_dinamicos.has_key(campo_top),  # type: ignore[attr-defined]
+            *filtro_comuneros,
         )
         .group_by("valor")
         .order_by(func.count().desc())
@@ -94,7 +132,8 @@ def dashboard_stats(
 
     top = [{"value": (r.valor or "SIN_VALOR"), "count": int(r.total)} for r in top_rows]
 
-    return {
+    # dict ya armado: directo a orjson, sin jsonable_encoder
+    return RespuestaJSON(headers=cabeceras_etag(etag), content={
         "totales": {
             "comuneros": int(total_comuneros),
             "usuarios_activos": int(total_usuarios_activos),
@@ -106,4 +145,4 @@ def dashboard_stats(
             "campo": campo_top,
             "top5": top,
         },
-    }
\ No newline at end of file
+    })
@@ -1,11 +1,15 @@
+from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.config import get_db
+from app.config import get_async_read_db
 from app.models.usuario import Usuario, RolEnum
-from app.routers.auth import get_current_user
+from app.routers.auth import get_current_user_async
 from app.crud.exportaciones_crud import obtener_comuneros_para_exportacion
+from app.utils.filtros import parse_filtros_json
 
 import io
 import csv
@@ -15,7 +19,7 @@ from datetime import datetime
 router = APIRouter(prefix="/exportaciones", tags=["Exportaciones"])
 
 
-def require_admin(usuario: Usuario = Depends(get_current_user)) -> Usuario:
+async def require_admin(usuario: Usuario = Depends(get_current_user_async)) -> Usuario:
     if usuario.rol != RolEnum.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -25,38 +29,58 @@ def require_admin(usuario: Usuario = Depends(get_current_user)) -> Usuario:
 
 
 @router.get("/comuneros")
-def exportar_comuneros(
+async def exportar_comuneros(
     formato: str = Query("csv", pattern="^(csv|json)$"),
     include_deleted: bool = Query(False),
-    db: Session = Depends(get_db),
+    filtros_and: Optional[str] = Query(None, description='JSON string. Ej: {"zona":"A","edad":{"gte":18}}'),
+    filtros_or: Optional[str] = Query(None, description='JSON string. Ej: {"estado":["activo","pendiente"]}'),
+    db: AsyncSession = Depends(get_async_read_db),
     _: Usuario = Depends(require_admin),  # ✅ SOLO ADMIN
 ):
-    rows = obtener_comuneros_para_exportacion(db, include_deleted=include_deleted)
+    filtros_and_dict, filtros_or_dict = parse_filtros_json(filtros_and, filtros_or)
+    rows = await db.run_sync(
+        obtener_comuneros_para_exportacion,
+        include_deleted=include_deleted,
+        filtros_and=filtros_and_dict,
+        filtros_or=filtros_or_dict,
+    )
     ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
 
+    # Armar el archivo es CPU puro: al threadpool, el event loop sigue atendiendo
     if formato == "json":
-        payload = [
-            {
-                "id": r.id,
-                "nombre": r.nombre,
-                "documento": r.documento,
-                "datos_dinamicos": r.datos_dinamicos or {},
-                "creado_por": r.creado_por,
-                "is_deleted": r.is_deleted,
-                "created_at": r.created_at.isoformat() if r.created_at else None,
-                "updated_at": r.updated_at.isoformat() if r.updated_at else None,
-            }
-            for r in rows
-        ]
-        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
-
+        data = await run_in_threadpool(_serializar_json, rows)
         return StreamingResponse(
             io.BytesIO(data),
             media_type="application/json",
             headers={"Content-Disposition": f'attachment; filename="comuneros_{ts}.json"'},
         )
 
-    # CSV
+    data = await run_in_threadpool(_serializar_csv, rows)
+    return StreamingResponse(
+        io.BytesIO(data),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="comuneros_{ts}.csv"'},
+    )
+
+
+def _serializar_json(rows) -> bytes:
+    payload = [
+        {
+            "id": r.id,
+            "nombre": r.nombre,
+            "documento": r.documento,
+            "datos_dinamicos": r.datos_dinamicos or {},
+            "creado_por": r.creado_por,
+            "is_deleted": r.is_deleted,
+            "created_at": r.created_at.isoformat() if r.created_at else None,
+            "updated_at": r.updated_at.isoformat() if r.updated_at else None,
+        }
+        for r in rows
+    ]
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+def _serializar_csv(rows) -> bytes:
     output = io.StringIO()
     writer = csv.writer(output)
 
@@ -78,9 +102,4 @@ def exportar_comuneros(
             ]
         )
 
-    data = output.getvalue().encode("utf-8-sig")  # BOM para Excel
-    return StreamingResponse(
-        io.BytesIO(data),
-        media_type="text/csv",
-        headers={"Content-Disposition": f'attachment; filename="comuneros_{ts}.csv"'},
-    )
\ No newline at end of file
+    return output.getvalue().encode("utf-8-sig")  # BOM para Excel
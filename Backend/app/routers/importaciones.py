@@ -0,0 +1,81 @@
+import json
+import os
+import shutil
+import tempfile
+from typing import Literal, Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, UploadFile, status
+from sqlalchemy.orm import Session
+
+from app.config import get_db
+from app.crud.importaciones_crud import crear_importacion, ejecutar_importacion, obtener_importacion
+from app.models.usuario import Usuario
+from app.routers.auth import require_admin
+from app.schemas.importacion_schema import ImportacionResponse
+from app.utils.import_helper import CODIFICACIONES
+
+router = APIRouter(prefix="/importaciones", tags=["Importaciones"])
+
+FORMATOS = {".csv": "csv", ".xlsx": "xlsx", ".xlsm": "xlsx"}
+
+
+# ===============================
+# CREATE (sube archivo -> job en background)
+# ===============================
+@router.post("/comuneros", response_model=ImportacionResponse, status_code=status.HTTP_202_ACCEPTED)
+def importar_comuneros(
+    background_tasks: BackgroundTasks,
+    archivo: UploadFile = File(..., description="CSV (, ; o tab) o XLSX; fila 1 = encabezados"),
+    mapeo: Optional[str] = Form(
+        None,
+        description='JSON opcional encabezado -> destino. Ej: {"DNI":"documento","Apellido y Nombre":"nombre","Barrio":"zona"}',
+    ),
+    codificacion: Optional[Literal[CODIFICACIONES]] = Form(
+        None,
+        description="Solo CSV. Sin indicar: UTF-8 si el archivo lo es, si no cp1252 (Excel en Windows)",
+    ),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_admin),  # ✅ SOLO ADMIN
+):
+    ext = os.path.splitext(archivo.filename or "")[1].lower()
+    formato = FORMATOS.get(ext)
+    if not formato:
+        raise HTTPException(status_code=400, detail="Formato no soportado (usa .csv o .xlsx)")
+
+    try:
+        mapeo_dict = json.loads(mapeo) if mapeo else None
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=422, detail="mapeo debe ser JSON válido")
+    if mapeo_dict is not None and not (
+        isinstance(mapeo_dict, dict) and all(isinstance(v, str) for v in mapeo_dict.values())
+    ):
+        raise HTTPException(status_code=422, detail="mapeo debe ser un objeto JSON de textos")
+
+    # ✅ Copia a disco en bloques: el UploadFile se cierra al terminar el request
+    # y el job corre después. Memoria constante sin importar el tamaño.
+    with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
+        shutil.copyfileobj(archivo.file, tmp, length=1024 * 1024)
+        path = tmp.name
+
+    job = crear_importacion(db, current_user.id, archivo.filename, formato)
+
+    # la sesión del request no debe quedar abierta mientras corre el job
+    bind = db.get_bind()
+    db.close()
+    background_tasks.add_task(ejecutar_importacion, bind, job.id, path, mapeo_dict, codificacion)
+    return job
+
+
+# ===============================
+# STATUS
+# ===============================
+@router.get("/{importacion_id}", response_model=ImportacionResponse)
+def estado_importacion(
+    importacion_id: int,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_admin),
+):
+    job = obtener_importacion(db, importacion_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Importación no encontrada")
+    return job
@@ -1,47 +1,174 @@
+from datetime import datetime
 from typing import Optional
 
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
-from app.config import get_db
-from app.crud.log_crud import listar_logs
+from app.config import get_read_db
+from app.crud.log_crud import cursor_log, expandir_logs, listar_logs, obtener_log, reconstruir_version
 from app.models.usuario import Usuario
 from app.routers.auth import require_admin  # ✅ usa el require_admin central
+from app.utils.serializacion import RespuestaJSON
 
 router = APIRouter(prefix="/logs", tags=["Logs / Auditoría"])
 
+_DESC_CURSOR = "Cursor opaco (header X-Next-Cursor de la página anterior). Si viene, se ignora skip."
+_DESC_DETALLE = "false: solo la línea de resumen (sin datos_anteriores/datos_nuevos/cambios); GET /logs/{id} la expande"
+_DESC_COMPLETO = "Reconstruye datos_anteriores/datos_nuevos enteros de los logs guardados como diff"
 
+
+# ===============================
+# Helpers
+# ===============================
+def _log_a_dict(l, expandidos: dict, detalle: bool) -> dict:
+    item = {
+        "id": l.id,
+        "usuario_id": l.usuario_id,
+        "accion": l.accion,
+        "entidad": l.entidad,
+        "entidad_id": l.entidad_id,
+        "version": l.version,
+        "timestamp": l.timestamp.isoformat() if l.timestamp else None,
+    }
+    if detalle:
+        antes, despues = expandidos.get(l.id, (l.datos_anteriores, l.datos_nuevos))
+        item["datos_anteriores"] = antes
+        item["datos_nuevos"] = despues
+        item["cambios"] = l.cambios
+    return item
+
+
+def _pagina(db: Session, logs, *, limit: int, detalle: bool, completo: bool) -> RespuestaJSON:
+    # ✅ la expansión solo se paga si se pide (y solo tiene sentido con detalle)
+    expandidos = expandir_logs(db, logs) if detalle and completo else {}
+    headers = {}
+    # ✅ Página llena -> puede haber más: devolvemos el cursor de la siguiente
+    if len(logs) == limit:
+        headers["X-Next-Cursor"] = cursor_log(logs[-1])
+    # dicts ya armados: directo a orjson, sin jsonable_encoder
+    return RespuestaJSON(content=[_log_a_dict(l, expandidos, detalle) for l in logs], headers=headers)
+
+
+# ===============================
+# LIST
+# ===============================
 @router.get("")
 def get_logs(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description=_DESC_CURSOR),
     usuario_id: Optional[int] = Query(None),
     entidad: Optional[str] = Query(None, description="Ej: usuarios, comuneros, campos_formulario"),
     accion: Optional[str] = Query(None, description="CREAR | EDITAR | ELIMINAR"),
     entidad_id: Optional[int] = Query(None),
-    db: Session = Depends(get_db),
+    desde: Optional[datetime] = Query(None, description="timestamp >= desde (UTC)"),
+    hasta: Optional[datetime] = Query(None, description="timestamp < hasta (UTC); con rango solo se leen esas particiones"),
+    detalle: bool = Query(True, description=_DESC_DETALLE),
+    completo: bool = Query(False, description=_DESC_COMPLETO),
+    db: Session = Depends(get_read_db),
     _: Usuario = Depends(require_admin),  # ✅ solo admin
 ):
     logs = listar_logs(
         db,
         skip=skip,
         limit=limit,
+        cursor=cursor,
+        detalle=detalle,
         usuario_id=usuario_id,
         entidad=entidad,
         accion=accion,
         entidad_id=entidad_id,
+        desde=desde,
+        hasta=hasta,
+    )
+    return _pagina(db, logs, limit=limit, detalle=detalle, completo=completo)
+
+
+# ===============================
+# BÚSQUEDA POR CAMPO CAMBIADO
+# ===============================
+@router.get("/cambios")
+def get_logs_por_cambio(
+    clave: str = Query(..., min_length=1, description='Ruta cambiada: "nombre", "datos_dinamicos.zona", ...'),
+    de: Optional[str] = Query(None, description="Valor anterior (JSON; si no parsea, texto)"),
+    a: Optional[str] = Query(None, description="Valor nuevo (JSON; si no parsea, texto)"),
+    entidad: Optional[str] = Query(None, description="Ej: usuarios, comuneros, campos_formulario"),
+    desde: Optional[datetime] = Query(None, description="timestamp >= desde (UTC)"),
+    hasta: Optional[datetime] = Query(None, description="timestamp < hasta (UTC); con rango solo se leen esas particiones"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Cursor opaco (header X-Next-Cursor de la página anterior)"),
+    detalle: bool = Query(True, description=_DESC_DETALLE),
+    completo: bool = Query(False, description=_DESC_COMPLETO),
+    db: Session = Depends(get_read_db),
+    _: Usuario = Depends(require_admin),  # ✅ solo admin
+):
+    """
+    "Quién cambió zona a X el mes pasado": logs (EDITAR/ELIMINAR) cuyo `cambios`
+    tiene `clave`, y si vienen, con ese valor anterior (`de`) y/o nuevo (`a`).
+    """
+    logs = listar_logs(
+        db,
+        limit=limit,
+        cursor=cursor,
+        detalle=detalle,
+        entidad=entidad,
+        desde=desde,
+        hasta=hasta,
+        clave=clave,
+        de=de,
+        a=a,
+    )
+    return _pagina(db, logs, limit=limit, detalle=detalle, completo=completo)
+
+
+# ===============================
+# HISTORIA DE UN REGISTRO
+# ===============================
+@router.get("/entidad/{entidad}/{entidad_id}")
+def get_historial_entidad(
+    entidad: str,
+    entidad_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Cursor opaco (header X-Next-Cursor de la página anterior)"),
+    detalle: bool = Query(True, description=_DESC_DETALLE),
+    completo: bool = Query(False, description=_DESC_COMPLETO),
+    db: Session = Depends(get_read_db),
+    _: Usuario = Depends(require_admin),  # ✅ solo admin
+):
+    """Logs de un registro, más nuevos primero (índice entidad, entidad_id, timestamp DESC, id DESC)."""
+    logs = listar_logs(
+        db, limit=limit, cursor=cursor, detalle=detalle, entidad=entidad, entidad_id=entidad_id
     )
+    return _pagina(db, logs, limit=limit, detalle=detalle, completo=completo)
 
-    return [
-        {
-            "id": l.id,
-            "usuario_id": l.usuario_id,
-            "accion": l.accion,
-            "entidad": l.entidad,
-            "entidad_id": l.entidad_id,
-            "datos_anteriores": l.datos_anteriores,
-            "datos_nuevos": l.datos_nuevos,
-            "timestamp": l.timestamp.isoformat() if l.timestamp else None,
-        }
-        for l in logs
-    ]
\ No newline at end of file
+
+@router.get("/entidad/{entidad}/{entidad_id}/version/{version}")
+def get_version_entidad(
+    entidad: str,
+    entidad_id: int,
+    version: int,
+    db: Session = Depends(get_read_db),
+    _: Usuario = Depends(require_admin),  # ✅ solo admin
+):
+    """Snapshot de la entidad tal como quedó en esa versión (reconstruido desde el último checkpoint)."""
+    return RespuestaJSON(content={
+        "entidad": entidad,
+        "entidad_id": entidad_id,
+        "version": version,
+        "datos": reconstruir_version(db, entidad, entidad_id, version),
+    })
+
+
+# ===============================
+# DETALLE (expandir una línea)
+# ===============================
+@router.get("/{log_id}")
+def get_log(
+    log_id: int,
+    completo: bool = Query(False, description=_DESC_COMPLETO),
+    db: Session = Depends(get_read_db),
+    _: Usuario = Depends(require_admin),  # ✅ solo admin
+):
+    log = obtener_log(db, log_id)
+    expandidos = expandir_logs(db, [log]) if completo else {}
+    return RespuestaJSON(content=_log_a_dict(log, expandidos, detalle=True))
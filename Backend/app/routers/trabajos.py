@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.config import get_db
+from app.crud.trabajos_crud import obtener_trabajo
+from app.models.usuario import Usuario, RolEnum
+from app.routers.auth import get_current_user
+from app.schemas.trabajo_schema import TrabajoResponse
+
+router = APIRouter(prefix="/trabajos", tags=["Trabajos"])
+
+
+# ===============================
+# STATUS
+# ===============================
+@router.get("/{trabajo_id}", response_model=TrabajoResponse)
+def estado_trabajo(
+    trabajo_id: int,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user),
+):
+    trabajo = obtener_trabajo(db, trabajo_id)
+    if not trabajo:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+
+    # cada uno ve los suyos; admin ve todos
+    if current_user.rol != RolEnum.ADMIN and trabajo.usuario_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No tienes permisos para esta acción")
+    return trabajo
@@ -1,5 +1,5 @@
 from typing import Optional, Dict, Any
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class CampoFormularioBase(BaseModel):
@@ -8,6 +8,7 @@ class CampoFormularioBase(BaseModel):
     obligatorio: bool = False
     opciones: Optional[Dict[str, Any]] = None
     activo: bool = True
+    indexado: bool = False
 
 
 class CampoFormularioCreate(CampoFormularioBase):
@@ -20,9 +21,18 @@ class CampoFormularioUpdate(BaseModel):
     obligatorio: Optional[bool] = None
     opciones: Optional[Dict[str, Any]] = None
     activo: Optional[bool] = None
+    indexado: Optional[bool] = None
 
 
 class CampoFormularioResponse(CampoFormularioBase):
     id: int
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class CampoConformidadRequest(BaseModel):
+    """Revisión de comuneros contra la definición actual del campo (y corrección opcional)."""
+    aplicar: bool = False                       # False = solo reporte
+    default: Optional[Any] = None               # valor para filas sin el campo (si es obligatorio)
+    remapeo: Optional[Dict[str, Any]] = None    # valor viejo -> valor nuevo (opciones renombradas)
+    muestras: int = Field(20, ge=0, le=200)
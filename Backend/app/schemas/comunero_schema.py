@@ -21,6 +21,19 @@ class ComuneroUpdate(BaseModel):
     is_deleted: Optional[bool] = None
 
 
+class ComuneroUpsert(BaseModel):
+    """PUT /comuneros/by-documento/{documento}: el documento va en la URL."""
+    nombre: str
+    datos_dinamicos: Dict[str, Any] = {}
+
+
+class ComuneroPatch(BaseModel):
+    """Merge patch (RFC 7396): solo lo enviado cambia; en datos_dinamicos, clave: null la borra."""
+    nombre: Optional[str] = None
+    documento: Optional[str] = None
+    datos_dinamicos: Optional[Dict[str, Any]] = None
+
+
 class ComuneroResponse(ComuneroBase):
     id: int
     creado_por: int
@@ -29,3 +42,41 @@ class ComuneroResponse(ComuneroBase):
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ComuneroBulkFila(BaseModel):
+    fila: int                      # posición en el lote (1-based; en NDJSON = n° de registro)
+    ok: bool
+    id: Optional[int] = None
+    accion: Optional[str] = None   # CREAR | EDITAR | SIN_CAMBIOS
+    documento: Optional[str] = None
+    error: Optional[str] = None
+    code: Optional[str] = None     # VALIDACION | DOCUMENTO_DUPLICADO | REVERTIDO
+
+
+class ComuneroValidacionError(BaseModel):
+    campo: str                     # "" = el registro entero
+    code: str                      # VALIDACION | DOCUMENTO_DUPLICADO | OBLIGATORIO | NO_PERMITIDO | TIPO | OPCION_INVALIDA | TIPO_NO_SOPORTADO
+    error: str
+
+
+class ComuneroValidacionFila(BaseModel):
+    fila: int                      # 1-based, igual que en /bulk
+    documento: Optional[Any] = None
+    errores: list[ComuneroValidacionError]
+
+
+class ComuneroValidacionResponse(BaseModel):
+    total: int
+    validos: int
+    invalidos: int
+    filas: list[ComuneroValidacionFila]  # solo las filas con errores
+
+
+class ComuneroBulkResponse(BaseModel):
+    modo: str
+    total: int
+    insertados: int
+    actualizados: int = 0
+    errores: int
+    resultados: list[ComuneroBulkFila]
@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import Optional, Any
+
+from pydantic import BaseModel, ConfigDict
+
+
+class ImportacionResponse(BaseModel):
+    id: int
+    usuario_id: int
+    archivo: str
+    formato: str
+    estado: str
+    filas_procesadas: int
+    insertados: int
+    errores: int
+    filas_por_segundo: Optional[float] = None
+    errores_detalle: list[dict[str, Any]] = []
+    mensaje: Optional[str] = None
+    created_at: datetime
+    iniciado_en: Optional[datetime] = None
+    finalizado_en: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,37 @@
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+from pydantic import BaseModel, ConfigDict, model_validator
+
+
+class TrabajoResponse(BaseModel):
+    id: int
+    tipo: str
+    usuario_id: int
+    estado: str
+    parametros: Dict[str, Any] = {}
+    total: Optional[int] = None
+    procesados: int
+    afectados: int
+    filas_por_segundo: Optional[float] = None
+    resultado: Optional[Dict[str, Any]] = None
+    mensaje: Optional[str] = None
+    created_at: datetime
+    iniciado_en: Optional[datetime] = None
+    finalizado_en: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ComuneroSeleccion(BaseModel):
+    """Qué comuneros toca una operación masiva: lista de ids y/o filtros (DSL del listado)."""
+    ids: Optional[list[int]] = None
+    filtros_and: Optional[Dict[str, Any]] = None
+    filtros_or: Optional[Dict[str, Any]] = None
+
+    @model_validator(mode="after")
+    def _algun_criterio(self):
+        # sin criterio sería "todos": demasiado fácil de disparar por error
+        if not self.ids and not self.filtros_and and not self.filtros_or:
+            raise ValueError("Indica ids y/o filtros_and/filtros_or")
+        return self
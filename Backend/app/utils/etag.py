@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.version_tabla import VersionTabla
+
+
+def versiones_tablas(db: Session, tablas: tuple[str, ...]) -> dict[str, int]:
+    """{tabla: versión} = suma de los shards de cada tabla (ver VersionTabla)."""
+    return {
+        tabla: int(version)
+        for tabla, version in db.execute(
+            select(VersionTabla.tabla, func.sum(VersionTabla.version))
+            .where(VersionTabla.tabla.in_(tablas))
+            .group_by(VersionTabla.tabla)
+        )
+    }
+
+
+def etag_tablas(db: Session, tablas: tuple[str, ...], *extra: Any) -> str:
+    """
+    ETag débil a partir de versiones_tablas (1 query por rango de PK) + lo que cambie la
+    respuesta sin tocar datos (query string, fecha, ...).
+
+    Se calcula ANTES de la query principal: si entre medio alguien hace commit,
+    lo peor que pasa es que el cliente recibe datos nuevos con la ETag vieja
+    y refetchea una vez de más (nunca al revés).
+    """
+    versiones = versiones_tablas(db, tablas)
+
+    base = "|".join(
+        [f"{t}:{versiones.get(t, 0)}" for t in tablas] + [str(x) for x in extra]
+    )
+    return f'W/"{hashlib.sha1(base.encode("utf-8")).hexdigest()}"'
+
+
+def _coincide(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # comparación débil (RFC 9110): se ignora el prefijo W/
+    actual = etag.removeprefix("W/")
+    return any(
+        candidato.strip().removeprefix("W/") == actual
+        for candidato in if_none_match.split(",")
+    )
+
+
+def no_modificado(request: Request, etag: str) -> Optional[Response]:
+    """304 listo para devolver si el cliente ya tiene esta versión; si no, None."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _coincide(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+        )
+    return None
+
+
+def cabeceras_etag(etag: str) -> dict[str, str]:
+    # no-cache = el navegador guarda pero revalida siempre (If-None-Match automático)
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import json
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import Date, Numeric, Text, and_, any_, bindparam, func, literal, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from app.models.campos_formulario import CampoFormulario
+from app.models.comunero import Comunero
+
+
+TIPOS_NUMERICOS = {"number", "float", "int", "integer"}
+TIPOS_TEXTO = {"string", "text", "select"}
+TIPOS_BOOLEANOS = {"boolean", "bool"}
+
+# |exponente| máximo de un número en un filtro (10^100 sobra para cualquier dato real)
+MAX_EXPONENTE = 100
+
+# Operadores permitidos por familia de tipo
+_OPS_ORDENABLES = {"eq", "in", "between", "gte", "lte", "gt", "lt", "exists"}
+_OPS_POR_TIPO: dict[str, set[str]] = {
+    **{t: _OPS_ORDENABLES for t in TIPOS_NUMERICOS},
+    "date": _OPS_ORDENABLES,
+    **{t: _OPS_ORDENABLES | {"prefix"} for t in TIPOS_TEXTO},
+    **{t: {"eq", "in", "exists"} for t in TIPOS_BOOLEANOS},
+    "multiselect": {"eq", "in", "exists"},
+}
+
+
+# ===============================
+# Parseo (query string JSON -> dict)
+# ===============================
+def parse_filtros_json(
+    filtros_and: Optional[str],
+    filtros_or: Optional[str],
+) -> tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    try:
+        and_dict = json.loads(filtros_and) if filtros_and else None
+        or_dict = json.loads(filtros_or) if filtros_or else None
+    except json.JSONDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="filtros_and/filtros_or deben ser JSON válido",
+        )
+
+    for d in (and_dict, or_dict):
+        if d is not None and not isinstance(d, dict):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="filtros_and/filtros_or deben ser un objeto JSON",
+            )
+
+    return and_dict, or_dict
+
+
+# ===============================
+# Expresión tipada por campo (la MISMA que usan los índices por campo)
+# ===============================
+def expresion_campo(nombre_campo: str, tipo: Any):
+    """
+    (datos_dinamicos->>'campo') casteado según tipo:
+    - number/float/int/integer -> cv_numero(text) (numeric, NULL si no es número)
+    - date                     -> cv_fecha(text) (date, NULL si no es fecha; ver models/comunero.py)
+    - resto                    -> text
+
+    La clave se renderiza como literal (literal_execute) para que el planner
+    pueda empatar la expresión con ix_comuneros_campo_<id> aun con planes genéricos.
+    """
+    valor = Comunero.datos_dinamicos.op("->>", return_type=Text)(
+        literal(nombre_campo, Text, literal_execute=True)
+    )
+
+    tipo = str(tipo or "").strip().lower()
+    if tipo in TIPOS_NUMERICOS:
+        return func.cv_numero(valor, type_=Numeric)
+    if tipo == "date":
+        return func.cv_fecha(valor, type_=Date)
+    return valor
+
+
+# ===============================
+# DSL de filtros
+# ===============================
+#   {"zona": "A"}                         -> igualdad (containment @>, GIN)
+#   {"estado": ["activo", "pendiente"]}   -> atajo de {"in": [...]}
+#   {"edad": {"between": [18, 30]}}
+#   {"edad": {"gte": 18, "lte": 65}}      -> varios operadores = AND
+#   {"nombre_madre": {"prefix": "Mar"}}
+#   {"telefono": {"exists": true}}
+#
+# Una clave sin CampoFormulario conserva el filtro anterior al DSL: igualdad
+# como texto (->> = str(valor)), sin operadores.
+#
+# Cada valor se valida/convierte según el tipo del campo (CampoFormulario.tipo)
+# y los operadores de rango/IN/prefix usan expresion_campo(), que es la misma
+# expresión de los índices por campo (ix_comuneros_campo_<id>).
+def _error(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def _tipos_campos(db: Session) -> dict[str, str]:
+    # Incluye inactivos: los datos de un campo desactivado siguen siendo filtrables
+    rows = db.execute(select(CampoFormulario.nombre_campo, CampoFormulario.tipo)).all()
+    return {r.nombre_campo: str(r.tipo or "").strip().lower() for r in rows}
+
+
+def _coerce(key: str, tipo: str, value: Any) -> Any:
+    """Convierte un valor del filtro al tipo del campo (o 400)."""
+    if tipo in TIPOS_NUMERICOS:
+        if isinstance(value, bool):
+            raise _error(f"Filtro '{key}': se esperaba número")
+        try:
+            d = Decimal(str(value))
+        except InvalidOperation:
+            raise _error(f"Filtro '{key}': se esperaba número")
+        # NaN/Infinity no existen en JSON; un exponente enorme ("1e999999") haría
+        # un int de un millón de dígitos en _json_value
+        if not d.is_finite() or abs(d.adjusted()) > MAX_EXPONENTE:
+            raise _error(f"Filtro '{key}': número fuera de rango")
+        return d
+
+    if tipo == "date":
+        if isinstance(value, str):
+            try:
+                return datetime.strptime(value.strip(), "%Y-%m-%d").date()
+            except ValueError:
+                pass
+        raise _error(f"Filtro '{key}': se esperaba fecha YYYY-MM-DD")
+
+    if tipo in TIPOS_BOOLEANOS:
+        if not isinstance(value, bool):
+            raise _error(f"Filtro '{key}': se esperaba booleano")
+        return value
+
+    if not isinstance(value, str):
+        raise _error(f"Filtro '{key}': se esperaba texto")
+    return value
+
+
+def _json_value(tipo: str, value: Any) -> Any:
+    """Valor ya convertido -> como se guarda en el JSONB (para containment)."""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _contiene(key: str, tipo: str, value: Any):
+    if tipo == "multiselect":
+        return Comunero.datos_dinamicos.contains({key: [value]})
+    return Comunero.datos_dinamicos.contains({key: _json_value(tipo, value)})
+
+
+def _array_param(tipo: str, values: list):
+    item_type = Numeric if tipo in TIPOS_NUMERICOS else Date if tipo == "date" else Text
+    return bindparam(None, values, type_=ARRAY(item_type))
+
+
+def _normalizar_spec(key: str, spec: Any) -> dict[str, Any]:
+    if isinstance(spec, list):
+        return {"in": spec}
+    if isinstance(spec, dict):
+        if not spec:
+            raise _error(f"Filtro '{key}': objeto de operadores vacío")
+        return spec
+    return {"eq": spec}
+
+
+def _sin_definicion(key: str, spec: Any):
+    """
+    Clave sin CampoFormulario (datos cargados antes de definir el campo, o de
+    uno borrado): se mantiene el filtro de siempre, comparación como texto
+    `datos_dinamicos->>'k' = str(valor)` (una lista = cualquiera de sus valores).
+    Sin tipo no hay operadores: {"k": {"gte": ...}} -> 400.
+    """
+    if isinstance(spec, dict):
+        raise _error(f"Campo no filtrable con operadores (no está definido): {key}")
+    texto = Comunero.datos_dinamicos[key].astext
+    if isinstance(spec, list):
+        if not spec:
+            raise _error(f"Filtro '{key}': 'in' espera una lista no vacía")
+        return texto == any_(_array_param("text", [str(v) for v in spec]))
+    return texto == str(spec)
+
+
+def _compilar_campo(key: str, spec: Any, tipos: dict[str, str]) -> tuple[dict[str, Any], list]:
+    """
+    -> (igualdades para un containment agrupado, predicados tipados)
+    Las igualdades escalares se devuelven aparte para poder juntarlas en un solo `@>`.
+    """
+    if key not in tipos:
+        return {}, [_sin_definicion(key, spec)]
+
+    tipo = tipos[key]
+    permitidos = _OPS_POR_TIPO.get(tipo, set())
+    expr = expresion_campo(key, tipo)
+
+    igualdades: dict[str, Any] = {}
+    predicados = []
+
+    for op, value in _normalizar_spec(key, spec).items():
+        if op not in permitidos:
+            raise _error(f"Operador '{op}' no válido para campo '{key}' ({tipo})")
+
+        if op == "eq":
+            if tipo == "multiselect":
+                valores = value if isinstance(value, list) else [value]
+                igualdades[key] = [_coerce(key, "text", v) for v in valores]
+            else:
+                igualdades[key] = _json_value(tipo, _coerce(key, tipo, value))
+
+        elif op == "in":
+            if not isinstance(value, list) or not value:
+                raise _error(f"Filtro '{key}': 'in' espera una lista no vacía")
+            if tipo == "multiselect":
+                # alguna de las opciones marcada -> OR de containments (BitmapOr sobre el GIN)
+                predicados.append(or_(*[_contiene(key, tipo, _coerce(key, "text", v)) for v in value]))
+            elif tipo in TIPOS_BOOLEANOS:
+                predicados.append(or_(*[_contiene(key, tipo, _coerce(key, tipo, v)) for v in value]))
+            else:
+                valores = [_coerce(key, tipo, v) for v in value]
+                predicados.append(expr == any_(_array_param(tipo, valores)))
+
+        elif op == "between":
+            if not isinstance(value, list) or len(value) != 2:
+                raise _error(f"Filtro '{key}': 'between' espera [desde, hasta]")
+            desde, hasta = (_coerce(key, tipo, v) for v in value)
+            predicados.append(expr.between(desde, hasta))
+
+        elif op in {"gte", "lte", "gt", "lt"}:
+            v = _coerce(key, tipo, value)
+            predicados.append({
+                "gte": expr >= v,
+                "lte": expr <= v,
+                "gt": expr > v,
+                "lt": expr < v,
+            }[op])
+
+        elif op == "prefix":
+            prefijo = _coerce(key, tipo, value)
+            predicados.append(expr.startswith(prefijo, autoescape=True))
+
+        elif op == "exists":
+            if not isinstance(value, bool):
+                raise _error(f"Filtro '{key}': 'exists' espera true/false")
+            predicados.append(expr.isnot(None) if value else expr.is_(None))
+
+    return igualdades, predicados
+
+
+def condiciones_dinamicas(
+    db: Session,
+    filtros_and: Optional[Dict[str, Any]] = None,
+    filtros_or: Optional[Dict[str, Any]] = None,
+) -> list:
+    """
+    Compila filtros_and/filtros_or (DSL de arriba) a predicados sobre datos_dinamicos.
+
+    - Igualdades de filtros_and -> UN solo `datos_dinamicos @> {...}`
+      (lo sirve ix_comuneros_datos_dinamicos_gin, jsonb_path_ops)
+    - in/between/gte/lte/prefix/exists -> predicados tipados sobre expresion_campo()
+      (los sirve ix_comuneros_campo_<id> si el campo está indexado)
+    - filtros_or -> un predicado por clave, unidos con OR
+
+    Lo usan listado, exportación y estadísticas.
+    """
+    if not filtros_and and not filtros_or:
+        return []
+
+    tipos = _tipos_campos(db)
+    condiciones = []
+
+    if filtros_and:
+        igualdades: dict[str, Any] = {}
+        for key, spec in filtros_and.items():
+            eq, preds = _compilar_campo(key, spec, tipos)
+            igualdades.update(eq)
+            condiciones.extend(preds)
+        if igualdades:
+            condiciones.insert(0, Comunero.datos_dinamicos.contains(igualdades))
+
+    if filtros_or:
+        alternativas = []
+        for key, spec in filtros_or.items():
+            eq, preds = _compilar_campo(key, spec, tipos)
+            if eq:
+                preds = [Comunero.datos_dinamicos.contains(eq), *preds]
+            alternativas.append(and_(*preds))
+        condiciones.append(or_(*alternativas))
+
+    return condiciones
@@ -0,0 +1,205 @@
+import codecs
+import csv
+import unicodedata
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Iterator, Optional
+
+from openpyxl import load_workbook
+
+
+# ===============================
+# Lectores en streaming (memoria constante)
+# ===============================
+# codificaciones aceptadas (parámetro `codificacion` de POST /importaciones/comuneros)
+CODIFICACIONES = ("utf-8", "cp1252", "latin-1")
+
+
+@dataclass
+class FilaIlegible:
+    """Fila del CSV con bytes que no decodifican: se reporta como error de esa fila."""
+    error: str
+
+
+def detectar_codificacion(muestra: bytes) -> str:
+    """
+    UTF-8 (con o sin BOM) si la muestra decodifica; si no, cp1252 (lo que exporta
+    Excel en Windows en español). Incremental: un carácter cortado al final de la
+    muestra no cuenta como error.
+    """
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(muestra, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "cp1252"
+
+
+def iter_filas_csv(path: str, codificacion: Optional[str] = None) -> Iterator[tuple[int, Any]]:
+    """
+    (n° de fila de la planilla, celdas | FilaIlegible). Fila 1 = encabezado.
+    Detecta separador , ; o tab (Excel en español suele exportar con ;) y, si no
+    viene `codificacion`, la codificación (ver detectar_codificacion).
+    Se decodifica línea por línea: un byte inválido invalida su fila, no el archivo.
+    """
+    with open(path, "rb") as f:
+        muestra = f.read(64 * 1024)
+        f.seek(0)
+        codificacion = codificacion or detectar_codificacion(muestra)
+        codec = "utf-8-sig" if codificacion == "utf-8" else codificacion  # BOM de Excel
+        try:
+            dialecto = csv.Sniffer().sniff(muestra.decode(codec, errors="replace"), delimiters=",;\t")
+        except csv.Error:
+            dialecto = csv.excel
+
+        ilegibles: set[int] = set()
+
+        def lineas() -> Iterator[str]:
+            for n_linea, linea in enumerate(f, start=1):
+                try:
+                    yield linea.decode(codec)
+                except UnicodeDecodeError:
+                    ilegibles.add(n_linea)
+                    yield linea.decode(codec, errors="replace")
+
+        lector = csv.reader(lineas(), dialecto)
+        ultima_linea = 0
+        for n, celdas in enumerate(lector, start=1):
+            # una fila puede ocupar varias líneas (campos entre comillas con saltos)
+            if any(l in ilegibles for l in range(ultima_linea + 1, lector.line_num + 1)):
+                celdas = FilaIlegible(f"La fila no es texto {codificacion} válido (indica la codificación del archivo)")
+            ultima_linea = lector.line_num
+            yield n, celdas
+
+
+def iter_filas_xlsx(path: str) -> Iterator[tuple[int, list[Any]]]:
+    """
+    Igual que iter_filas_csv para la primera hoja de un .xlsx.
+    read_only: openpyxl parsea el XML en streaming en vez de cargar el libro entero.
+    """
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        for n, celdas in enumerate(ws.iter_rows(values_only=True), start=1):
+            yield n, list(celdas)
+    finally:
+        wb.close()
+
+
+# ===============================
+# Encabezados -> nombre / documento / campos dinámicos
+# ===============================
+def normalizar_encabezado(valor: Any) -> str:
+    """'  Documento ' / 'DOCUMENTO' / 'Dócumento' -> 'documento'."""
+    texto = unicodedata.normalize("NFKD", str(valor or "").strip().lower())
+    return "".join(c for c in texto if not unicodedata.combining(c)).replace(" ", "_")
+
+
+def mapear_columnas(
+    encabezado: list[Any],
+    campos: dict[str, str],
+    mapeo: Optional[dict[str, str]] = None,
+) -> tuple[dict[int, str], list[str]]:
+    """
+    -> ({índice de columna: destino}, columnas ignoradas)
+    destino = "nombre" | "documento" | nombre_campo dinámico.
+
+    `mapeo` (opcional) traduce encabezados de la planilla a destinos:
+    {"Apellido y Nombre": "nombre", "DNI": "documento"}; sin mapeo se compara
+    el encabezado normalizado contra nombre/documento/nombre_campo.
+    """
+    mapeo_norm = {normalizar_encabezado(k): v for k, v in (mapeo or {}).items()}
+    campos_norm = {normalizar_encabezado(c): c for c in campos}
+
+    columnas: dict[int, str] = {}
+    ignoradas: list[str] = []
+    for i, valor in enumerate(encabezado):
+        clave = normalizar_encabezado(valor)
+        if not clave:
+            continue
+        destino = mapeo_norm.get(clave, clave)
+        if destino in ("nombre", "documento"):
+            columnas[i] = destino
+        elif destino in campos:
+            columnas[i] = destino
+        elif normalizar_encabezado(destino) in campos_norm:
+            columnas[i] = campos_norm[normalizar_encabezado(destino)]
+        else:
+            ignoradas.append(str(valor))
+
+    return columnas, ignoradas
+
+
+# ===============================
+# Celda -> valor JSON según tipo del campo
+# ===============================
+_VERDADEROS = {"true", "1", "si", "sí", "s", "x", "yes"}
+_FALSOS = {"false", "0", "no", "n", ""}
+
+
+def _texto(valor: Any) -> str:
+    # 12345678.0 (celda numérica de Excel) -> "12345678"
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    if isinstance(valor, datetime):
+        return valor.date().isoformat() if valor.time() == datetime.min.time() else valor.isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return str(valor).strip()
+
+
+def convertir_celda(valor: Any, tipo: str) -> Any:
+    """
+    Convierte lo que trae la planilla al tipo del campo. Si no se puede, devuelve
+    el valor tal cual y la validación normal (validar_datos_dinamicos) lo rechaza
+    con su mensaje de siempre.
+    """
+    if tipo in {"int", "integer"}:
+        try:
+            f = float(_texto(valor).replace(",", "."))
+            return int(f) if f.is_integer() else valor
+        except ValueError:
+            return valor
+
+    if tipo in {"number", "float"}:
+        if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+            return valor
+        try:
+            return float(_texto(valor).replace(",", "."))
+        except ValueError:
+            return valor
+
+    if tipo in {"boolean", "bool"}:
+        if isinstance(valor, bool):
+            return valor
+        t = _texto(valor).lower()
+        if t in _VERDADEROS:
+            return True
+        if t in _FALSOS:
+            return False
+        return valor
+
+    if tipo == "multiselect":
+        if isinstance(valor, str):
+            return [x.strip() for x in valor.replace(";", ",").split(",") if x.strip()]
+        return [_texto(valor)]
+
+    # text/string/select/date: texto (fechas de Excel -> YYYY-MM-DD)
+    return _texto(valor)
+
+
+def fila_a_registro(
+    celdas: list[Any],
+    columnas: dict[int, str],
+    tipos: dict[str, str],
+) -> dict[str, Any]:
+    """Celdas de una fila -> registro como el de POST /comuneros (celdas vacías se omiten)."""
+    registro: dict[str, Any] = {"datos_dinamicos": {}}
+    for i, destino in columnas.items():
+        valor = celdas[i] if i < len(celdas) else None
+        if valor is None or (isinstance(valor, str) and not valor.strip()):
+            continue
+        if destino in ("nombre", "documento"):
+            registro[destino] = _texto(valor)
+        else:
+            registro["datos_dinamicos"][destino] = convertir_celda(valor, tipos[destino])
+    return registro
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+
+from app.models.campos_formulario import CampoFormulario
+from app.utils.filtros import expresion_campo
+
+logger = logging.getLogger(__name__)
+
+# Tipos sin expresión escalar útil (las listas ya las cubre el GIN de datos_dinamicos)
+TIPOS_NO_INDEXABLES = {"multiselect"}
+
+
+def nombre_indice_campo(campo_id: int) -> str:
+    # por id (no por nombre_campo): estable ante renombres y siempre < 63 chars
+    return f"ix_comuneros_campo_{campo_id}"
+
+
+def firma_indice(campo: CampoFormulario) -> Optional[tuple[Any, ...]]:
+    """
+    Lo que define el índice de un campo. Si cambia entre antes/después de un
+    update, hay que reconstruirlo (o borrarlo). None = el campo no lleva índice.
+    """
+    if not (campo.indexado and campo.activo):
+        return None
+    return (campo.nombre_campo, str(campo.tipo or "").strip().lower())
+
+
+def validar_indexable(tipo: Any, indexado: Optional[bool]) -> None:
+    if indexado and str(tipo or "").strip().lower() in TIPOS_NO_INDEXABLES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Un campo tipo '{tipo}' no puede ser indexado",
+        )
+
+
+def sincronizar_indice_campo(bind: Engine, campo_id: int) -> None:
+    """
+    Deja comuneros con el índice que corresponde al campo (o sin él):
+        CREATE INDEX CONCURRENTLY ix_comuneros_campo_<id>
+        ON comuneros ((expresion_campo)) WHERE is_deleted = false
+
+    CONCURRENTLY no puede ir en transacción -> conexión AUTOCOMMIT propia.
+    Pensado para correr como BackgroundTask (en tablas grandes tarda).
+    """
+    nombre = nombre_indice_campo(campo_id)
+
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        campo = conn.execute(
+            select(CampoFormulario).where(CampoFormulario.id == campo_id)
+        ).one_or_none()
+
+        conn.exec_driver_sql(f'DROP INDEX CONCURRENTLY IF EXISTS "{nombre}"')
+
+        if campo is None or firma_indice(campo) is None:
+            return
+
+        expr = expresion_campo(campo.nombre_campo, campo.tipo).compile(
+            dialect=conn.dialect,
+            compile_kwargs={"literal_binds": True},
+        )
+
+        try:
+            conn.exec_driver_sql(
+                f'CREATE INDEX CONCURRENTLY "{nombre}" ON comuneros (({expr})) '
+                "WHERE is_deleted = false"
+            )
+        except DBAPIError:
+            # típico: datos viejos que no castean al tipo. Un CONCURRENTLY fallido
+            # deja el índice INVALID (ocupa y se mantiene en cada write) -> lo quitamos.
+            logger.exception("No se pudo crear %s para campo %s", nombre, campo.nombre_campo)
+            conn.exec_driver_sql(f'DROP INDEX CONCURRENTLY IF EXISTS "{nombre}"')
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import logging
+import select
+import threading
+from typing import Callable
+
+import psycopg
+from psycopg import sql
+
+from app.config import engine
+
+logger = logging.getLogger(__name__)
+
+
+# ===============================
+# LISTEN/NOTIFY entre workers
+# ===============================
+class Escucha(threading.Thread):
+    """
+    Hilo daemon con una conexión propia (autocommit) a la PRIMARIA que hace
+    LISTEN en `canales` y llama al callback de cada canal con el payload.
+    Las réplicas no retransmiten NOTIFY: por eso no usa read_engine.
+
+    Si la conexión se cae, reintenta cada `reintento` segundos. Al (re)conectar
+    llama a todos los callbacks: los avisos perdidos mientras tanto no se
+    recuperan, así que se asume que todo cambió.
+    """
+
+    def __init__(self, canales: dict[str, Callable[[str], None]], reintento: float = 5.0):
+        super().__init__(name="cv-escucha", daemon=True)
+        self.canales = canales
+        self.reintento = reintento
+        self._conectada = threading.Event()
+        self._parar = threading.Event()
+        # SQLAlchemy URL -> DSN libpq (sin "+psycopg")
+        self._dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+    def activa(self) -> bool:
+        return self._conectada.is_set()
+
+    def detener(self) -> None:
+        self._parar.set()
+
+    def _despachar(self, notify) -> None:
+        callback = self.canales.get(notify.channel)
+        if callback is not None:
+            callback(notify.payload)
+
+    def run(self) -> None:
+        while not self._parar.is_set():
+            try:
+                with psycopg.connect(self._dsn, autocommit=True) as conn:
+                    conn.add_notify_handler(self._despachar)
+                    for canal in self.canales:
+                        conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(canal)))
+                    for callback in self.canales.values():
+                        callback("")
+                    self._conectada.set()
+
+                    while not self._parar.is_set():
+                        # espera hasta 1s datos en el socket; una query vacía procesa los NOTIFY
+                        if select.select([conn.fileno()], [], [], 1.0)[0]:
+                            conn.execute("SELECT 1")
+            except Exception:
+                logger.exception("Escucha LISTEN/NOTIFY caída; reintentando en %ss", self.reintento)
+            finally:
+                self._conectada.clear()
+            self._parar.wait(self.reintento)
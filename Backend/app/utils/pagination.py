@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+from typing import Any
+
+from fastapi import HTTPException, status
+
+
+# ===============================
+# Cursor opaco (keyset pagination)
+# ===============================
+def encode_cursor(*values: Any) -> str:
+    """
+    Codifica la clave de orden de la última fila como token opaco (base64url).
+    Los datetime se guardan en ISO para poder reconstruirlos al decodificar.
+    """
+    payload = [
+        {"dt": v.isoformat()} if isinstance(v, datetime) else v
+        for v in values
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> tuple[Any, ...]:
+    """Inverso de encode_cursor. Cursor inválido -> 400 (no 500)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(payload, list) or len(payload) != size:
+            raise ValueError("cursor mal formado")
+
+        return tuple(
+            datetime.fromisoformat(v["dt"]) if isinstance(v, dict) else v
+            for v in payload
+        )
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="cursor inválido",
+        )
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import gzip
+import logging
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from psycopg import sql
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger(__name__)
+
+
+# ===============================
+# Particiones mensuales (RANGE sobre un timestamp)
+# ===============================
+@dataclass
+class Particion:
+    nombre: str
+    desde: Optional[datetime]  # None = MINVALUE
+    hasta: Optional[datetime]  # None = MAXVALUE
+    default: bool = False
+
+
+_LIMITES = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+def _limite(valor: str) -> Optional[datetime]:
+    valor = valor.strip("'")
+    return None if valor in ("MINVALUE", "MAXVALUE") else datetime.fromisoformat(valor)
+
+
+def inicio_mes(d: datetime) -> datetime:
+    return datetime(d.year, d.month, 1)
+
+
+def sumar_meses(mes: datetime, n: int) -> datetime:
+    total = mes.year * 12 + mes.month - 1 + n
+    return datetime(total // 12, total % 12 + 1, 1)
+
+
+def mes_actual() -> datetime:
+    # los timestamps de auditoría son UTC naive (datetime.utcnow)
+    return inicio_mes(datetime.now(timezone.utc).replace(tzinfo=None))
+
+
+def nombre_particion(tabla: str, mes: datetime) -> str:
+    return f"{tabla}_p{mes:%Y%m}"
+
+
+def listar_particiones(conn: Connection, tabla: str) -> list[Particion]:
+    filas = conn.execute(
+        text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:tabla) ORDER BY c.relname"
+        ),
+        {"tabla": tabla},
+    ).all()
+
+    particiones = []
+    for nombre, limites in filas:
+        if limites == "DEFAULT":
+            particiones.append(Particion(nombre, None, None, default=True))
+            continue
+        m = _LIMITES.search(limites)
+        particiones.append(Particion(nombre, _limite(m.group(1)), _limite(m.group(2))))
+    return particiones
+
+
+def _se_solapa(p: Particion, desde: datetime, hasta: datetime) -> bool:
+    if p.default:
+        return False
+    return (p.desde is None or p.desde < hasta) and (p.hasta is None or desde < p.hasta)
+
+
+def _bloquear(conn: Connection, tabla: str) -> None:
+    """
+    Lock advisory de la transacción: un solo proceso hace DDL de particiones a
+    la vez (N workers arrancando, el job de cron). El que espera vuelve a
+    listar después: lo que el otro ya creó no se intenta de nuevo.
+    """
+    conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:clave))"), {"clave": f"particiones:{tabla}"})
+
+
+def _sql(conn: Connection, q: sql.Composable) -> None:
+    # DDL no acepta parámetros del servidor: los límites van como literales
+    conn.exec_driver_sql(q.as_string(conn.connection.driver_connection))
+
+
+def crear_particion_mes(conn: Connection, tabla: str, columna: str, mes: datetime) -> str:
+    """
+    Crea la partición del mes. Si la DEFAULT ya recibió filas de ese rango
+    (nadie corrió el roll-forward a tiempo), se crea aparte, se mueven las
+    filas y se adjunta: CREATE ... PARTITION OF fallaría.
+    """
+    nombre = nombre_particion(tabla, mes)
+    default = next((p.nombre for p in listar_particiones(conn, tabla) if p.default), None)
+    ident = {
+        "t": sql.Identifier(tabla),
+        "p": sql.Identifier(nombre),
+        "c": sql.Identifier(columna),
+        "desde": sql.Literal(mes),
+        "hasta": sql.Literal(sumar_meses(mes, 1)),
+    }
+
+    huerfanas = default is not None and conn.execute(
+        text(f'SELECT 1 FROM "{default}" WHERE "{columna}" >= :desde AND "{columna}" < :hasta LIMIT 1'),
+        {"desde": mes, "hasta": sumar_meses(mes, 1)},
+    ).first()
+
+    if not huerfanas:
+        _sql(conn, sql.SQL("CREATE TABLE {p} PARTITION OF {t} FOR VALUES FROM ({desde}) TO ({hasta})").format(**ident))
+        return nombre
+
+    ident["d"] = sql.Identifier(default)
+    _sql(conn, sql.SQL("CREATE TABLE {p} (LIKE {t} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)").format(**ident))
+    _sql(conn, sql.SQL(
+        "WITH movidas AS (DELETE FROM {d} WHERE {c} >= {desde} AND {c} < {hasta} RETURNING *) "
+        "INSERT INTO {p} SELECT * FROM movidas"
+    ).format(**ident))
+    _sql(conn, sql.SQL("ALTER TABLE {t} ATTACH PARTITION {p} FOR VALUES FROM ({desde}) TO ({hasta})").format(**ident))
+    logger.warning("Partición %s creada tarde: filas movidas desde %s", nombre, default)
+    return nombre
+
+
+def asegurar_particiones(conn: Connection, tabla: str, columna: str, meses_adelante: int) -> list[str]:
+    """
+    Roll-forward idempotente: particiones del mes actual y `meses_adelante`
+    siguientes (las que no choquen con una existente, p. ej. la histórica)
+    + la DEFAULT, que atrapa lo que caiga fuera para que un INSERT nunca falle.
+    El lock dura hasta el commit del que llama.
+    """
+    _bloquear(conn, tabla)
+    existentes = listar_particiones(conn, tabla)
+    creadas = []
+    if not any(p.default for p in existentes):
+        conn.exec_driver_sql(f'CREATE TABLE "{tabla}_default" PARTITION OF "{tabla}" DEFAULT')
+        creadas.append(f"{tabla}_default")
+
+    mes = mes_actual()
+    for i in range(meses_adelante + 1):
+        desde = sumar_meses(mes, i)
+        if not any(_se_solapa(p, desde, sumar_meses(desde, 1)) for p in existentes):
+            creadas.append(crear_particion_mes(conn, tabla, columna, desde))
+    return creadas
+
+
+# ===============================
+# Retención: volcado comprimido + DETACH
+# ===============================
+def volcar_particion(conn: Connection, nombre: str, directorio: str) -> tuple[str, int]:
+    """
+    COPY ... TO STDOUT (CSV con encabezado) a `<directorio>/<nombre>.csv.gz`.
+    Restaurar: COPY <tabla> FROM PROGRAM 'gunzip -c archivo' (FORMAT csv, HEADER).
+    """
+    os.makedirs(directorio, exist_ok=True)
+    ruta = os.path.join(directorio, f"{nombre}.csv.gz")
+    parcial = ruta + ".parcial"
+    consulta = sql.SQL("COPY {} TO STDOUT (FORMAT csv, HEADER)").format(sql.Identifier(nombre))
+
+    with conn.connection.driver_connection.cursor() as cur:
+        with gzip.open(parcial, "wb") as f, cur.copy(consulta) as copia:
+            for bloque in copia:
+                f.write(bloque)
+        filas = cur.rowcount
+    os.replace(parcial, ruta)  # el .csv.gz solo aparece completo
+    return ruta, filas
+
+
+def retener_particiones(conn: Connection, tabla: str, corte: datetime, directorio: str) -> list[dict]:
+    """
+    Vuelca y elimina las particiones enteramente anteriores a `corte`, una
+    transacción por partición: COPY con la partición todavía adjunta (solo
+    ACCESS SHARE sobre ella: no frena INSERTs), después DETACH + DROP y commit.
+    Si algo falla antes del commit la partición sigue ahí y el archivo se
+    vuelve a generar en la próxima corrida.
+    """
+    retenidas = []
+    while True:
+        _bloquear(conn, tabla)
+        p = next(
+            (p for p in listar_particiones(conn, tabla) if not p.default and p.hasta is not None and p.hasta <= corte),
+            None,
+        )
+        if p is None:
+            conn.commit()
+            return retenidas
+        ruta, filas = volcar_particion(conn, p.nombre, directorio)
+        conn.exec_driver_sql("SET LOCAL lock_timeout = '5s'")  # DETACH pide ACCESS EXCLUSIVE sobre el padre
+        conn.exec_driver_sql(f'ALTER TABLE "{tabla}" DETACH PARTITION "{p.nombre}"')
+        conn.exec_driver_sql(f'DROP TABLE "{p.nombre}"')
+        conn.commit()
+        retenidas.append({"particion": p.nombre, "archivo": ruta, "filas": filas})
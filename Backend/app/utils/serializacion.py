@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+
+# ===============================
+# Respuesta JSON por defecto (orjson)
+# ===============================
+def _default(obj: Any) -> Any:
+    # lo que orjson no serializa de fábrica y sí aparece en nuestros dicts
+    if isinstance(obj, Decimal):
+        if not obj.is_finite():
+            return None  # NaN/Infinity no existen en JSON (orjson hace lo mismo con float)
+        # int solo si entra en 64 bits (orjson no serializa más): 1e999999 no arma un int gigante
+        if obj.adjusted() < 18 and obj == obj.to_integral_value():
+            return int(obj)
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError
+
+
+class RespuestaJSON(ORJSONResponse):
+    """
+    default_response_class de la app. datetime/date/UUID los serializa orjson
+    en C; OPT_UTC_Z deja los UTC con "Z", igual que Pydantic.
+
+    Devolverla directamente desde un endpoint (content = dicts/listas ya
+    armados) saltea validación de response_model y jsonable_encoder: es el
+    camino rápido de listados, /logs y /estadisticas. El response_model del
+    decorador se mantiene para el esquema OpenAPI.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z,
+        )
+
+
+def filas_a_dicts(rows) -> list[dict[str, Any]]:
+    """Rows Core (select de columnas) -> dicts, sin pasar por ORM ni Pydantic."""
+    return [dict(r._mapping) for r in rows]
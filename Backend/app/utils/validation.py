@@ -1,15 +1,18 @@
 from __future__ import annotations
 
+import threading
 from datetime import datetime, date
-from typing import Any, Dict, Iterable
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
 
 from fastapi import HTTPException, status
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from app.models.campos_formulario import CampoFormulario
+from app.utils.etag import versiones_tablas
 
 
-def _is_empty(v: Any) -> bool:
+def is_empty(v: Any) -> bool:
     """Define 'vacío' para validación de obligatorios."""
     return v is None or v == "" or v == [] or v == {}  # simple y seguro
 
@@ -36,98 +39,275 @@ def _get_select_values(opciones: Any) -> list[str]:
     return []
 
 
-def _validate_type(key: str, tipo: str, value: Any, campo: CampoFormulario) -> None:
-    # Permitir null si NO es obligatorio
-    if value is None:
-        if campo.obligatorio:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"El campo '{key}' es obligatorio",
-            )
-        return
+def cargar_campos_activos(db: Session) -> Dict[str, CampoFormulario]:
+    """Config de campos activos por nombre (1 query; reutilizable para N registros)."""
+    campos = (
+        db.query(CampoFormulario)
+        .filter(CampoFormulario.activo == True)  # noqa: E712
+        .all()
+    )
+    return {c.nombre_campo: c for c in campos}
+
+
+# ===============================
+# Validador compilado
+# ===============================
+# Cada campo activo se compila UNA vez a un closure `chequeo(valor) -> error | None`
+# (opciones de select/multiselect como frozenset). El validador se cachea en
+# proceso y se recompila solo cuando cambia campos_formulario (ver más abajo).
+#
+# Error = (campo, código, mensaje). Códigos: OBLIGATORIO | NO_PERMITIDO | TIPO |
+# OPCION_INVALIDA | TIPO_NO_SOPORTADO. Los mensajes son los de siempre (detail 400).
+Error = tuple[str, str, str]
+Chequeo = Callable[[Any], Optional[Error]]
+
+
+def _es_fecha(value: Any) -> bool:
+    # acepta "YYYY-MM-DD" o date/datetime
+    if isinstance(value, (date, datetime)):
+        return True
+    if isinstance(value, str):
+        try:
+            datetime.strptime(value.strip(), "%Y-%m-%d")
+            return True
+        except ValueError:
+            pass
+    return False
+
+
+def _compilar_chequeo(key: str, tipo: str, opciones: Any) -> Chequeo:
+    def falla(codigo: str, mensaje: str) -> Error:
+        return (key, codigo, mensaje)
 
     if tipo in {"string", "text"}:
-        if not isinstance(value, str):
-            raise HTTPException(status_code=400, detail=f"{key} debe ser texto")
-
-    elif tipo in {"number", "float"}:
-        if not isinstance(value, (int, float)) or isinstance(value, bool):
-            raise HTTPException(status_code=400, detail=f"{key} debe ser numérico")
-
-    elif tipo in {"int", "integer"}:
-        if not isinstance(value, int) or isinstance(value, bool):
-            raise HTTPException(status_code=400, detail=f"{key} debe ser entero")
-
-    elif tipo in {"boolean", "bool"}:
-        if not isinstance(value, bool):
-            raise HTTPException(status_code=400, detail=f"{key} debe ser booleano")
-
-    elif tipo == "date":
-        # acepta "YYYY-MM-DD" o date/datetime
-        if isinstance(value, (date, datetime)):
-            return
-        if isinstance(value, str):
-            try:
-                datetime.strptime(value.strip(), "%Y-%m-%d")
-                return
-            except Exception:
-                pass
-        raise HTTPException(status_code=400, detail=f"{key} debe ser fecha YYYY-MM-DD")
-
-    elif tipo == "select":
-        if not isinstance(value, str):
-            raise HTTPException(status_code=400, detail=f"{key} debe ser texto (select)")
-        allowed = _get_select_values(campo.opciones)
-        if allowed and value not in allowed:
-            raise HTTPException(status_code=400, detail=f"{key} contiene valor inválido")
-
-    elif tipo == "multiselect":
-        if not isinstance(value, list) or not all(isinstance(x, str) for x in value):
-            raise HTTPException(status_code=400, detail=f"{key} debe ser lista de textos")
-        allowed = _get_select_values(campo.opciones)
-        if allowed:
-            bad = [x for x in value if x not in allowed]
-            if bad:
-                raise HTTPException(status_code=400, detail=f"{key} contiene opciones inválidas")
+        err = falla("TIPO", f"{key} debe ser texto")
+        return lambda v: None if isinstance(v, str) else err
 
-    else:
-        # tipo desconocido -> mejor bloquear, no aceptar basura silenciosa
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Tipo de campo no soportado: {key} ({tipo})",
-        )
+    if tipo in {"number", "float"}:
+        err = falla("TIPO", f"{key} debe ser numérico")
+        return lambda v: None if isinstance(v, (int, float)) and not isinstance(v, bool) else err
 
+    if tipo in {"int", "integer"}:
+        err = falla("TIPO", f"{key} debe ser entero")
+        return lambda v: None if isinstance(v, int) and not isinstance(v, bool) else err
 
-def validar_campos_dinamicos(db: Session, datos: Dict[str, Any] | None):
-    datos = datos or {}
+    if tipo in {"boolean", "bool"}:
+        err = falla("TIPO", f"{key} debe ser booleano")
+        return lambda v: None if isinstance(v, bool) else err
 
-    campos = (
-        db.query(CampoFormulario)
-        .filter(CampoFormulario.activo == True)  # noqa: E712
-        .all()
-    )
+    if tipo == "date":
+        err = falla("TIPO", f"{key} debe ser fecha YYYY-MM-DD")
+        return lambda v: None if _es_fecha(v) else err
+
+    permitidos = frozenset(_get_select_values(opciones))
+
+    if tipo == "select":
+        err_tipo = falla("TIPO", f"{key} debe ser texto (select)")
+        err_opcion = falla("OPCION_INVALIDA", f"{key} contiene valor inválido")
+
+        def chequeo_select(v: Any) -> Optional[Error]:
+            if not isinstance(v, str):
+                return err_tipo
+            if permitidos and v not in permitidos:
+                return err_opcion
+            return None
+
+        return chequeo_select
+
+    if tipo == "multiselect":
+        err_tipo = falla("TIPO", f"{key} debe ser lista de textos")
+        err_opcion = falla("OPCION_INVALIDA", f"{key} contiene opciones inválidas")
+
+        def chequeo_multiselect(v: Any) -> Optional[Error]:
+            if not isinstance(v, list) or not all(isinstance(x, str) for x in v):
+                return err_tipo
+            if permitidos and not permitidos.issuperset(v):
+                return err_opcion
+            return None
+
+        return chequeo_multiselect
+
+    # tipo desconocido -> mejor bloquear, no aceptar basura silenciosa
+    err = falla("TIPO_NO_SOPORTADO", f"Tipo de campo no soportado: {key} ({tipo})")
+    return lambda v: err
+
+
+class ValidadorCampos:
+    """Config de campos activos ya compilada. Inmutable: se comparte entre threads."""
+
+    __slots__ = ("clave", "tipos", "obligatorios", "chequeos")
+
+    def __init__(self, campos: Iterable[Any], clave: Any = None):
+        self.clave = clave
+        self.tipos: Dict[str, str] = {}
+        self.chequeos: Dict[str, Chequeo] = {}
+        obligatorios = []
+        for c in campos:
+            tipo = _normalize_tipo(c.tipo)
+            self.tipos[c.nombre_campo] = tipo
+            self.chequeos[c.nombre_campo] = _compilar_chequeo(c.nombre_campo, tipo, c.opciones)
+            if c.obligatorio:
+                obligatorios.append(c.nombre_campo)
+        self.obligatorios: tuple[str, ...] = tuple(obligatorios)
+
+    def iter_errores(self, datos: Dict[str, Any] | None) -> Iterator[Error]:
+        """
+        Todos los errores de `datos`, en el orden de siempre: obligatorios, no
+        permitidos, tipos (campos en orden de config). Es perezoso: validar()
+        corta en el primero.
+        """
+        datos = datos or {}
+        chequeos = self.chequeos
 
-    campos_config = {c.nombre_campo: c for c in campos}
+        # 1) obligatorios: debe existir Y no estar vacío
+        for nombre in self.obligatorios:
+            if is_empty(datos.get(nombre)):
+                yield (nombre, "OBLIGATORIO", f"El campo '{nombre}' es obligatorio")
 
-    # 1) obligatorios: debe existir Y no estar vacío
-    for nombre, campo in campos_config.items():
-        if campo.obligatorio:
-            if nombre not in datos or _is_empty(datos.get(nombre)):
+        # 2) no permitir keys no configuradas
+        for key in datos:
+            if key not in chequeos:
+                yield (key, "NO_PERMITIDO", f"Campo no permitido: {key}")
+
+        # 3) tipos (null = ausente, ya cubierto en 1)
+        for key, chequeo in chequeos.items():
+            value = datos.get(key)
+            if value is not None and (err := chequeo(value)) is not None:
+                yield err
+
+    def errores_lote(self, lote: list[Dict[str, Any]]) -> list[list[Error]]:
+        """
+        Igual que iter_errores (mismos chequeos, mismo orden por fila) pero por
+        COLUMNAS: cada chequeo corre una vez por valor distinto de la columna
+        (memo por (tipo, valor)), no una vez por fila. Con 100k filas y pocos
+        valores distintos (select, booleanos, fechas repetidas) es casi gratis.
+        """
+        errores: list[list[Error]] = [[] for _ in lote]
+        chequeos = self.chequeos
+
+        for nombre in self.obligatorios:
+            err = (nombre, "OBLIGATORIO", f"El campo '{nombre}' es obligatorio")
+            for i, datos in enumerate(lote):
+                if is_empty(datos.get(nombre)):
+                    errores[i].append(err)
+
+        conocidas = chequeos.keys()
+        for i, datos in enumerate(lote):
+            if datos.keys() - conocidas:
+                errores[i].extend(
+                    (key, "NO_PERMITIDO", f"Campo no permitido: {key}")
+                    for key in datos if key not in chequeos
+                )
+
+        for key, chequeo in chequeos.items():
+            memo: dict[Any, Optional[Error]] = {}
+            for i, datos in enumerate(lote):
+                value = datos.get(key)
+                if value is None:
+                    continue
+                clave = (type(value), tuple(value) if isinstance(value, list) else value)
+                try:
+                    err = memo[clave]
+                except KeyError:
+                    err = memo[clave] = chequeo(value)
+                except TypeError:  # lista con elementos no hasheables, dict, ...
+                    err = chequeo(value)
+                if err is not None:
+                    errores[i].append(err)
+
+        return errores
+
+    def validar(self, datos: Dict[str, Any] | None) -> None:
+        """HTTPException(400) con el primer error."""
+        err = next(self.iter_errores(datos), None)
+        if err is not None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=err[2])
+
+    def validar_patch(self, patch: Dict[str, Any]) -> None:
+        """
+        Valida SOLO las claves de un merge patch (RFC 7396) de datos_dinamicos:
+        - clave: valor -> debe ser un campo activo y respetar su tipo
+        - clave: null  -> borra la clave; no permitido si el campo es obligatorio
+        """
+        for key, value in patch.items():
+            chequeo = self.chequeos.get(key)
+            if chequeo is None:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Campo no permitido: {key}")
+            if key in self.obligatorios and is_empty(value):
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"El campo '{nombre}' es obligatorio",
+                    detail=f"El campo '{key}' es obligatorio",
                 )
+            if value is not None and (err := chequeo(value)) is not None:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=err[2])
+
+
+def validar_datos_dinamicos(validador: ValidadorCampos, datos: Dict[str, Any] | None):
+    """Valida `datos` contra un validador ya compilado (sin tocar la DB)."""
+    validador.validar(datos)
+
+
+def validar_patch_dinamico(validador: ValidadorCampos, patch: Dict[str, Any]) -> None:
+    validador.validar_patch(patch)
+
+
+def validar_campos_dinamicos(db: Session, datos: Dict[str, Any] | None):
+    validador_campos(db).validar(datos)
+
+
+# ===============================
+# Cache en proceso + invalidación
+# ===============================
+# _version_local se incrementa:
+#   - en este worker, tras crear/editar/desactivar un campo (campos_crud)
+#   - en los demás, al recibir NOTIFY CANAL_CAMPOS (app/utils/notificaciones.py)
+# Con la escucha activa, validar no hace NINGUNA query. Sin escucha (tests,
+# scripts, o mientras reconecta) se cae a comparar versiones_tablas: 1 lookup
+# por rango de PK, como antes.
+CANAL_CAMPOS = "cv_campos_formulario"
+
+_cache_lock = threading.Lock()
+_version_local = 0
+_validador: ValidadorCampos | None = None
+_escucha_activa: Callable[[], bool] = lambda: False
+
+
+def invalidar_validador(_payload: str = "") -> None:
+    global _version_local
+    with _cache_lock:
+        _version_local += 1
+
+
+def registrar_escucha(activa: Callable[[], bool]) -> None:
+    """La escucha LISTEN avisa si está conectada (si no, se usa versiones_tablas)."""
+    global _escucha_activa
+    _escucha_activa = activa
+
+
+def notificar_cambio_campos(db: Session) -> None:
+    """NOTIFY a los otros workers; Postgres lo entrega al hacer commit (no antes)."""
+    db.execute(select(func.pg_notify(CANAL_CAMPOS, "")))
+
+
+def validador_campos(db: Session) -> ValidadorCampos:
+    global _validador
+
+    with _cache_lock:
+        local = _version_local
+        actual = _validador
+
+    if _escucha_activa():
+        clave = (local, None)
+    else:
+        version = versiones_tablas(db, ("campos_formulario",)).get("campos_formulario", 0)
+        clave = (local, version)
+
+    if actual is not None and actual.clave == clave:
+        return actual
 
-    # 2) no permitir keys no configuradas
-    for key in datos.keys():
-        if key not in campos_config:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Campo no permitido: {key}",
-            )
-
-    # 3) validar tipos
-    for key, value in datos.items():
-        campo = campos_config[key]
-        tipo = _normalize_tipo(campo.tipo)
-        _validate_type(key, tipo, value, campo)
\ No newline at end of file
+    # `local` se leyó ANTES de cargar: si llega otro aviso mientras tanto,
+    # la clave ya no coincide y el próximo llamado recompila
+    nuevo = ValidadorCampos(cargar_campos_activos(db).values(), clave)
+    with _cache_lock:
+        _validador = nuevo
+    return nuevo
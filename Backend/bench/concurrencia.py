@@ -0,0 +1,91 @@
+"""
+Benchmark de concurrencia: endpoint `def` + Session vs `async def` + AsyncSession.
+
+Cada request espera `--espera` segundos en Postgres (pg_sleep), como una
+query lenta. El endpoint sync queda limitado por el threadpool de AnyIO
+(40 workers por defecto); el async, por el pool de conexiones (20 + 40).
+
+    python -m bench.concurrencia                      # usa DB_* del .env
+    python -m bench.concurrencia --concurrencia 200 --requests 2000 --espera 0.5
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import async_engine, engine, get_async_db, get_db
+
+
+def crear_app(espera: float) -> FastAPI:
+    app = FastAPI()
+    consulta = text("SELECT pg_sleep(:s)").bindparams(s=espera)
+
+    @app.get("/sync")
+    def sync_endpoint(db: Session = Depends(get_db)):
+        db.execute(consulta)
+        return {"ok": True}
+
+    @app.get("/async")
+    async def async_endpoint(db: AsyncSession = Depends(get_async_db)):
+        await db.execute(consulta)
+        return {"ok": True}
+
+    return app
+
+
+async def medir(app: FastAPI, ruta: str, total: int, concurrencia: int) -> dict:
+    latencias: list[float] = []
+    semaforo = asyncio.Semaphore(concurrencia)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def uno() -> None:
+            async with semaforo:
+                t0 = time.perf_counter()
+                r = await client.get(ruta)
+                r.raise_for_status()
+                latencias.append(time.perf_counter() - t0)
+
+        await client.get(ruta)  # calienta el pool
+        inicio = time.perf_counter()
+        await asyncio.gather(*(uno() for _ in range(total)))
+        duracion = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        "ruta": ruta,
+        "req_s": total / duracion,
+        "p50_ms": statistics.median(latencias) * 1000,
+        "p95_ms": latencias[int(len(latencias) * 0.95) - 1] * 1000,
+    }
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    app = crear_app(args.espera)
+    print(
+        f"requests={args.requests} concurrencia={args.concurrencia} espera={args.espera}s "
+        f"pool={engine.pool.size()}+{engine.pool._max_overflow}"
+    )
+    for ruta in ("/sync", "/async"):
+        m = await medir(app, ruta, args.requests, args.concurrencia)
+        print(f"{m['ruta']:>7}: {m['req_s']:8.1f} req/s   p50 {m['p50_ms']:7.1f} ms   p95 {m['p95_ms']:7.1f} ms")
+
+    engine.dispose()
+    await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrencia: endpoints sync vs async contra Postgres")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrencia", type=int, default=200)
+    parser.add_argument("--espera", type=float, default=0.2, help="segundos de pg_sleep por request")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
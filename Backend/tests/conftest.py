@@ -3,7 +3,9 @@ import sys
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 # ✅ asegura que el root del proyecto esté en el path
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -11,7 +13,7 @@ if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
 from app.main import create_app
-from app.config import Base, get_db
+from app.config import Base, get_async_db, get_async_read_db, get_db, get_read_db
 
 DATABASE_URL_TEST = os.getenv("DATABASE_URL_TEST")
 if not DATABASE_URL_TEST:
@@ -20,6 +22,10 @@ if not DATABASE_URL_TEST:
 engine_test = create_engine(DATABASE_URL_TEST, future=True)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine_test)
 
+# NullPool: TestClient abre un event loop por request y las conexiones async no cruzan loops
+async_engine_test = create_async_engine(DATABASE_URL_TEST, poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine_test, autoflush=False, expire_on_commit=False)
+
 
 @pytest.fixture(scope="session", autouse=True)
 def setup_db():
@@ -46,4 +52,12 @@ def client(db):
         yield db
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as session:
+            yield session
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
     return TestClient(app)
\ No newline at end of file
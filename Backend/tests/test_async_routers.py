@@ -0,0 +1,32 @@
+import inspect
+
+from app.models.usuario import RolEnum
+from app.routers import auth, comuneros, estadisticas, exportaciones
+from tests.utils import create_user, login
+
+
+def test_rutas_calientes_son_async():
+    for fn in (
+        auth.login,
+        auth.me,
+        comuneros.list_comuneros,
+        estadisticas.dashboard_stats,
+        exportaciones.exportar_comuneros,
+        exportaciones.require_admin,
+    ):
+        assert inspect.iscoroutinefunction(fn), fn.__name__
+
+
+def test_me_y_token_invalido_async(client, db):
+    user = create_user(db, "admin@test.com", RolEnum.ADMIN)
+    token = login(client, "admin@test.com")
+
+    r = client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+    assert r.status_code == 200
+    assert r.json()["user_id"] == user.id
+
+    r = client.get("/auth/me", headers={"Authorization": "Bearer basura"})
+    assert r.status_code == 401
+
+    r = client.post("/auth/login", data={"username": "admin@test.com", "password": "mala"})
+    assert r.status_code == 401
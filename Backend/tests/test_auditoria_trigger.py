@@ -0,0 +1,89 @@
+from sqlalchemy import select, update
+
+from app.config import settings
+from app.crud.log_crud import auditar_como, diff_snapshots, expandir_logs
+from app.models.campos_formulario import CampoFormulario
+from app.models.comunero import Comunero
+from app.models.log_auditoria import LogAuditoria
+from app.models.usuario import RolEnum
+from tests.utils import create_user, login
+
+
+def _logs(db, comunero_id):
+    return db.execute(
+        select(LogAuditoria)
+        .where(LogAuditoria.entidad == "comuneros", LogAuditoria.entidad_id == comunero_id)
+        .order_by(LogAuditoria.version)
+    ).scalars().all()
+
+
+def _sin_updated_at(cambios):
+    # el UPDATE del ORM también pone updated_at (onupdate)
+    return {k: v for k, v in cambios.items() if k != "updated_at"}
+
+
+def test_trigger_audita_crud_y_sql_masivo(client, db, monkeypatch):
+    monkeypatch.setattr(settings, "AUDITORIA_BACKEND", "trigger")
+    admin = create_user(db, "admin@test.com", RolEnum.ADMIN)
+    headers = {"Authorization": f"Bearer {login(client, 'admin@test.com')}"}
+    if not db.execute(select(CampoFormulario).where(CampoFormulario.nombre_campo == "trg_zona")).scalar_one_or_none():
+        db.add(CampoFormulario(nombre_campo="trg_zona", tipo="text"))
+        db.commit()
+
+    r = client.post("/comuneros", json={"nombre": "Trg", "documento": "TRG-1", "datos_dinamicos": {"trg_zona": "N"}},
+                    headers=headers)
+    assert r.status_code == 201, r.text
+    cid = r.json()["id"]
+    r = client.patch(f"/comuneros/{cid}", json={"datos_dinamicos": {"trg_zona": "S"}}, headers=headers)
+    assert r.status_code == 200, r.text
+    assert client.delete(f"/comuneros/{cid}", headers=headers).status_code == 204
+
+    # un log por escritura (el del trigger; registrar_log no duplica)
+    logs = _logs(db, cid)
+    assert [(l.accion.name, l.version, l.usuario_id) for l in logs] == [
+        ("CREAR", 1, admin.id), ("EDITAR", 2, admin.id), ("ELIMINAR", 3, admin.id),
+    ]
+    assert logs[1].cambios["datos_dinamicos.trg_zona"] == {"de": "N", "a": "S"}
+    assert logs[1].cambios == diff_snapshots(logs[1].datos_anteriores, logs[1].datos_nuevos)
+    assert logs[2].datos_nuevos["is_deleted"] is True
+
+    # INSERT / UPDATE set-based fuera del CRUD: auditados igual, en cada transacción nueva
+    db.rollback()
+    otros = [Comunero(nombre=f"Masivo {i}", documento=f"TRG-M{i}", creado_por=admin.id) for i in range(3)]
+    db.add_all(otros)
+    db.commit()
+    auditar_como(db, admin.id)
+    db.execute(update(Comunero).where(Comunero.documento.like("TRG-M%")).values(nombre="Renombrado"))
+    db.commit()
+    db.execute(update(Comunero).where(Comunero.documento.like("TRG-M%")).values(nombre="Otra vez"))
+    db.commit()
+    for c in otros:
+        logs = _logs(db, c.id)
+        assert [l.accion.name for l in logs] == ["CREAR", "EDITAR", "EDITAR"]
+        assert _sin_updated_at(logs[2].cambios) == {"nombre": {"de": "Renombrado", "a": "Otra vez"}}
+
+
+def test_trigger_modo_diff(db, monkeypatch):
+    monkeypatch.setattr(settings, "AUDITORIA_BACKEND", "trigger")
+    monkeypatch.setattr(settings, "AUDITORIA_MODO", "diff")
+    monkeypatch.setattr(settings, "AUDITORIA_CHECKPOINT_CADA", 2)
+    admin = create_user(db, "admin@test.com", RolEnum.ADMIN)
+
+    auditar_como(db, admin.id)
+    c = Comunero(nombre="Diff", documento="TRG-D1", datos_dinamicos={"a": 1, "b": {"x": 1}}, creado_por=admin.id)
+    db.add(c)
+    db.commit()
+    for datos in ({"a": 2, "b": {"x": 1}}, {"b": {"x": 2, "y": 3}}):
+        db.execute(update(Comunero).where(Comunero.id == c.id).values(datos_dinamicos=datos))
+        db.commit()
+
+    v1, v2, v3 = _logs(db, c.id)
+    assert v2.datos_anteriores is None and v2.datos_nuevos is None  # solo cambios
+    assert _sin_updated_at(v2.cambios) == {"datos_dinamicos.a": {"de": 1, "a": 2}}
+    assert v3.datos_nuevos is not None  # checkpoint cada 2
+    assert _sin_updated_at(v3.cambios) == {
+        "datos_dinamicos.a": {"de": 2},
+        "datos_dinamicos.b": {"de": {"x": 1}, "a": {"x": 2, "y": 3}},
+    }
+    # la reconstrucción de log_crud lee igual lo que escribe el trigger
+    assert expandir_logs(db, [v2])[v2.id][1]["datos_dinamicos"] == {"a": 2, "b": {"x": 1}}
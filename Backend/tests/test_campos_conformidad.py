@@ -0,0 +1,92 @@
+from sqlalchemy import select
+
+from app.config import settings
+from app.models.campos_formulario import CampoFormulario
+from app.models.comunero import Comunero
+from app.models.log_auditoria import LogAuditoria
+from app.models.usuario import RolEnum
+from tests.utils import create_user, login
+
+
+def test_conformidad_reporta_y_remapea(client, db, monkeypatch):
+    monkeypatch.setattr(settings, "CONFORMIDAD_PAUSA_MS", 0)
+    user = create_user(db, "admin@test.com", RolEnum.ADMIN)
+    token = login(client, "admin@test.com")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    r = client.post(
+        "/campos",
+        json={"nombre_campo": "conf_color", "tipo": "select", "opciones": {"values": ["rojo", "verde", "azul"]}},
+        headers=headers,
+    )
+    assert r.status_code == 201, r.text
+    campo_id = r.json()["id"]
+
+    comuneros = [
+        Comunero(nombre=f"Conf {i}", documento=f"CONF-{i}", datos_dinamicos=datos, creado_por=user.id)
+        for i, datos in enumerate(
+            [{"conf_color": "rojo"}, {"conf_color": "azul"}, {"conf_color": "azul"}, {}], start=1
+        )
+    ]
+    db.add_all(comuneros)
+    db.commit()
+    ids = [c.id for c in comuneros]
+
+    try:
+        # "azul" deja de ser opción -> el PUT dispara el reporte (sin corregir)
+        r = client.put(
+            f"/campos/{campo_id}",
+            json={"opciones": {"values": ["rojo", "verde", "celeste"]}},
+            headers=headers,
+        )
+        assert r.status_code == 200, r.text
+        trabajo = client.get(f"/trabajos/{r.headers['x-trabajo-id']}", headers=headers).json()
+        assert trabajo["tipo"] == "conformidad_campo"
+        assert trabajo["estado"] == "completado", trabajo
+        res = trabajo["resultado"]
+        assert res["por_codigo"] == {"OPCION_INVALIDA": 2}
+        assert res["corregidos"] == 0
+        assert {m["documento"] for m in res["muestras"]} == {"CONF-2", "CONF-3"}
+        assert trabajo["procesados"] == trabajo["total"]
+
+        # un PUT que no toca la definición no dispara nada
+        r = client.put(f"/campos/{campo_id}", json={"indexado": False}, headers=headers)
+        assert "x-trabajo-id" not in r.headers
+
+        # destino del remapeo inválido -> 400 antes de encolar
+        r = client.post(f"/campos/{campo_id}/conformidad", json={"aplicar": True, "remapeo": {"azul": "negro"}}, headers=headers)
+        assert r.status_code == 400
+
+        r = client.post(
+            f"/campos/{campo_id}/conformidad",
+            json={"aplicar": True, "remapeo": {"azul": "celeste"}},
+            headers=headers,
+        )
+        assert r.status_code == 202, r.text
+        trabajo = client.get(f"/trabajos/{r.json()['id']}", headers=headers).json()
+        assert trabajo["estado"] == "completado", trabajo
+        assert trabajo["resultado"]["corregidos"] == 2
+        assert trabajo["afectados"] == 2
+
+        db.expire_all()
+        valores = [db.get(Comunero, i).datos_dinamicos for i in ids]
+        assert valores == [{"conf_color": "rojo"}, {"conf_color": "celeste"}, {"conf_color": "celeste"}, {}]
+
+        log = db.execute(
+            select(LogAuditoria).where(LogAuditoria.entidad == "comuneros", LogAuditoria.entidad_id == ids[1])
+        ).scalar_one()
+        assert log.accion.name == "EDITAR"
+        assert log.datos_anteriores["datos_dinamicos"] == {"conf_color": "azul"}
+        assert log.datos_nuevos["datos_dinamicos"] == {"conf_color": "celeste"}
+
+        # obligatorio: las filas sin el campo se reportan
+        r = client.put(f"/campos/{campo_id}", json={"obligatorio": True}, headers=headers)
+        trabajo = client.get(f"/trabajos/{r.headers['x-trabajo-id']}", headers=headers).json()
+        assert trabajo["resultado"]["por_codigo"].get("OBLIGATORIO", 0) >= 1
+        assert "OPCION_INVALIDA" not in trabajo["resultado"]["por_codigo"]
+    finally:
+        # no dejar un campo obligatorio activo para el resto de la suite
+        campo = db.get(CampoFormulario, campo_id)
+        campo.obligatorio = False
+        campo.activo = False
+        db.commit()
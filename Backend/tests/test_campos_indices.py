@@ -0,0 +1,56 @@
+from sqlalchemy import text
+
+from app.models.usuario import RolEnum
+from app.utils.indices_campos import nombre_indice_campo
+from tests.utils import create_user, login
+
+
+def _indexdef(db, campo_id):
+    return db.execute(
+        text("SELECT indexdef FROM pg_indexes WHERE indexname = :n"),
+        {"n": nombre_indice_campo(campo_id)},
+    ).scalar_one_or_none()
+
+
+def test_indexado_crea_y_borra_indice(client, db):
+    create_user(db, "admin@test.com", RolEnum.ADMIN)
+    headers = {"Authorization": f"Bearer {login(client, 'admin@test.com')}"}
+
+    r = client.post(
+        "/campos",
+        json={"nombre_campo": "edad 50%'", "tipo": "number", "indexado": True},
+        headers=headers,
+    )
+    assert r.status_code == 201
+    campo_id = r.json()["id"]
+
+    indexdef = _indexdef(db, campo_id)
+    assert indexdef is not None
+    assert "'edad 50%'''::text" in indexdef
+    assert "cv_numero(" in indexdef
+    assert "WHERE (is_deleted = false)" in indexdef
+
+    r = client.put(f"/campos/{campo_id}", json={"indexado": False}, headers=headers)
+    assert r.status_code == 200
+    assert _indexdef(db, campo_id) is None
+
+    r = client.put(f"/campos/{campo_id}", json={"indexado": True, "tipo": "date"}, headers=headers)
+    assert r.status_code == 200
+    assert "cv_fecha" in _indexdef(db, campo_id)
+
+    # desactivar el campo también borra el índice
+    r = client.delete(f"/campos/{campo_id}", headers=headers)
+    assert r.status_code == 204
+    assert _indexdef(db, campo_id) is None
+
+
+def test_multiselect_no_indexable_400(client, db):
+    create_user(db, "admin@test.com", RolEnum.ADMIN)
+    headers = {"Authorization": f"Bearer {login(client, 'admin@test.com')}"}
+
+    r = client.post(
+        "/campos",
+        json={"nombre_campo": "etiquetas_idx", "tipo": "multiselect", "indexado": True},
+        headers=headers,
+    )
+    assert r.status_code == 400
@@ -0,0 +1,80 @@
+import csv
+import io
+
+from sqlalchemy import text
+
+from app.models.comunero import Comunero, ComuneroArchivo
+from app.models.usuario import RolEnum
+from tests.utils import create_user, login
+
+
+def test_archivar_exportar_y_restaurar(client, db):
+    user = create_user(db, "admin@test.com", RolEnum.ADMIN)
+    token = login(client, "admin@test.com")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    viejo = Comunero(nombre="Archivable", documento="ARCH-1", datos_dinamicos={}, creado_por=user.id, is_deleted=True)
+    reciente = Comunero(nombre="Reciente", documento="ARCH-2", datos_dinamicos={}, creado_por=user.id, is_deleted=True)
+    db.add_all([viejo, reciente])
+    db.commit()
+    viejo_id, reciente_id = viejo.id, reciente.id
+    db.execute(text("UPDATE comuneros SET updated_at = now() - interval '100 days' WHERE id = :id"), {"id": viejo_id})
+    db.commit()
+
+    r = client.post("/comuneros/archivo?dias=30", headers=headers)
+    assert r.status_code == 202, r.text
+    trabajo = client.get(f"/trabajos/{r.json()['id']}", headers=headers).json()
+    assert trabajo["estado"] == "completado", trabajo
+    assert trabajo["resultado"]["archivados"] >= 1
+
+    db.expire_all()
+    assert db.get(Comunero, viejo_id) is None
+    assert db.get(ComuneroArchivo, viejo_id).documento == "ARCH-1"
+    assert db.get(Comunero, reciente_id) is not None  # todavía no cumple los 30 días
+
+    # exportación con eliminados sigue viéndolo
+    r = client.get("/exportaciones/comuneros?include_deleted=true", headers=headers)
+    filas = list(csv.DictReader(io.StringIO(r.content.decode("utf-8-sig"))))
+    assert "ARCH-1" in {f["documento"] for f in filas}
+
+    # restaurar por id lo devuelve a la tabla viva
+    r = client.post("/comuneros/bulk/restaurar", json={"ids": [viejo_id]}, headers=headers)
+    trabajo = client.get(f"/trabajos/{r.json()['id']}", headers=headers).json()
+    assert trabajo["resultado"] == {"afectados": 1, "desarchivados": 1, "no_desarchivados": []}
+
+    db.expire_all()
+    assert db.get(ComuneroArchivo, viejo_id) is None
+    restaurado = db.get(Comunero, viejo_id)
+    assert restaurado.is_deleted is False
+    assert restaurado.documento == "ARCH-1"
+
+
+def test_restaurar_archivado_con_documento_reusado(client, db):
+    user_id = create_user(db, "admin@test.com", RolEnum.ADMIN).id
+    headers = {"Authorization": f"Bearer {login(client, 'admin@test.com')}"}
+
+    viejo = Comunero(nombre="Viejo", documento="ARCH-REUSO", datos_dinamicos={}, creado_por=user_id, is_deleted=True)
+    db.add(viejo)
+    db.commit()
+    viejo_id = viejo.id
+    db.execute(text("UPDATE comuneros SET updated_at = now() - interval '100 days' WHERE id = :id"), {"id": viejo_id})
+    db.commit()
+    r = client.post("/comuneros/archivo?dias=30", headers=headers)
+    assert client.get(f"/trabajos/{r.json()['id']}", headers=headers).json()["estado"] == "completado"
+
+    # el documento se volvió a usar mientras estaba archivado
+    db.add(Comunero(nombre="Nuevo", documento="ARCH-REUSO", datos_dinamicos={}, creado_por=user_id))
+    db.commit()
+
+    r = client.post("/comuneros/bulk/restaurar", json={"ids": [viejo_id]}, headers=headers)
+    trabajo = client.get(f"/trabajos/{r.json()['id']}", headers=headers).json()
+    assert trabajo["estado"] == "completado", trabajo
+    assert trabajo["resultado"] == {
+        "afectados": 0,
+        "desarchivados": 0,
+        "no_desarchivados": [{"id": viejo_id, "documento": "ARCH-REUSO"}],
+    }
+
+    db.expire_all()
+    assert db.get(ComuneroArchivo, viejo_id) is not None
+    assert db.get(Comunero, viejo_id) is None
@@ -0,0 +1,132 @@
+import json
+
+from sqlalchemy import func, select
+
+from app.models.campos_formulario import CampoFormulario
+from app.models.comunero import Comunero
+from app.models.log_auditoria import LogAuditoria
+from app.models.usuario import Usuario, RolEnum
+from tests.utils import create_user, login
+
+
+def _setup(client, db):
+    create_user(db, "admin@test.com", RolEnum.ADMIN)
+    token = login(client, "admin@test.com")
+    if not db.execute(select(CampoFormulario).where(CampoFormulario.nombre_campo == "bulk_edad")).scalar_one_or_none():
+        db.add(CampoFormulario(nombre_campo="bulk_edad", tipo="int"))
+        db.commit()
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_bulk_parcial_reporta_por_fila(client, db):
+    headers = _setup(client, db)
+
+    db.add(Comunero(nombre="Existente", documento="BULK-EXISTE", datos_dinamicos={},
+                    creado_por=db.execute(select(Usuario.id)).scalars().first()))
+    db.commit()
+
+    registros = [{"nombre": f"Bulk {i}", "documento": f"BULK-P-{i}", "datos_dinamicos": {"bulk_edad": i}} for i in range(5)]
+    registros += [
+        {"nombre": "Malo", "documento": "BULK-MALO", "datos_dinamicos": {"bulk_edad": "x"}},
+        {"nombre": "Repetido", "documento": "BULK-P-0", "datos_dinamicos": {}},
+        {"nombre": "Ya estaba", "documento": "BULK-EXISTE", "datos_dinamicos": {}},
+        {"documento": "BULK-SIN-NOMBRE"},
+    ]
+
+    r = client.post("/comuneros/bulk", json=registros, headers=headers)
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert (body["total"], body["insertados"], body["errores"]) == (9, 5, 4)
+
+    por_fila = {x["fila"]: x for x in body["resultados"]}
+    assert all(por_fila[i]["ok"] and por_fila[i]["id"] for i in range(1, 6))
+    assert por_fila[6]["code"] == "VALIDACION"
+    assert por_fila[7]["code"] == "DOCUMENTO_DUPLICADO"
+    assert por_fila[8]["code"] == "DOCUMENTO_DUPLICADO"
+    assert por_fila[9]["code"] == "VALIDACION"
+
+    ids = [por_fila[i]["id"] for i in range(1, 6)]
+    assert db.execute(select(func.count()).where(Comunero.id.in_(ids))).scalar_one() == 5
+    logs = db.execute(
+        select(func.count()).where(LogAuditoria.entidad == "comuneros", LogAuditoria.entidad_id.in_(ids))
+    ).scalar_one()
+    assert logs == 5
+
+
+def test_bulk_atomico_no_escribe_nada(client, db):
+    headers = _setup(client, db)
+
+    registros = [
+        {"nombre": "Atomico 1", "documento": "BULK-A-1", "datos_dinamicos": {}},
+        {"nombre": "Atomico 2", "documento": "BULK-A-1", "datos_dinamicos": {}},
+    ]
+    r = client.post("/comuneros/bulk?modo=atomico", json=registros, headers=headers)
+    assert r.status_code == 400
+    assert r.json()["insertados"] == 0
+    assert db.execute(select(func.count()).where(Comunero.documento == "BULK-A-1")).scalar_one() == 0
+
+    r = client.post("/comuneros/bulk?modo=atomico", json=registros[:1], headers=headers)
+    assert r.status_code == 200
+    assert r.json()["insertados"] == 1
+
+
+def test_bulk_ndjson(client, db):
+    headers = _setup(client, db)
+
+    lineas = [json.dumps({"nombre": f"Nd {i}", "documento": f"BULK-ND-{i}"}) for i in range(3)]
+    cuerpo = "\n".join(lineas[:2] + ["{no es json", "", lineas[2]]) + "\n"
+
+    r = client.post(
+        "/comuneros/bulk",
+        content=cuerpo.encode(),
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    )
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert (body["total"], body["insertados"]) == (4, 3)
+    assert body["resultados"][2]["code"] == "VALIDACION"
+
+
+def test_upsert_por_documento(client, db):
+    headers = _setup(client, db)
+
+    r = client.put("/comuneros/by-documento/UPS-1", json={"nombre": "Upsert", "datos_dinamicos": {"bulk_edad": 40}}, headers=headers)
+    assert r.status_code == 201, r.text
+    cid = r.json()["id"]
+
+    r = client.put("/comuneros/by-documento/UPS-1", json={"nombre": "Upsert 2", "datos_dinamicos": {"bulk_edad": 41}}, headers=headers)
+    assert r.status_code == 200
+    assert (r.json()["id"], r.json()["nombre"]) == (cid, "Upsert 2")
+
+    # sin cambios: no se reescribe ni se audita
+    r = client.put("/comuneros/by-documento/UPS-1", json={"nombre": "Upsert 2", "datos_dinamicos": {"bulk_edad": 41}}, headers=headers)
+    assert r.status_code == 200
+
+    acciones = db.execute(
+        select(LogAuditoria.accion).where(LogAuditoria.entidad == "comuneros", LogAuditoria.entidad_id == cid)
+        .order_by(LogAuditoria.id)
+    ).scalars().all()
+    assert [a.name for a in acciones] == ["CREAR", "EDITAR"]
+
+    r = client.put("/comuneros/by-documento/UPS-2", json={"nombre": "X", "datos_dinamicos": {"bulk_edad": "x"}}, headers=headers)
+    assert r.status_code == 400
+
+
+def test_bulk_upsert(client, db):
+    headers = _setup(client, db)
+
+    client.post("/comuneros/bulk", json=[{"nombre": "Viejo", "documento": "UPS-B-1"}], headers=headers)
+
+    registros = [
+        {"nombre": "Nuevo nombre", "documento": "UPS-B-1"},
+        {"nombre": "Otro", "documento": "UPS-B-2"},
+    ]
+    r = client.post("/comuneros/bulk?si_existe=actualizar", json=registros, headers=headers)
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert (body["insertados"], body["actualizados"], body["errores"]) == (1, 1, 0)
+    assert [x["accion"] for x in body["resultados"]] == ["EDITAR", "CREAR"]
+
+    c = db.execute(select(Comunero).where(Comunero.documento == "UPS-B-1")).scalar_one()
+    db.refresh(c)
+    assert c.nombre == "Nuevo nombre"
@@ -0,0 +1,67 @@
+import json
+
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.models.campos_formulario import CampoFormulario
+from app.models.comunero import Comunero
+from app.models.log_auditoria import LogAuditoria
+from app.models.usuario import RolEnum
+from tests.utils import create_user, login
+
+
+def test_bulk_eliminar_y_restaurar_por_filtro(client, db, monkeypatch):
+    user = create_user(db, "admin@test.com", RolEnum.ADMIN)
+    token = login(client, "admin@test.com")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    if not db.execute(select(CampoFormulario).where(CampoFormulario.nombre_campo == "lote_import")).scalar_one_or_none():
+        db.add(CampoFormulario(nombre_campo="lote_import", tipo="text"))
+    for i in range(7):
+        db.add(Comunero(nombre=f"Masivo {i}", documento=f"MAS-{i}",
+                        datos_dinamicos={"lote_import": "malo" if i < 5 else "bueno"}, creado_por=user.id))
+    db.commit()
+
+    # chunks chicos: varios commits dentro del mismo trabajo
+    monkeypatch.setattr(settings, "BULK_BATCH_SIZE", 2)
+
+    seleccion = {"filtros_and": {"lote_import": "malo"}}
+    r = client.post("/comuneros/bulk/eliminar", json=seleccion, headers=headers)
+    assert r.status_code == 202, r.text
+    trabajo = client.get(f"/trabajos/{r.json()['id']}", headers=headers).json()
+    assert trabajo["estado"] == "completado", trabajo
+    assert (trabajo["total"], trabajo["procesados"], trabajo["afectados"]) == (5, 5, 5)
+
+    filtros = json.dumps({"lote_import": "malo"})
+    assert client.get(f"/comuneros?filtros_and={filtros}", headers=headers).json() == []
+
+    ids = db.execute(select(Comunero.id).where(Comunero.documento.like("MAS-%"))).scalars().all()
+    logs = db.execute(
+        select(func.count()).where(LogAuditoria.entidad_id.in_(ids), LogAuditoria.accion == "ELIMINAR")
+    ).scalar_one()
+    assert logs == 5
+
+    # restaurar por ids (solo 2)
+    malos = db.execute(
+        select(Comunero.id).where(Comunero.documento.in_(["MAS-0", "MAS-1"]))
+    ).scalars().all()
+    r = client.post("/comuneros/bulk/restaurar", json={"ids": malos}, headers=headers)
+    trabajo = client.get(f"/trabajos/{r.json()['id']}", headers=headers).json()
+    assert trabajo["afectados"] == 2
+    assert len(client.get(f"/comuneros?filtros_and={filtros}", headers=headers).json()) == 2
+
+
+def test_bulk_eliminar_requiere_criterio_y_admin(client, db):
+    create_user(db, "admin@test.com", RolEnum.ADMIN)
+    create_user(db, "operador@test.com", RolEnum.OPERADOR)
+
+    admin = {"Authorization": f"Bearer {login(client, 'admin@test.com')}"}
+    oper = {"Authorization": f"Bearer {login(client, 'operador@test.com')}"}
+
+    assert client.post("/comuneros/bulk/eliminar", json={}, headers=admin).status_code == 422
+    assert client.post("/comuneros/bulk/eliminar", json={"filtros_and": {"no_existe": {"gte": 1}}}, headers=admin).status_code == 400
+    assert client.post("/comuneros/bulk/eliminar", json={"ids": [1]}, headers=oper).status_code == 403
+    for url in ("/comuneros/bulk/restaurar", "/comuneros/archivo"):
+        r = client.post(url, json={"ids": [1]}, headers=oper)
+        assert r.status_code == 403
+        assert r.json()["detail"] == "Solo administradores"
@@ -0,0 +1,65 @@
+from sqlalchemy import select, text
+
+from app.models.comunero import Comunero
+from app.utils.conteo import Explain
+from app.utils.filtros import condiciones_dinamicas
+
+N_FILAS = 200_000
+
+
+def _plan(db, stmt) -> str:
+    return "\n".join(r[0] for r in db.execute(Explain(stmt)))
+
+
+def test_filtros_and_usan_gin_containment(db):
+    """
+    Antes: datos_dinamicos->>'k' = 'v' por clave -> Seq Scan.
+    Después: un solo `@>` -> Bitmap Index Scan sobre el GIN jsonb_path_ops.
+    Todo en una transacción que se revierte (no ensucia la DB de pruebas).
+    """
+    try:
+        user_id = db.execute(text(
+            "INSERT INTO usuarios (email, nombre, hashed_password, rol, activo, created_at, updated_at) "
+            "VALUES ('explain@test.com', 'explain', 'x', 'OPERADOR', true, now(), now()) RETURNING id"
+        )).scalar_one()
+
+        db.execute(text(
+            "INSERT INTO campos_formulario (nombre_campo, tipo, obligatorio, orden, activo, created_at, updated_at) "
+            "VALUES ('zona', 'select', false, 0, true, now(), now()), ('sexo', 'select', false, 0, true, now(), now()) "
+            "ON CONFLICT (nombre_campo) DO NOTHING"
+        ))
+        db.execute(
+            text(
+                "INSERT INTO comuneros (nombre, documento, datos_dinamicos, creado_por) "
+                "SELECT 'Seed ' || i, 'SEED-' || i, "
+                "jsonb_build_object('zona', 'Z' || (i % 500), 'sexo', CASE WHEN i % 2 = 0 THEN 'M' ELSE 'F' END), "
+                ":uid FROM generate_series(1, :n) AS i"
+            ),
+            {"uid": user_id, "n": N_FILAS},
+        )
+        db.execute(text("ANALYZE comuneros"))
+
+        filtros = {"zona": "Z7", "sexo": "F"}
+
+        antes = select(Comunero.id).where(
+            Comunero.is_deleted == False,  # noqa: E712  (empata los índices parciales)
+            *[Comunero.datos_dinamicos[k].astext == str(v) for k, v in filtros.items()],
+        )
+        despues = select(Comunero.id).where(
+            Comunero.is_deleted == False,  # noqa: E712  (empata los índices parciales)
+            *condiciones_dinamicas(db, filtros_and=filtros),
+        )
+
+        plan_antes = _plan(db, antes)
+        plan_despues = _plan(db, despues)
+
+        assert "Seq Scan on comuneros" in plan_antes
+        assert "ix_comuneros_datos_dinamicos_gin" not in plan_antes
+
+        assert "ix_comuneros_datos_dinamicos_gin" in plan_despues
+        assert "Seq Scan on comuneros" not in plan_despues
+
+        # mismo resultado que el predicado antiguo
+        assert sorted(db.execute(antes).scalars()) == sorted(db.execute(despues).scalars())
+    finally:
+        db.rollback()
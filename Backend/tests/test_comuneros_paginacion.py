@@ -0,0 +1,102 @@
+import json
+
+from sqlalchemy import select
+
+from app.models.campos_formulario import CampoFormulario
+from app.models.comunero import Comunero
+from app.models.usuario import RolEnum
+from tests.utils import create_user, login
+
+
+def test_cursor_pagination_matches_offset(client, db):
+    user = create_user(db, "admin@test.com", RolEnum.ADMIN)
+    token = login(client, "admin@test.com")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    if not db.execute(select(CampoFormulario).where(CampoFormulario.nombre_campo == "lote")).scalar_one_or_none():
+        db.add(CampoFormulario(nombre_campo="lote", tipo="text"))
+
+    for i in range(5):
+        db.add(
+            Comunero(
+                nombre=f"Paginado {i}",
+                documento=f"PAG-{i}",
+                datos_dinamicos={"lote": "paginacion"},
+                creado_por=user.id,
+            )
+        )
+    db.commit()
+
+    filtros = json.dumps({"lote": "paginacion"})
+
+    r = client.get(f"/comuneros?limit=5&filtros_and={filtros}", headers=headers)
+    assert r.status_code == 200
+    esperado = [c["id"] for c in r.json()]
+    assert len(esperado) == 5
+
+    vistos = []
+    cursor = None
+    while True:
+        url = f"/comuneros?limit=2&filtros_and={filtros}"
+        if cursor:
+            url += f"&cursor={cursor}"
+        r = client.get(url, headers=headers)
+        assert r.status_code == 200
+        vistos += [c["id"] for c in r.json()]
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert vistos == esperado
+
+
+def test_cursor_invalido_400(client, db):
+    create_user(db, "admin@test.com", RolEnum.ADMIN)
+    token = login(client, "admin@test.com")
+
+    r = client.get(
+        "/comuneros?cursor=no-es-un-cursor",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert r.status_code == 400
+
+
+def test_total_count_approx_y_exact(client, db):
+    create_user(db, "admin@test.com", RolEnum.ADMIN)
+    token = login(client, "admin@test.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    filtros = json.dumps({"lote": "paginacion"})
+
+    r = client.get(f"/comuneros?limit=1&total=exact&filtros_and={filtros}", headers=headers)
+    assert r.status_code == 200
+    assert r.headers["X-Total-Count-Type"] == "exact"
+    assert int(r.headers["X-Total-Count"]) == 5
+
+    r = client.get(f"/comuneros?limit=1&filtros_and={filtros}", headers=headers)
+    assert r.headers["X-Total-Count-Type"] == "approx"
+    assert int(r.headers["X-Total-Count"]) >= 0
+
+    r = client.get("/comuneros?limit=1&total=none", headers=headers)
+    assert "X-Total-Count" not in r.headers
+
+
+def test_sparse_fields(client, db):
+    create_user(db, "admin@test.com", RolEnum.ADMIN)
+    token = login(client, "admin@test.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    filtros = json.dumps({"lote": "paginacion"})
+
+    r = client.get(f"/comuneros?limit=2&fields=nombre,datos.lote&filtros_and={filtros}", headers=headers)
+    assert r.status_code == 200
+    items = r.json()
+    assert len(items) == 2
+    assert set(items[0]) == {"nombre", "datos_dinamicos"}
+    assert items[0]["datos_dinamicos"] == {"lote": "paginacion"}
+
+    # el cursor sigue funcionando aunque no se pidan id/created_at
+    cursor = r.headers["X-Next-Cursor"]
+    r2 = client.get(f"/comuneros?limit=2&fields=id&filtros_and={filtros}&cursor={cursor}", headers=headers)
+    assert r2.status_code == 200 and len(r2.json()) == 2
+
+    r = client.get("/comuneros?fields=id,password", headers=headers)
+    assert r.status_code == 400
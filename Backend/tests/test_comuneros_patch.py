@@ -0,0 +1,66 @@
+from sqlalchemy import func, select
+
+from app.models.campos_formulario import CampoFormulario
+from app.models.comunero import Comunero
+from app.models.log_auditoria import LogAuditoria
+from app.models.usuario import RolEnum
+from tests.utils import create_user, login
+
+
+def _logs(db, comunero_id):
+    return db.execute(
+        select(func.count()).where(LogAuditoria.entidad == "comuneros", LogAuditoria.entidad_id == comunero_id)
+    ).scalar_one()
+
+
+def test_patch_merge_noop_y_validacion(client, db):
+    user = create_user(db, "admin@test.com", RolEnum.ADMIN)
+    token = login(client, "admin@test.com")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    for nombre, tipo in (("patch_zona", "text"), ("patch_edad", "int")):
+        if not db.execute(select(CampoFormulario).where(CampoFormulario.nombre_campo == nombre)).scalar_one_or_none():
+            db.add(CampoFormulario(nombre_campo=nombre, tipo=tipo))
+    c = Comunero(nombre="Patch", documento="PATCH-1",
+                 datos_dinamicos={"patch_zona": "A", "patch_edad": 30}, creado_por=user.id)
+    db.add(c)
+    db.commit()
+
+    # merge: cambia una clave, borra otra, deja el resto
+    r = client.patch(f"/comuneros/{c.id}", json={"datos_dinamicos": {"patch_zona": "B", "patch_edad": None}}, headers=headers)
+    assert r.status_code == 200, r.text
+    assert r.json()["datos_dinamicos"] == {"patch_zona": "B"}
+    assert r.json()["nombre"] == "Patch"
+    assert _logs(db, c.id) == 1
+
+    log = db.execute(select(LogAuditoria).where(LogAuditoria.entidad_id == c.id)).scalar_one()
+    assert log.datos_anteriores["datos_dinamicos"] == {"patch_zona": "A", "patch_edad": 30}
+    assert log.datos_nuevos["datos_dinamicos"] == {"patch_zona": "B"}
+
+    # no-op: mismo valor -> sin UPDATE ni log
+    r = client.patch(f"/comuneros/{c.id}", json={"nombre": "Patch", "datos_dinamicos": {"patch_zona": "B"}}, headers=headers)
+    assert r.status_code == 200
+    assert _logs(db, c.id) == 1
+
+    # validación solo de lo tocado
+    r = client.patch(f"/comuneros/{c.id}", json={"datos_dinamicos": {"patch_edad": "x"}}, headers=headers)
+    assert r.status_code == 400
+    r = client.patch(f"/comuneros/{c.id}", json={"datos_dinamicos": {"no_existe": 1}}, headers=headers)
+    assert r.status_code == 400
+
+    r = client.patch("/comuneros/99999999", json={"nombre": "X"}, headers=headers)
+    assert r.status_code == 404
+
+
+def test_patch_documento_duplicado_409(client, db):
+    user = create_user(db, "admin@test.com", RolEnum.ADMIN)
+    token = login(client, "admin@test.com")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    a = Comunero(nombre="A", documento="PATCH-DUP-A", datos_dinamicos={}, creado_por=user.id)
+    b = Comunero(nombre="B", documento="PATCH-DUP-B", datos_dinamicos={}, creado_por=user.id)
+    db.add_all([a, b])
+    db.commit()
+
+    r = client.patch(f"/comuneros/{b.id}", json={"documento": "PATCH-DUP-A"}, headers=headers)
+    assert r.status_code == 409
@@ -0,0 +1,96 @@
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.exc import DBAPIError
+
+from app.models.comunero import Comunero
+from app.models.usuario import RolEnum
+from tests.utils import create_user, login
+
+
+@pytest.fixture()
+def pg_trgm(db):
+    try:
+        db.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        db.commit()
+    except DBAPIError:
+        db.rollback()
+        pytest.skip("pg_trgm no disponible en la DB de pruebas")
+
+
+def test_search_fuzzy_rankeado_y_paginado(client, db, pg_trgm):
+    user = create_user(db, "admin@test.com", RolEnum.ADMIN)
+    headers = {"Authorization": f"Bearer {login(client, 'admin@test.com')}"}
+
+    for nombre, documento in [
+        ("Juan Quispe Mamani", "SRCH-70112233"),
+        ("Rosa Quispe Huaman", "SRCH-70445566"),
+        ("Pedro Condori", "SRCH-70778899"),
+    ]:
+        if not db.execute(select(Comunero).where(Comunero.documento == documento)).scalar_one_or_none():
+            db.add(Comunero(nombre=nombre, documento=documento, creado_por=user.id))
+    db.commit()
+
+    # error de tipeo
+    r = client.get("/comuneros/search?q=Qispe", headers=headers)
+    assert r.status_code == 200
+    nombres = [c["nombre"] for c in r.json()]
+    assert "Juan Quispe Mamani" in nombres and "Rosa Quispe Huaman" in nombres
+    assert "Pedro Condori" not in nombres
+
+    # infix en documento
+    r = client.get("/comuneros/search?q=4455", headers=headers)
+    assert [c["documento"] for c in r.json()] == ["SRCH-70445566"]
+
+    # keyset: 1 por página recorre lo mismo que una página completa
+    completo = [c["id"] for c in client.get("/comuneros/search?q=Quispe", headers=headers).json()]
+    vistos, cursor = [], None
+    while True:
+        url = "/comuneros/search?q=Quispe&limit=1" + (f"&cursor={cursor}" if cursor else "")
+        r = client.get(url, headers=headers)
+        vistos += [c["id"] for c in r.json()]
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert vistos == completo
+
+
+def test_search_keyset_con_empates_en_score_fraccionario(client, db, pg_trgm):
+    user = create_user(db, "admin@test.com", RolEnum.ADMIN)
+    headers = {"Authorization": f"Bearer {login(client, 'admin@test.com')}"}
+
+    # mismo nombre -> mismo score (real, no exacto en float8) para las 4 filas
+    documentos = [f"SRCH-EMP-{i}" for i in range(4)]
+    for documento in documentos:
+        if not db.execute(select(Comunero).where(Comunero.documento == documento)).scalar_one_or_none():
+            db.add(Comunero(nombre="Marcelino Huayta Flores", documento=documento, creado_por=user.id))
+    db.commit()
+
+    q = "Huaita"  # mal escrito: score fraccionario
+    score = db.execute(
+        text("SELECT word_similarity(:q, 'Marcelino Huayta Flores')"), {"q": q}
+    ).scalar_one()
+    assert 0 < score < 1
+
+    completo = [c["id"] for c in client.get(f"/comuneros/search?q={q}&limit=100", headers=headers).json()]
+    ids = {c.id for c in db.execute(select(Comunero).where(Comunero.documento.in_(documentos))).scalars()}
+    assert ids <= set(completo)
+
+    vistos, cursor = [], None
+    for _ in range(len(completo) + 1):  # tope: un cursor que no avanza no cuelga el test
+        url = f"/comuneros/search?q={q}&limit=1" + (f"&cursor={cursor}" if cursor else "")
+        r = client.get(url, headers=headers)
+        assert r.status_code == 200, r.text
+        vistos += [c["id"] for c in r.json()]
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert len(vistos) == len(set(vistos))  # sin repetidos
+    assert vistos == completo  # sin huecos, mismo orden
+
+
+def test_search_q_corto_422(client, db):
+    create_user(db, "admin@test.com", RolEnum.ADMIN)
+    headers = {"Authorization": f"Bearer {login(client, 'admin@test.com')}"}
+
+    r = client.get("/comuneros/search?q=ab", headers=headers)
+    assert r.status_code == 422
@@ -0,0 +1,89 @@
+from sqlalchemy import select
+
+from app.crud.comunero_crud import validar_lote_comuneros
+from app.models.campos_formulario import CampoFormulario
+from app.models.comunero import Comunero
+from app.models.usuario import RolEnum
+from tests.utils import create_user, login
+
+
+def _campos(db):
+    for nombre, tipo, obligatorio, opciones in (
+        ("val_zona", "select", False, {"values": ["A", "B"]}),
+        ("val_edad", "int", False, None),
+        ("val_activo", "boolean", False, None),
+    ):
+        if not db.execute(select(CampoFormulario).where(CampoFormulario.nombre_campo == nombre)).scalar_one_or_none():
+            db.add(CampoFormulario(nombre_campo=nombre, tipo=tipo, obligatorio=obligatorio, opciones=opciones))
+    db.commit()
+
+
+def test_validate_reporta_todos_los_errores(client, db):
+    user = create_user(db, "admin@test.com", RolEnum.ADMIN)
+    token = login(client, "admin@test.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    _campos(db)
+    db.add(Comunero(nombre="Ya", documento="VAL-EXISTE", datos_dinamicos={}, creado_por=user.id))
+    db.commit()
+
+    registros = [
+        {"nombre": "Ok", "documento": "VAL-1", "datos_dinamicos": {"val_zona": "A", "val_edad": 3}},
+        {"nombre": "Malo", "documento": "VAL-2",
+         "datos_dinamicos": {"val_zona": "Z", "val_edad": "x", "val_activo": 1, "otra": 1}},
+        {"documento": 5},
+        "no soy objeto",
+        {"nombre": "Dup", "documento": "VAL-1"},
+        {"nombre": "Existe", "documento": "VAL-EXISTE"},
+    ]
+    total_antes = db.execute(select(Comunero.id)).all()
+
+    r = client.post("/comuneros/validate", json=registros, headers=headers)
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert (body["total"], body["validos"], body["invalidos"]) == (6, 1, 5)
+
+    filas = {f["fila"]: f for f in body["filas"]}
+    assert 1 not in filas
+    assert [(e["campo"], e["code"]) for e in filas[2]["errores"]] == [
+        ("otra", "NO_PERMITIDO"),
+        ("val_zona", "OPCION_INVALIDA"),
+        ("val_edad", "TIPO"),
+        ("val_activo", "TIPO"),
+    ]
+    assert {e["campo"] for e in filas[3]["errores"]} == {"nombre", "documento"}
+    assert all(e["code"] == "VALIDACION" for e in filas[3]["errores"])
+    assert filas[4]["errores"][0]["campo"] == ""
+    assert filas[5]["errores"] == [
+        {"campo": "documento", "code": "DOCUMENTO_DUPLICADO", "error": "Documento repetido dentro del lote"}
+    ]
+    assert filas[6]["errores"][0]["error"] == "Documento ya registrado"
+
+    # con actualizar, el existente no es error
+    r = client.post("/comuneros/validate?si_existe=actualizar", json=registros, headers=headers)
+    assert 6 not in {f["fila"] for f in r.json()["filas"]}
+
+    # NDJSON, igual que /bulk
+    r = client.post(
+        "/comuneros/validate",
+        content=b'{"nombre":"N","documento":"VAL-N"}\n{roto\n',
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    )
+    assert r.json()["invalidos"] == 1
+
+    # dry-run: nada se escribió
+    assert db.execute(select(Comunero.id)).all() == total_antes
+
+
+def test_validate_100k_filas(db):
+    _campos(db)
+    registros = [
+        {
+            "nombre": f"N{i}",
+            "documento": f"VAL-PERF-{i}",
+            "datos_dinamicos": {"val_zona": "AB"[i % 2] if i % 1000 else "Q", "val_edad": i % 90, "val_activo": True},
+        }
+        for i in range(100_000)
+    ]
+    res = validar_lote_comuneros(db, registros)
+    assert res["invalidos"] == 100
+    assert res["filas"][0]["errores"][0]["code"] == "OPCION_INVALIDA"
@@ -0,0 +1,20 @@
+from app.config import pool_engine, settings
+
+
+def _total(pool):
+    return pool["pool_size"] + pool["max_overflow"]
+
+
+def test_pools_respetan_el_presupuesto():
+    s = settings.model_copy(update={
+        "DB_MAX_CONEXIONES": 200, "DB_CONEXIONES_RESERVADAS": 20, "WEB_WORKERS": 4, "DB_POOL_FRACCION_ASYNC": 0.75,
+    })
+    sync, asincrono = pool_engine(s, asincrono=False), pool_engine(s, asincrono=True)
+    # 180 // 4 = 45 por worker: 34 async + 11 sync
+    assert (_total(asincrono), _total(sync)) == (34, 11)
+    assert (_total(asincrono) + _total(sync)) * s.WEB_WORKERS <= s.DB_MAX_CONEXIONES - s.DB_CONEXIONES_RESERVADAS
+
+    # presupuesto que no alcanza: igual queda al menos 1 + 1 por engine
+    chico = settings.model_copy(update={"DB_MAX_CONEXIONES": 12, "DB_CONEXIONES_RESERVADAS": 10, "WEB_WORKERS": 8})
+    assert pool_engine(chico, asincrono=False) == {"pool_size": 1, "max_overflow": 1}
+    assert pool_engine(chico, asincrono=True) == {"pool_size": 1, "max_overflow": 1}
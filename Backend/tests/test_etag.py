@@ -0,0 +1,66 @@
+from app.models.comunero import Comunero
+from app.models.usuario import RolEnum
+from app.models.version_tabla import VersionTabla
+from app.utils.etag import versiones_tablas
+from tests.utils import create_user, login
+
+
+def test_listado_304_y_etag_nueva_tras_escritura(client, db):
+    user = create_user(db, "admin@test.com", RolEnum.ADMIN)
+    token = login(client, "admin@test.com")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    r1 = client.get("/comuneros?limit=5", headers=headers)
+    assert r1.status_code == 200
+    etag = r1.headers["etag"]
+    assert etag.startswith('W/"')
+
+    r2 = client.get("/comuneros?limit=5", headers={**headers, "If-None-Match": etag})
+    assert r2.status_code == 304
+    assert r2.content == b""
+    assert r2.headers["etag"] == etag
+
+    # otra query string -> otra representación
+    r3 = client.get("/comuneros?limit=6", headers={**headers, "If-None-Match": etag})
+    assert r3.status_code == 200
+
+    db.add(Comunero(nombre="ETag Nuevo", documento="ETAG-1", datos_dinamicos={}, creado_por=user.id))
+    db.commit()
+
+    r4 = client.get("/comuneros?limit=5", headers={**headers, "If-None-Match": etag})
+    assert r4.status_code == 200
+    assert r4.headers["etag"] != etag
+
+
+def test_campos_y_estadisticas_304(client, db):
+    create_user(db, "admin@test.com", RolEnum.ADMIN)
+    token = login(client, "admin@test.com")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    for url in ("/campos", "/estadisticas"):
+        r1 = client.get(url, headers=headers)
+        assert r1.status_code == 200
+        r2 = client.get(url, headers={**headers, "If-None-Match": r1.headers["etag"]})
+        assert r2.status_code == 304
+
+    # escribir en campos invalida /campos
+    etag = client.get("/campos", headers=headers).headers["etag"]
+    r = client.post(
+        "/campos",
+        json={"nombre_campo": "etag_campo", "tipo": "text"},
+        headers=headers,
+    )
+    assert r.status_code in (200, 201), r.text
+    r2 = client.get("/campos", headers={**headers, "If-None-Match": etag})
+    assert r2.status_code == 200
+
+
+def test_version_suma_los_shards(db):
+    # cada conexión incrementa su shard (pid mod SHARDS): la versión es la suma
+    db.add_all([
+        VersionTabla(tabla="etag_shards", shard=0, version=3),
+        VersionTabla(tabla="etag_shards", shard=7, version=2),
+    ])
+    db.flush()
+    assert versiones_tablas(db, ("etag_shards", "sin_filas")) == {"etag_shards": 5}
+    db.rollback()
@@ -0,0 +1,120 @@
+import json
+
+from sqlalchemy import select
+
+from app.models.campos_formulario import CampoFormulario
+from app.models.comunero import Comunero
+from app.models.usuario import RolEnum
+from tests.utils import create_user, login
+
+
+def _seed(db, user):
+    campos = {"dsl_edad": "number", "dsl_estado": "select", "dsl_alta": "date", "dsl_madre": "text"}
+    for nombre, tipo in campos.items():
+        if not db.execute(select(CampoFormulario).where(CampoFormulario.nombre_campo == nombre)).scalar_one_or_none():
+            db.add(CampoFormulario(nombre_campo=nombre, tipo=tipo))
+
+    filas = [
+        ("DSL-1", {"dsl_edad": 17, "dsl_estado": "activo", "dsl_alta": "2024-01-10", "dsl_madre": "Maria"}),
+        ("DSL-2", {"dsl_edad": 25, "dsl_estado": "pendiente", "dsl_alta": "2024-03-05", "dsl_madre": "Marta"}),
+        ("DSL-3", {"dsl_edad": 40, "dsl_estado": "baja", "dsl_alta": "2024-06-01"}),
+        ("DSL-4", {"dsl_edad": 30.5, "dsl_estado": "activo", "dsl_alta": "2025-01-01", "dsl_madre": "Rosa"}),
+    ]
+    for documento, datos in filas:
+        if not db.execute(select(Comunero).where(Comunero.documento == documento)).scalar_one_or_none():
+            db.add(Comunero(nombre=documento, documento=documento, datos_dinamicos=datos, creado_por=user.id))
+    db.commit()
+
+
+def _docs(client, headers, filtros_and=None, filtros_or=None):
+    url = "/comuneros?limit=200"
+    if filtros_and is not None:
+        url += f"&filtros_and={json.dumps(filtros_and)}"
+    if filtros_or is not None:
+        url += f"&filtros_or={json.dumps(filtros_or)}"
+    r = client.get(url, headers=headers)
+    assert r.status_code == 200, r.text
+    return sorted(c["documento"] for c in r.json() if c["documento"].startswith("DSL-"))
+
+
+def test_operadores_dsl(client, db):
+    user = create_user(db, "admin@test.com", RolEnum.ADMIN)
+    headers = {"Authorization": f"Bearer {login(client, 'admin@test.com')}"}
+    _seed(db, user)
+
+    assert _docs(client, headers, {"dsl_estado": "activo"}) == ["DSL-1", "DSL-4"]
+    assert _docs(client, headers, filtros_or={"dsl_estado": ["activo", "pendiente"]}) == ["DSL-1", "DSL-2", "DSL-4"]
+    assert _docs(client, headers, {"dsl_edad": {"between": [18, 35]}}) == ["DSL-2", "DSL-4"]
+    assert _docs(client, headers, {"dsl_edad": {"gte": 25, "lte": 40}, "dsl_estado": "baja"}) == ["DSL-3"]
+    assert _docs(client, headers, {"dsl_alta": {"gte": "2024-03-01", "lt": "2025-01-01"}}) == ["DSL-2", "DSL-3"]
+    assert _docs(client, headers, {"dsl_madre": {"prefix": "Mar"}}) == ["DSL-1", "DSL-2"]
+    assert _docs(client, headers, {"dsl_madre": {"exists": False}}) == ["DSL-3"]
+    assert _docs(client, headers, filtros_or={"dsl_edad": {"lt": 18}, "dsl_madre": "Rosa"}) == ["DSL-1", "DSL-4"]
+
+
+def test_dsl_errores_de_tipo_400(client, db):
+    create_user(db, "admin@test.com", RolEnum.ADMIN)
+    headers = {"Authorization": f"Bearer {login(client, 'admin@test.com')}"}
+    _seed(db, create_user(db, "admin@test.com", RolEnum.ADMIN))
+
+    for filtros in (
+        {"dsl_edad": {"gte": "muchos"}},
+        {"dsl_edad": {"prefix": "1"}},
+        {"dsl_alta": {"between": ["2024-01-01"]}},
+        {"dsl_estado": {"like": "a"}},
+        {"no_existe": {"gte": 1}},
+        # no finitos / exponente desmedido: 400, no 500 (ni un int de un millón de dígitos)
+        {"dsl_edad": "Infinity"},
+        {"dsl_edad": {"gte": "-Infinity"}},
+        {"dsl_edad": "NaN"},
+        {"dsl_edad": ["sNaN"]},
+        {"dsl_edad": "1e999999"},
+        {"dsl_edad": {"lt": "1e-999999"}},
+    ):
+        r = client.get(f"/comuneros?filtros_and={json.dumps(filtros)}", headers=headers)
+        assert r.status_code == 400, filtros
+
+
+def test_datos_sucios_no_rompen_el_filtro(client, db):
+    user = create_user(db, "admin@test.com", RolEnum.ADMIN)
+    headers = {"Authorization": f"Bearer {login(client, 'admin@test.com')}"}
+    for nombre, tipo in {"sucio_edad": "number", "sucio_alta": "date"}.items():
+        if not db.execute(select(CampoFormulario).where(CampoFormulario.nombre_campo == nombre)).scalar_one_or_none():
+            db.add(CampoFormulario(nombre_campo=nombre, tipo=tipo))
+    # cargados por fuera de la validación (datos viejos / SQL directo)
+    for documento, datos in (
+        ("SUCIO-1", {"sucio_edad": 20, "sucio_alta": "2024-01-10"}),
+        ("SUCIO-2", {"sucio_edad": "n/d", "sucio_alta": "10/01/2024"}),
+    ):
+        if not db.execute(select(Comunero).where(Comunero.documento == documento)).scalar_one_or_none():
+            db.add(Comunero(nombre=documento, documento=documento, datos_dinamicos=datos, creado_por=user.id))
+    db.commit()
+
+    r = client.get(f"/comuneros?filtros_and={json.dumps({'sucio_edad': {'gte': 18}})}", headers=headers)
+    assert r.status_code == 200, r.text
+    assert [c["documento"] for c in r.json() if c["documento"].startswith("SUCIO-")] == ["SUCIO-1"]
+
+    r = client.get(f"/comuneros?filtros_and={json.dumps({'sucio_alta': {'gte': '2024-01-01'}})}", headers=headers)
+    assert r.status_code == 200, r.text
+    assert [c["documento"] for c in r.json() if c["documento"].startswith("SUCIO-")] == ["SUCIO-1"]
+
+
+def test_clave_sin_campo_compara_como_texto(client, db):
+    user = create_user(db, "admin@test.com", RolEnum.ADMIN)
+    headers = {"Authorization": f"Bearer {login(client, 'admin@test.com')}"}
+    # claves sin CampoFormulario (datos anteriores a la definición del campo)
+    for documento, datos in (("LIBRE-1", {"libre_lote": 7}), ("LIBRE-2", {"libre_lote": "8"})):
+        if not db.execute(select(Comunero).where(Comunero.documento == documento)).scalar_one_or_none():
+            db.add(Comunero(nombre=documento, documento=documento, datos_dinamicos=datos, creado_por=user.id))
+    db.commit()
+
+    def libres(**filtros):
+        url = "/comuneros?limit=200" + "".join(f"&{k}={json.dumps(v)}" for k, v in filtros.items())
+        r = client.get(url, headers=headers)
+        assert r.status_code == 200, r.text
+        return sorted(c["documento"] for c in r.json() if c["documento"].startswith("LIBRE-"))
+
+    # como antes del DSL: "7" encuentra el 7 numérico
+    assert libres(filtros_and={"libre_lote": "7"}) == ["LIBRE-1"]
+    assert libres(filtros_and={"libre_lote": 8}) == ["LIBRE-2"]
+    assert libres(filtros_or={"libre_lote": [7, "8"]}) == ["LIBRE-1", "LIBRE-2"]
@@ -0,0 +1,145 @@
+import io
+import json
+
+from openpyxl import Workbook
+from sqlalchemy import func, select
+
+from app.models.campos_formulario import CampoFormulario
+from app.models.comunero import Comunero
+from app.models.usuario import RolEnum
+from tests.utils import create_user, login
+
+
+def _setup(client, db):
+    create_user(db, "admin@test.com", RolEnum.ADMIN)
+    token = login(client, "admin@test.com")
+    for nombre, tipo in (("imp_edad", "int"), ("imp_barrio", "text")):
+        if not db.execute(select(CampoFormulario).where(CampoFormulario.nombre_campo == nombre)).scalar_one_or_none():
+            db.add(CampoFormulario(nombre_campo=nombre, tipo=tipo))
+    db.commit()
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_importar_csv_con_errores_por_fila(client, db):
+    headers = _setup(client, db)
+
+    csv_txt = "Nombre;DNI;imp_edad;Barrio;otra\n"
+    csv_txt += "".join(f"Imp {i};IMP-CSV-{i};{20 + i};Centro;x\n" for i in range(4))
+    csv_txt += "Malo;IMP-CSV-MALO;veinte;Centro;x\n"
+    csv_txt += ";;;;\n"
+
+    r = client.post(
+        "/importaciones/comuneros",
+        files={"archivo": ("padron.csv", csv_txt.encode("utf-8"), "text/csv")},
+        data={"mapeo": json.dumps({"DNI": "documento", "Barrio": "imp_barrio"})},
+        headers=headers,
+    )
+    assert r.status_code == 202, r.text
+    job_id = r.json()["id"]
+
+    r = client.get(f"/importaciones/{job_id}", headers=headers)
+    assert r.status_code == 200
+    job = r.json()
+    assert job["estado"] == "completado", job
+    assert (job["filas_procesadas"], job["insertados"], job["errores"]) == (5, 4, 1)
+    assert job["errores_detalle"][0]["fila"] == 6
+    assert job["errores_detalle"][0]["code"] == "VALIDACION"
+    assert "otra" in job["mensaje"]
+    assert job["filas_por_segundo"] is not None
+
+    c = db.execute(select(Comunero).where(Comunero.documento == "IMP-CSV-2")).scalar_one()
+    assert c.datos_dinamicos == {"imp_edad": 22, "imp_barrio": "Centro"}
+
+
+def test_importar_xlsx(client, db):
+    headers = _setup(client, db)
+
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["nombre", "documento", "imp_edad"])
+    for i in range(3):
+        ws.append([f"Xlsx {i}", 5550000 + i, 30.0])
+    buf = io.BytesIO()
+    wb.save(buf)
+
+    r = client.post(
+        "/importaciones/comuneros",
+        files={"archivo": ("padron.xlsx", buf.getvalue(), "application/octet-stream")},
+        headers=headers,
+    )
+    assert r.status_code == 202, r.text
+    job = client.get(f"/importaciones/{r.json()['id']}", headers=headers).json()
+    assert job["estado"] == "completado", job
+    assert job["insertados"] == 3
+
+    # celdas numéricas de Excel -> documento "5550000", no "5550000.0"
+    assert db.execute(select(func.count()).where(Comunero.documento == "5550000")).scalar_one() == 1
+
+
+def test_importar_sin_columnas_obligatorias_falla(client, db):
+    headers = _setup(client, db)
+
+    r = client.post(
+        "/importaciones/comuneros",
+        files={"archivo": ("x.csv", b"nombre,imp_edad\nA,1\n", "text/csv")},
+        headers=headers,
+    )
+    job = client.get(f"/importaciones/{r.json()['id']}", headers=headers).json()
+    assert job["estado"] == "fallido"
+    assert "documento" in job["mensaje"]
+
+    r = client.post(
+        "/importaciones/comuneros",
+        files={"archivo": ("x.pdf", b"%PDF", "application/pdf")},
+        headers=headers,
+    )
+    assert r.status_code == 400
+
+
+def test_importar_csv_codificaciones(client, db):
+    headers = _setup(client, db)
+    csv_txt = "nombre;documento;imp_barrio\nJosé Peña;IMP-ENC-1;Añatuya\nMaría;IMP-ENC-2;Centro\n"
+
+    # Excel en Windows: cp1252, detectado sin indicarlo
+    r = client.post(
+        "/importaciones/comuneros",
+        files={"archivo": ("padron.csv", csv_txt.encode("cp1252"), "text/csv")},
+        headers=headers,
+    )
+    job = client.get(f"/importaciones/{r.json()['id']}", headers=headers).json()
+    assert (job["estado"], job["insertados"], job["errores"]) == ("completado", 2, 0), job
+    c = db.execute(select(Comunero).where(Comunero.documento == "IMP-ENC-1")).scalar_one()
+    assert (c.nombre, c.datos_dinamicos["imp_barrio"]) == ("José Peña", "Añatuya")
+
+    # UTF-8 forzado: la fila con bytes inválidos es un error de esa fila, el resto entra
+    cuerpo = "nombre;documento\nAna;IMP-ENC-3\n".encode("utf-8") + "Peña;IMP-ENC-4\n".encode("cp1252")
+    r = client.post(
+        "/importaciones/comuneros",
+        files={"archivo": ("padron.csv", cuerpo, "text/csv")},
+        data={"codificacion": "utf-8"},
+        headers=headers,
+    )
+    job = client.get(f"/importaciones/{r.json()['id']}", headers=headers).json()
+    assert (job["estado"], job["filas_procesadas"], job["insertados"], job["errores"]) == ("completado", 2, 1, 1), job
+    assert job["errores_detalle"][0]["fila"] == 3
+    assert job["errores_detalle"][0]["code"] == "CODIFICACION"
+
+    r = client.post(
+        "/importaciones/comuneros",
+        files={"archivo": ("padron.csv", cuerpo, "text/csv")},
+        data={"codificacion": "ebcdic"},
+        headers=headers,
+    )
+    assert r.status_code == 422
+
+
+def test_importar_solo_admin(client, db):
+    create_user(db, "operador@test.com", RolEnum.OPERADOR)
+    headers = {"Authorization": f"Bearer {login(client, 'operador@test.com')}"}
+    r = client.post(
+        "/importaciones/comuneros",
+        files={"archivo": ("x.csv", b"nombre,documento\nA,1\n", "text/csv")},
+        headers=headers,
+    )
+    assert r.status_code == 403
+    assert r.json()["detail"] == "Solo administradores"
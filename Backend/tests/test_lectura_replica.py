@@ -0,0 +1,85 @@
+from starlette.requests import Request
+
+import app.config as config
+from app.models.usuario import RolEnum
+from app.utils.security import create_access_token
+from tests.utils import create_user, login
+
+
+class _Sesion(str):
+    def close(self):
+        pass
+
+
+def _request(token=None, cookie=None):
+    headers = []
+    if token:
+        headers.append((b"authorization", f"Bearer {token}".encode()))
+    if cookie:
+        headers.append((b"cookie", cookie.encode()))
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def _sesion_elegida(request):
+    gen = config.get_read_db(request)
+    db = next(gen)
+    gen.close()
+    return db
+
+
+def test_get_read_db_usa_replica_salvo_pin(monkeypatch):
+    monkeypatch.setattr(config, "read_engine", object())  # "hay réplica"
+    monkeypatch.setattr(config, "SessionLocal", lambda: _Sesion("primaria"))
+    monkeypatch.setattr(config, "ReadSessionLocal", lambda: _Sesion("replica"))
+    monkeypatch.setattr(config, "_pins", {})
+
+    token = create_access_token({"sub": "987654"})
+    assert _sesion_elegida(_request(token)) == "replica"
+    assert _sesion_elegida(_request()) == "replica"
+
+    config.fijar_a_primaria(987654, segundos=60)
+    assert _sesion_elegida(_request(token)) == "primaria"
+    # otro usuario no queda fijado
+    assert _sesion_elegida(_request(create_access_token({"sub": "1"}))) == "replica"
+
+    # pin vencido -> vuelve a la réplica
+    config.fijar_a_primaria(987654, segundos=60)
+    config._pins[987654] = 0
+    assert _sesion_elegida(_request(token)) == "replica"
+
+    # cookie de pin (escritura atendida por otro worker)
+    assert _sesion_elegida(_request(cookie=f"{config.PIN_COOKIE}=1")) == "primaria"
+
+
+def test_sin_replica_todo_va_a_primaria(monkeypatch):
+    monkeypatch.setattr(config, "read_engine", config.engine)
+    monkeypatch.setattr(config, "SessionLocal", lambda: _Sesion("primaria"))
+    monkeypatch.setattr(config, "ReadSessionLocal", lambda: _Sesion("replica"))
+    assert _sesion_elegida(_request()) == "primaria"
+
+
+def test_escritura_fija_usuario_a_primaria(client, db):
+    user = create_user(db, "admin@test.com", RolEnum.ADMIN)
+    token = login(client, "admin@test.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    config._pins.pop(user.id, None)
+
+    # lecturas no fijan
+    r = client.get("/comuneros?limit=1", headers=headers)
+    assert r.status_code == 200
+    assert config.PIN_COOKIE not in r.cookies
+    assert user.id not in config._pins
+
+    # escritura fallida (400/409) tampoco
+    r = client.post("/comuneros", json={"nombre": "x"}, headers=headers)
+    assert r.status_code >= 400
+    assert user.id not in config._pins
+
+    r = client.post(
+        "/comuneros",
+        json={"nombre": "Replica Pin", "documento": "REPL-PIN-1", "datos_dinamicos": {}},
+        headers=headers,
+    )
+    assert r.status_code == 201
+    assert r.cookies.get(config.PIN_COOKIE) == "1"
+    assert config.fijado_a_primaria(_request(token))
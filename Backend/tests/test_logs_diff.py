@@ -0,0 +1,140 @@
+import threading
+
+from sqlalchemy import event, select
+
+from app.config import settings
+from app.crud.log_crud import aplicar_cambios, diff_snapshots, expandir_logs, registrar_log
+from app.models.campos_formulario import CampoFormulario
+from app.models.log_auditoria import LogAuditoria
+from app.models.usuario import RolEnum
+from tests.conftest import TestingSessionLocal
+from tests.utils import create_user, login
+
+
+def test_diff_y_aplicar_ida_y_vuelta():
+    antes = {"nombre": "A", "datos_dinamicos": {"zona": "N", "edad": 3, "a.b": 1}, "is_deleted": False}
+    despues = {"nombre": "A", "datos_dinamicos": {"zona": "S", "a.b": 2, "nueva": [1]}, "is_deleted": 0}
+
+    cambios = diff_snapshots(antes, despues)
+    assert cambios == {
+        "datos_dinamicos.zona": {"de": "N", "a": "S"},
+        "datos_dinamicos.edad": {"de": 3},
+        "datos_dinamicos.a.b": {"de": 1, "a": 2},
+        "datos_dinamicos.nueva": {"a": [1]},
+        "is_deleted": {"de": False, "a": 0},  # mismo valor en Python, distinto en JSON
+    }
+    assert aplicar_cambios(antes, cambios) == despues
+    assert aplicar_cambios(despues, cambios, hacia_atras=True) == antes
+    assert antes["datos_dinamicos"]["zona"] == "N"  # no muta la entrada
+
+
+def test_modo_diff_checkpoints_reconstruccion_y_expansion(client, db, monkeypatch):
+    monkeypatch.setattr(settings, "AUDITORIA_MODO", "diff")
+    monkeypatch.setattr(settings, "AUDITORIA_CHECKPOINT_CADA", 3)
+
+    create_user(db, "admin@test.com", RolEnum.ADMIN)
+    headers = {"Authorization": f"Bearer {login(client, 'admin@test.com')}"}
+    for nombre in ("diff_zona", "diff_nota"):
+        if not db.execute(select(CampoFormulario).where(CampoFormulario.nombre_campo == nombre)).scalar_one_or_none():
+            db.add(CampoFormulario(nombre_campo=nombre, tipo="text"))
+    db.commit()
+
+    r = client.post(
+        "/comuneros",
+        json={"nombre": "Diff", "documento": "DIFF-LOG-1", "datos_dinamicos": {"diff_zona": "v1", "diff_nota": "x"}},
+        headers=headers,
+    )
+    assert r.status_code in (200, 201), r.text
+    cid = r.json()["id"]
+    snapshots = {1: r.json()}
+    for v, zona in enumerate(("v2", "v3", "v4", "v5"), start=2):
+        r = client.patch(f"/comuneros/{cid}", json={"datos_dinamicos": {"diff_zona": zona}}, headers=headers)
+        assert r.status_code == 200, r.text
+        snapshots[v] = r.json()
+
+    logs = db.execute(
+        select(LogAuditoria)
+        .where(LogAuditoria.entidad == "comuneros", LogAuditoria.entidad_id == cid)
+        .order_by(LogAuditoria.version)
+    ).scalars().all()
+    assert [l.version for l in logs] == [1, 2, 3, 4, 5]
+
+    # v1 (CREAR) y v4 (checkpoint) traen el snapshot entero; el resto solo el diff
+    assert [l.datos_nuevos is not None for l in logs] == [True, False, False, True, False]
+    assert all(l.datos_anteriores is None for l in logs)
+    assert logs[1].cambios["datos_dinamicos.diff_zona"] == {"de": "v1", "a": "v2"}
+    assert "nombre" not in logs[1].cambios
+
+    # reconstrucción de cualquier versión
+    for v, esperado in snapshots.items():
+        r = client.get(f"/logs/entidad/comuneros/{cid}/version/{v}", headers=headers)
+        assert r.status_code == 200, r.text
+        datos = r.json()["datos"]
+        assert datos["datos_dinamicos"] == esperado["datos_dinamicos"]
+        assert datos["nombre"] == "Diff"
+    assert client.get(f"/logs/entidad/comuneros/{cid}/version/9", headers=headers).status_code == 404
+
+    # /logs: diff tal cual por defecto, antes/después enteros con completo=true
+    r = client.get(f"/logs?entidad=comuneros&entidad_id={cid}", headers=headers)
+    por_version = {l["version"]: l for l in r.json()}
+    assert por_version[3]["datos_nuevos"] is None
+    assert por_version[3]["cambios"]["datos_dinamicos.diff_zona"] == {"de": "v2", "a": "v3"}
+
+    r = client.get(f"/logs?entidad=comuneros&entidad_id={cid}&completo=true", headers=headers)
+    por_version = {l["version"]: l for l in r.json()}
+    for v in (2, 3, 4, 5):
+        assert por_version[v]["datos_anteriores"]["datos_dinamicos"] == snapshots[v - 1]["datos_dinamicos"]
+        assert por_version[v]["datos_nuevos"]["datos_dinamicos"] == snapshots[v]["datos_dinamicos"]
+    assert por_version[1]["datos_anteriores"] is None
+
+    # varias entidades: todas las cadenas en UNA query
+    r = client.post("/comuneros", json={"nombre": "Diff 2", "documento": "DIFF-LOG-2",
+                                        "datos_dinamicos": {"diff_zona": "w1"}}, headers=headers)
+    otro = r.json()["id"]
+    client.patch(f"/comuneros/{otro}", json={"datos_dinamicos": {"diff_zona": "w2"}}, headers=headers)
+    db.rollback()
+    logs = db.execute(
+        select(LogAuditoria).where(LogAuditoria.entidad == "comuneros", LogAuditoria.entidad_id.in_([cid, otro]),
+                                   LogAuditoria.version.in_([2, 5]))
+    ).scalars().all()
+    sentencias = []
+    escuchar = lambda *a, **kw: sentencias.append(a[2])  # noqa: E731
+    event.listen(db.get_bind(), "before_cursor_execute", escuchar)
+    try:
+        expandidos = expandir_logs(db, logs)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", escuchar)
+    assert len(sentencias) == 1
+    por_id = {l.id: (l.entidad_id, l.version) for l in logs}
+    assert {por_id[i]: d["datos_dinamicos"]["diff_zona"] for i, (_, d) in expandidos.items()} == {
+        (cid, 2): "v2", (cid, 5): "v5", (otro, 2): "w2",
+    }
+
+
+def test_versiones_sin_carrera_en_modo_diff(db, monkeypatch):
+    monkeypatch.setattr(settings, "AUDITORIA_MODO", "diff")
+    user = create_user(db, "admin@test.com", RolEnum.ADMIN)
+
+    def registrar(sesion, nombre):
+        registrar_log(sesion, usuario_id=user.id, accion="EDITAR", entidad="carrera_test", entidad_id=1,
+                      datos_anteriores={"n": 0}, datos_nuevos={"n": nombre})
+        sesion.flush()
+
+    a, b = TestingSessionLocal(), TestingSessionLocal()
+    try:
+        registrar(a, "a")  # toma el lock del registro y no commitea todavía
+        hilo = threading.Thread(target=lambda: (registrar(b, "b"), b.commit()))
+        hilo.start()
+        hilo.join(0.5)
+        assert hilo.is_alive()  # b espera el lock en vez de leer el mismo MAX(version)
+        a.commit()
+        hilo.join(10)
+        assert not hilo.is_alive()
+    finally:
+        a.close()
+        b.close()
+
+    versiones = db.execute(
+        select(LogAuditoria.version).where(LogAuditoria.entidad == "carrera_test").order_by(LogAuditoria.version)
+    ).scalars().all()
+    assert versiones == [1, 2]
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+from app.models.log_auditoria import LogAuditoria
+from app.models.usuario import RolEnum
+from tests.utils import create_user, login
+
+
+def _sembrar(db, usuario_id, entidad, entidad_id, n):
+    base = datetime.utcnow().replace(microsecond=0) - timedelta(hours=1)
+    for i in range(n):
+        # timestamps repetidos de a pares: el desempate por id tiene que funcionar
+        db.add(LogAuditoria(
+            usuario_id=usuario_id, accion="EDITAR", entidad=entidad, entidad_id=entidad_id,
+            version=i + 1, datos_nuevos={"i": i}, timestamp=base + timedelta(seconds=i // 2),
+        ))
+    db.commit()
+
+
+def _paginar(client, url, headers, **params):
+    vistos, cursor = [], None
+    while True:
+        r = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})}, headers=headers)
+        assert r.status_code == 200, r.text
+        vistos += r.json()
+        cursor = r.headers.get("x-next-cursor")
+        if not cursor:
+            return vistos
+
+
+def test_keyset_historial_y_resumen(client, db):
+    user = create_user(db, "admin@test.com", RolEnum.ADMIN)
+    headers = {"Authorization": f"Bearer {login(client, 'admin@test.com')}"}
+    _sembrar(db, user.id, "keyset_test", 7, 11)
+    _sembrar(db, user.id, "keyset_test", 8, 2)
+
+    # historia de un registro: todas, sin repetir, (timestamp DESC, id DESC)
+    logs = _paginar(client, "/logs/entidad/keyset_test/7", headers, limit=3)
+    assert [l["version"] for l in logs] == list(range(11, 0, -1))
+    assert {l["entidad_id"] for l in logs} == {7}
+
+    # /logs con cursor + filtro
+    logs = _paginar(client, "/logs", headers, entidad="keyset_test", limit=4)
+    assert len(logs) == 13
+    claves = [(l["timestamp"], l["id"]) for l in logs]
+    assert claves == sorted(claves, reverse=True)
+
+    # detalle=false: solo la línea de resumen; GET /logs/{id} la expande
+    r = client.get("/logs/entidad/keyset_test/7?limit=2&detalle=false", headers=headers)
+    fila = r.json()[0]
+    assert set(fila) == {"id", "usuario_id", "accion", "entidad", "entidad_id", "version", "timestamp"}
+    r = client.get(f"/logs/{fila['id']}", headers=headers)
+    assert r.status_code == 200
+    assert r.json()["datos_nuevos"] == {"i": 10}
+
+    assert client.get("/logs/999999999", headers=headers).status_code == 404
+    assert client.get("/logs?cursor=basura", headers=headers).status_code == 400
+
+
+def test_buscar_por_campo_cambiado(client, db):
+    user = create_user(db, "admin@test.com", RolEnum.ADMIN)
+    headers = {"Authorization": f"Bearer {login(client, 'admin@test.com')}"}
+    ahora = datetime.utcnow()
+    for i, (de, a) in enumerate((("N", "S"), ("S", "Oeste"), ("Oeste", "S"), (None, 30), (30, "30"))):
+        db.add(LogAuditoria(
+            usuario_id=user.id, accion="EDITAR", entidad="buscar_test", entidad_id=i, version=2,
+            cambios={"datos_dinamicos.zona_b": {"de": de, "a": a}}, timestamp=ahora - timedelta(days=i),
+        ))
+    db.add(LogAuditoria(
+        usuario_id=user.id, accion="EDITAR", entidad="buscar_test", entidad_id=9, version=2,
+        cambios={"nombre": {"de": "x", "a": "S"}}, timestamp=ahora,
+    ))
+    db.commit()
+
+    def ids(**params):
+        r = client.get("/logs/cambios", params={"entidad": "buscar_test", **params}, headers=headers)
+        assert r.status_code == 200, r.text
+        return [l["entidad_id"] for l in r.json()]
+
+    assert ids(clave="datos_dinamicos.zona_b") == [0, 1, 2, 3, 4]
+    assert ids(clave="datos_dinamicos.zona_b", a="S") == [0, 2]
+    assert ids(clave="datos_dinamicos.zona_b", de="S", a="Oeste") == [1]
+    assert ids(clave="datos_dinamicos.zona_b", a="30") == [3]          # número
+    assert ids(clave="datos_dinamicos.zona_b", a='"30"') == [4]        # texto
+    assert ids(clave="datos_dinamicos.zona_b", de="null") == [3]
+    assert ids(clave="datos_dinamicos.zona_b", a="S", desde=(ahora - timedelta(days=1)).isoformat()) == [0]
+
+    # cursor
+    logs = _paginar(client, "/logs/cambios", headers, entidad="buscar_test", clave="datos_dinamicos.zona_b", limit=2)
+    assert [l["entidad_id"] for l in logs] == [0, 1, 2, 3, 4]
@@ -0,0 +1,58 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from app.models.comunero import Comunero
+from app.models.usuario import RolEnum
+from app.schemas.comunero_schema import ComuneroResponse
+from app.utils.serializacion import RespuestaJSON
+from tests.utils import create_user, login
+
+
+def test_respuesta_json_tipos():
+    body = RespuestaJSON(content={
+        "d": Decimal("2"),
+        "f": Decimal("2.5"),
+        "t": datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        1: "clave int",
+    }).body
+    assert body == b'{"d":2,"f":2.5,"t":"2026-01-02T03:04:05Z","1":"clave int"}'
+
+
+def test_respuesta_json_decimales_no_finitos_y_enormes():
+    body = RespuestaJSON(content=[
+        Decimal("NaN"), Decimal("sNaN"), Decimal("Infinity"), Decimal("-Infinity"),
+        Decimal("1e999999"), Decimal("1e20"), Decimal("123456789012345678"),
+    ]).body
+    assert body == b'[null,null,null,null,null,1e20,123456789012345678]'
+
+
+def test_listado_rapido_igual_a_response_model(client, db):
+    user = create_user(db, "admin@test.com", RolEnum.ADMIN)
+    token = login(client, "admin@test.com")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    c = Comunero(
+        nombre="Serial Rapido",
+        documento="SER-RAP-1",
+        datos_dinamicos={"zona": "A", "n": 1.5, "tags": ["x"]},
+        creado_por=user.id,
+    )
+    db.add(c)
+    db.commit()
+    db.refresh(c)
+
+    r = client.get("/comuneros?limit=200", headers=headers)
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/json"
+    assert "etag" in r.headers
+
+    item = next(x for x in r.json() if x["id"] == c.id)
+    esperado = ComuneroResponse.model_validate(c).model_dump(mode="json")
+    assert item == esperado
+
+
+def test_openapi_conserva_response_model(client):
+    schema = client.get("/openapi.json").json()
+    ok = schema["paths"]["/comuneros"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert ok["type"] == "array"
+    assert ok["items"]["$ref"].endswith("/ComuneroResponse")
@@ -0,0 +1,112 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+import app.utils.validation as validation
+from app.models.usuario import RolEnum
+from app.utils.notificaciones import Escucha
+from app.utils.validation import CANAL_CAMPOS, ValidadorCampos, notificar_cambio_campos, validador_campos
+from tests.utils import create_user, login
+
+
+def _campo(nombre, tipo, obligatorio=False, opciones=None):
+    return SimpleNamespace(nombre_campo=nombre, tipo=tipo, obligatorio=obligatorio, opciones=opciones)
+
+
+def test_validador_compilado_errores_y_mensajes():
+    v = ValidadorCampos([
+        _campo("zona", "select", obligatorio=True, opciones={"values": ["A", "B"]}),
+        _campo("tags", "multiselect", opciones=["x", "y"]),
+        _campo("edad", "int"),
+        _campo("raro", "color"),
+    ])
+
+    v.validar({"zona": "A", "tags": ["x"], "edad": None})
+
+    errores = list(v.iter_errores({"tags": ["x", "z"], "edad": True, "otra": 1, "raro": "r"}))
+    assert errores == [
+        ("zona", "OBLIGATORIO", "El campo 'zona' es obligatorio"),
+        ("otra", "NO_PERMITIDO", "Campo no permitido: otra"),
+        ("tags", "OPCION_INVALIDA", "tags contiene opciones inválidas"),
+        ("edad", "TIPO", "edad debe ser entero"),
+        ("raro", "TIPO_NO_SOPORTADO", "Tipo de campo no soportado: raro (color)"),
+    ]
+
+    with pytest.raises(HTTPException) as e:
+        v.validar({"zona": "C"})
+    assert e.value.status_code == 400
+    assert e.value.detail == "zona contiene valor inválido"
+
+    with pytest.raises(HTTPException) as e:
+        v.validar_patch({"zona": None})
+    assert e.value.detail == "El campo 'zona' es obligatorio"
+    v.validar_patch({"edad": None, "tags": ["y"]})
+
+
+def test_escucha_notify_y_cero_queries(client, db):
+    recibido = threading.Event()
+
+    def avisar(payload):
+        validation.invalidar_validador(payload)
+        recibido.set()
+
+    escucha = Escucha({CANAL_CAMPOS: avisar}, reintento=0.2)
+    escucha.start()
+    try:
+        assert recibido.wait(10)  # al conectar invalida todo
+        for _ in range(50):
+            if escucha.activa():
+                break
+            threading.Event().wait(0.1)
+        validation.registrar_escucha(escucha.activa)
+
+        validador_campos(db)  # compila (1 query)
+        queries = []
+        bind = db.get_bind()
+        contar = lambda *a, **k: queries.append(a[2])  # noqa: E731
+        event.listen(bind, "before_cursor_execute", contar)
+        try:
+            v = validador_campos(db)
+            assert validador_campos(db) is v
+            assert queries == []
+        finally:
+            event.remove(bind, "before_cursor_execute", contar)
+
+        # NOTIFY de "otro worker" -> se recompila
+        recibido.clear()
+        notificar_cambio_campos(db)
+        db.commit()
+        assert recibido.wait(10)
+        assert validador_campos(db) is not v
+
+        # la escritura vía API (crud) invalida en este mismo worker al instante
+        create_user(db, "admin@test.com", RolEnum.ADMIN)
+        token = login(client, "admin@test.com")
+        headers = {"Authorization": f"Bearer {token}"}
+        r = client.post(
+            "/campos",
+            json={"nombre_campo": "val_cache_color", "tipo": "select", "opciones": {"values": ["rojo"]}},
+            headers=headers,
+        )
+        assert r.status_code == 201, r.text
+        campo_id = r.json()["id"]
+        assert validador_campos(db).tipos["val_cache_color"] == "select"
+
+        r = client.post(
+            "/comuneros",
+            json={"nombre": "Val", "documento": "VAL-CACHE-1", "datos_dinamicos": {"val_cache_color": "azul"}},
+            headers=headers,
+        )
+        assert r.status_code == 400
+        assert r.json()["detail"] == "val_cache_color contiene valor inválido"
+
+        r = client.put(f"/campos/{campo_id}", json={"activo": False}, headers=headers)
+        assert r.status_code == 200
+        assert "val_cache_color" not in validador_campos(db).tipos
+    finally:
+        validation.registrar_escucha(lambda: False)
+        escucha.detener()
+        escucha.join(5)
@@ -0,0 +1,28 @@
+from sqlalchemy import select
+
+from app.models.usuario import Usuario
+from app.utils.security import hash_password
+
+
+# ===============================
+# Helpers compartidos por los tests
+# ===============================
+def create_user(db, email, rol):
+    u = db.execute(select(Usuario).where(Usuario.email == email)).scalar_one_or_none()
+    if not u:
+        u = Usuario(
+            email=email,
+            nombre=email.split("@")[0],
+            hashed_password=hash_password("123456"),
+            rol=rol,
+            activo=True,
+        )
+        db.add(u)
+        db.commit()
+    return u
+
+
+def login(client, email):
+    r = client.post("/auth/login", data={"username": email, "password": "123456"})
+    assert r.status_code == 200
+    return r.json()["access_token"]